@@ -52,5 +52,41 @@ def longest_streak_for_habit(habit):
     return habit.streak()
 
 
+def longest_ever_streak_for_habit(habit):
+    """
+    Returns the longest run of consecutive periods a habit was ever completed in,
+    which may be longer than its current streak.
+
+    Args:
+        habit (Habit): The habit to get the longest-ever streak for.
+
+    Returns:
+        int: The longest-ever streak of the habit.
+    """
+    return habit.run_index().longest_run()
 
 
+def longest_ever_streak_all_habits(habits):
+    """
+    Returns the habit with the longest-ever run streak among all habits.
+
+    Args:
+        habits (list): A list of Habit objects.
+
+    Returns:
+        Habit: The habit with the longest-ever streak, or None if there are no habits.
+    """
+    return max(habits, key=longest_ever_streak_for_habit, default=None)
+
+
+def streak_summary(habit):
+    """
+    Returns the longest-ever streak, current run, number of runs and gap histogram of a habit.
+
+    Args:
+        habit (Habit): The habit to summarize.
+
+    Returns:
+        StreakSummary: The streak statistics of the habit.
+    """
+    return habit.run_index().summary()
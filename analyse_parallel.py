@@ -0,0 +1,102 @@
+"""
+Parallel analysis of large numbers of habits in worker processes.
+
+The habit IDs are split into shards of consecutive ID ranges. Every worker process opens its own read-only
+connection to the database file, loads only the habits of its shard, computes their streaks with
+Habit.streak() and returns its top k as (habit ID, name, streak) tuples; Habit objects never cross process
+boundaries. The parent merges the partial results into the overall top k.
+"""
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from db import Database
+
+
+def _rank(result):
+    """Sort key of a (habit ID, name, streak) result: longest streak first, on ties the oldest habit."""
+    habit_id, name, streak = result
+    return streak, -habit_id
+
+
+def shard_ranges(db_path, n_shards):
+    """
+    Splits the habit IDs of the database into consecutive ranges of about the same width.
+
+    Args:
+        db_path (str): The file path of the database.
+        n_shards (int): The number of ranges to split the IDs into.
+
+    Returns:
+        list: (first ID, last ID) tuples covering all habit IDs, empty if there are no habits.
+    """
+    db = Database(db_path, read_only=True)
+    try:
+        first_id, last_id = db.conn.execute('SELECT MIN(id), MAX(id) FROM habits').fetchone()
+    finally:
+        db.close()
+    if first_id is None:
+        return []
+    width = -(-(last_id - first_id + 1) // n_shards)  # Rounded up, so that n_shards ranges cover all IDs
+    return [(start, min(start + width - 1, last_id)) for start in range(first_id, last_id + 1, width)]
+
+
+def top_streaks_in_shard(db_path, id_range, k):
+    """
+    Computes the current streaks of the habits in one shard and returns the k longest.
+
+    Runs in a worker process, with its own read-only connection to the database.
+
+    Args:
+        db_path (str): The file path of the database.
+        id_range (tuple): The first and last habit ID of the shard.
+        k (int): The number of results to return.
+
+    Returns:
+        list: Up to k (habit ID, name, streak) tuples, longest streak first.
+    """
+    db = Database(db_path, read_only=True)
+    try:
+        habits = db.load_habit_objects(id_range=id_range, with_ids=True)
+    finally:
+        db.close()
+    results = ((habit_id, habit.get_name(), habit.streak()) for habit_id, habit in habits)
+    return heapq.nlargest(k, results, key=_rank)
+
+
+def top_streaks(db_path, k=10, workers=None):
+    """
+    Returns the k habits with the longest current streaks, analysing shards of the habits in parallel.
+
+    Args:
+        db_path (str): The file path of the database.
+        k (int): The number of habits to return.
+        workers (int): The number of worker processes, by default the number of CPUs. With 1 worker the
+            analysis runs in the calling process.
+
+    Returns:
+        list: Up to k (habit ID, name, streak) tuples, longest streak first and on ties the oldest habit.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shard_ranges(db_path, workers)
+    if workers == 1:
+        partials = [top_streaks_in_shard(db_path, id_range, k) for id_range in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(top_streaks_in_shard, [db_path] * len(shards), shards, [k] * len(shards)))
+    return heapq.nlargest(k, (result for partial in partials for result in partial), key=_rank)
+
+
+def longest_streak_all_habits(db_path, workers=None):
+    """
+    Returns the name of the habit with the longest current streak, like analyse.longest_streak_all_habits.
+
+    Args:
+        db_path (str): The file path of the database.
+        workers (int): The number of worker processes, by default the number of CPUs.
+
+    Returns:
+        str: The name of the habit with the longest streak, or None if there are no habits.
+    """
+    top = top_streaks(db_path, 1, workers)
+    return top[0][1] if top else None
@@ -0,0 +1,108 @@
+"""
+SQL backend for the analytics module.
+
+The analyse functions run as queries against the Database instead of on Habit objects, so nothing has to
+be loaded into memory first: filters become WHERE clauses, name lists become projections and streaks are
+computed with window functions. Streaks are counted in periods like Habit.streak and streaks.py, using the
+period number stored with every completion: consecutive calendar days for daily habits and consecutive ISO
+calendar weeks for weekly habits, whatever the time of day.
+"""
+from collections import namedtuple
+
+
+StreakRow = namedtuple("StreakRow", ["habit_id", "name", "current", "best"])
+StreakRow.__doc__ = """
+Streak statistics of one habit, computed in SQL.
+
+Attributes:
+    habit_id (int): The ID of the habit.
+    name (str): The name of the habit.
+    current (int): The length of the latest run of consecutive periods.
+    best (int): The longest-ever run of consecutive periods.
+"""
+
+# Gaps and islands: within a habit, period - ROW_NUMBER() is the same for all periods of one run of
+# consecutive periods, so grouping by it yields the runs. It also grows from run to run, so the current
+# streak is the length of the run with the largest value. Habits without completions have streaks of 0.
+_STREAKS_SQL = '''
+    WITH runs AS (
+        SELECT habit_id, COUNT(*) AS length, island = MAX(island) OVER (PARTITION BY habit_id) AS is_latest
+        FROM (SELECT habit_id, period - ROW_NUMBER() OVER (PARTITION BY habit_id ORDER BY period) AS island
+              FROM completions)
+        GROUP BY habit_id, island
+    ), streaks AS (
+        SELECT habit_id, MAX(CASE WHEN is_latest THEN length END) AS current, MAX(length) AS best
+        FROM runs
+        GROUP BY habit_id
+    )
+    SELECT h.id, h.name, COALESCE(s.current, 0) AS current, COALESCE(s.best, 0) AS best
+    FROM habits h LEFT JOIN streaks s ON s.habit_id = h.id'''
+
+
+def list_all_habits(db):
+    """
+    Returns the names of all currently tracked habits.
+
+    Args:
+        db (Database): The database to query.
+
+    Returns:
+        list: A list of names of all habits.
+    """
+    return [name for (name,) in db.conn.execute('SELECT name FROM habits ORDER BY id')]
+
+
+def list_habits_by_periodicity(db, periodicity):
+    """
+    Returns the names of the habits that have the specified periodicity.
+
+    Args:
+        db (Database): The database to query.
+        periodicity (str): The periodicity to filter habits by ('daily' or 'weekly').
+
+    Returns:
+        list: The names of the habits with the given periodicity.
+    """
+    cursor = db.conn.execute('SELECT name FROM habits WHERE periodicity = ? ORDER BY id', (periodicity,))
+    return [name for (name,) in cursor]
+
+
+def streaks_all_habits(db):
+    """
+    Computes the current and longest-ever streak of every habit in a single query.
+
+    Args:
+        db (Database): The database to query.
+
+    Returns:
+        list: A StreakRow for every habit, ordered by habit ID.
+    """
+    return [StreakRow(*row) for row in db.conn.execute(_STREAKS_SQL + ' ORDER BY h.id')]
+
+
+def longest_streak_all_habits(db):
+    """
+    Returns the name of the habit with the longest current streak among all habits; on ties the oldest habit.
+
+    Args:
+        db (Database): The database to query.
+
+    Returns:
+        str: The name of the habit with the longest streak, or None if there are no habits.
+    """
+    row = db.conn.execute(_STREAKS_SQL + ' ORDER BY current DESC, h.id LIMIT 1').fetchone()
+    return row[1] if row else None
+
+
+def longest_ever_streak_all_habits(db):
+    """
+    Returns the name of the habit with the longest-ever streak among all habits; on ties the oldest habit.
+
+    Args:
+        db (Database): The database to query.
+
+    Returns:
+        str: The name of the habit with the longest-ever streak, or None if there are no habits.
+    """
+    row = db.conn.execute(_STREAKS_SQL + ' ORDER BY best DESC, h.id LIMIT 1').fetchone()
+    return row[1] if row else None
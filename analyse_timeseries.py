@@ -0,0 +1,151 @@
+"""
+Time-range and calendar-bucket analytics.
+
+The questions are answered from the daily, weekly and monthly rollup tables of the Database, which count
+the completions of every habit per bucket and are kept up to date as completions are saved. A range query
+therefore reads at most one row per habit and bucket, however many completions there are. Days and weeks
+are numbered like the periods in streaks.py, with weeks starting on Monday; months are numbered as
+year * 12 + month - 1.
+"""
+from datetime import datetime # used for the first moment of a bucket and for today's date
+from streaks import period_ordinal, period_start
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def bucket_of(date, granularity):
+    """
+    Converts a date into the number of the day, week or month bucket it belongs to.
+
+    Args:
+        date (date or datetime): The date.
+        granularity (str): The bucket size, 'day', 'week' or 'month'.
+
+    Returns:
+        int: The bucket number.
+    """
+    if granularity == 'month':
+        return date.year * 12 + date.month - 1
+    return period_ordinal(date, 'weekly' if granularity == 'week' else 'daily')
+
+
+def bucket_start(bucket, granularity):
+    """
+    Converts a bucket number back into the first moment of the bucket, the inverse of bucket_of.
+
+    Args:
+        bucket (int): The bucket number.
+        granularity (str): The bucket size, 'day', 'week' or 'month'.
+
+    Returns:
+        datetime: Midnight at the start of the day, of the Monday of the week or of the first day of the month.
+    """
+    if granularity == 'month':
+        return datetime(bucket // 12, bucket % 12 + 1, 1)
+    return period_start(bucket, 'weekly' if granularity == 'week' else 'daily')
+
+
+def _bucket_range(start, end, granularity):
+    """Return the numbers of the first and last bucket of a date range, checking the granularity."""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity '{granularity}', expected one of {GRANULARITIES}.")
+    return bucket_of(start, granularity), bucket_of(end, granularity)
+
+
+def completions_per_bucket(db, habit_id, start, end, granularity='week'):
+    """
+    Returns the number of completions of a habit in every day, week or month of a date range.
+
+    Args:
+        db (Database): The database to query.
+        habit_id (int): The ID of the habit.
+        start (date or datetime): The first date of the range.
+        end (date or datetime): The last date of the range, inclusive.
+        granularity (str): The bucket size, 'day', 'week' or 'month'.
+
+    Returns:
+        list: (bucket start, completions) tuples for every bucket of the range, in chronological order,
+            including buckets without completions.
+
+    Raises:
+        ValueError: If the granularity is unknown.
+    """
+    first, last = _bucket_range(start, end, granularity)
+    counts = {bucket: completions for _, bucket, completions in db.load_rollups(granularity, first, last, habit_id)}
+    return [(bucket_start(bucket, granularity), counts.get(bucket, 0)) for bucket in range(first, last + 1)]
+
+
+def completions_per_habit(db, start, end, granularity='week'):
+    """
+    Returns the number of completions of every habit in every day, week or month of a date range.
+
+    Args:
+        db (Database): The database to query.
+        start (date or datetime): The first date of the range.
+        end (date or datetime): The last date of the range, inclusive.
+        granularity (str): The bucket size, 'day', 'week' or 'month'.
+
+    Returns:
+        dict: A mapping of habit name to its list of completions per bucket, one count for every bucket of
+            the range in chronological order; the buckets start at bucket_start(bucket_of(start)).
+
+    Raises:
+        ValueError: If the granularity is unknown.
+    """
+    first, last = _bucket_range(start, end, granularity)
+    names = dict(db.conn.execute('SELECT id, name FROM habits ORDER BY id'))
+    counts = {habit_id: [0] * (last - first + 1) for habit_id in names}
+    for habit_id, bucket, completions in db.load_rollups(granularity, first, last):
+        if habit_id in counts:
+            counts[habit_id][bucket - first] = completions
+    return {names[habit_id]: habit_counts for habit_id, habit_counts in counts.items()}
+
+
+def completion_rate(db, habit_id, n_periods, today=None):
+    """
+    Returns the share of the last periods in which a habit was completed.
+
+    The periods are days for daily habits and calendar weeks for weekly habits, ending with the current one;
+    periods before the habit was created are not counted.
+
+    Args:
+        db (Database): The database to query.
+        habit_id (int): The ID of the habit.
+        n_periods (int): The number of periods to look back.
+        today (datetime): The current date, by default now.
+
+    Returns:
+        float: The completion rate between 0.0 and 1.0, or None if the habit does not exist.
+    """
+    row = db.conn.execute('SELECT periodicity, creation_date FROM habits WHERE id = ?', (habit_id,)).fetchone()
+    if row is None:
+        return None
+    periodicity, creation_date = row
+    granularity = 'week' if periodicity == 'weekly' else 'day'
+    last = bucket_of(today or datetime.now(), granularity)
+    first = max(last - n_periods + 1, bucket_of(datetime.fromisoformat(creation_date), granularity))
+    if first > last:
+        return 0.0
+    completed = sum(1 for _, _, completions in db.load_rollups(granularity, first, last, habit_id) if completions)
+    return completed / (last - first + 1)
+
+
+def heatmap(db, start, end, habit_id=None):
+    """
+    Returns the number of completions on every day of a date range, of one habit or of all habits together.
+
+    Args:
+        db (Database): The database to query.
+        start (date or datetime): The first day of the range.
+        end (date or datetime): The last day of the range, inclusive.
+        habit_id (int): Only count the completions of this habit, by default those of all habits.
+
+    Returns:
+        dict: A mapping of the date of every day of the range, in chronological order, to its completions.
+    """
+    first, last = _bucket_range(start, end, 'day')
+    if habit_id is None:
+        counts = dict(db.load_rollup_totals('day', first, last))
+    else:
+        counts = {bucket: completions for _, bucket, completions in db.load_rollups('day', first, last, habit_id)}
+    return {bucket_start(day, 'day').date(): counts.get(day, 0) for day in range(first, last + 1)}
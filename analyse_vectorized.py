@@ -0,0 +1,221 @@
+"""
+Optional NumPy backend for the analytics module.
+
+All completions are held in columnar arrays (one datetime64[D] array plus the position of the habit each
+completion belongs to), and the streak statistics of every habit are computed at once with array operations
+instead of looping over Habit objects. Streaks are counted in periods like in streaks.py: consecutive days for
+daily habits and consecutive ISO calendar weeks for weekly habits.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency, only needed for this backend
+    np = None
+
+
+HabitStats = namedtuple("HabitStats", ["current", "best", "completed", "rate"])
+HabitStats.__doc__ = """
+Streak statistics of all habits, as arrays aligned with CompletionColumns.habit_ids.
+
+Attributes:
+    current (ndarray): The length of the latest run of consecutive periods of each habit.
+    best (ndarray): The longest-ever run of consecutive periods of each habit.
+    completed (ndarray): The number of distinct periods in which each habit was completed.
+    rate (ndarray): The share of periods since creation (or the first completion, if earlier) that were completed.
+"""
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The vectorized analysis backend requires numpy: pip install numpy")
+
+
+def _day_array(date_strings):
+    """Convert 'YYYY-MM-DD...' strings into a datetime64[D] array."""
+    return np.array([date_string[:10] for date_string in date_strings], dtype='datetime64[D]')
+
+
+class CompletionColumns:
+    """
+    Columnar representation of all habits and their completions.
+
+    Attributes:
+        habit_ids (ndarray): The IDs of all habits (or their positions, when built from Habit objects).
+        names (list): The names of the habits, aligned with habit_ids.
+        periodicities (ndarray): The periodicity of every habit, aligned with habit_ids.
+        weekly (ndarray): True for weekly habits, False for daily habits, aligned with habit_ids.
+        creation_days (ndarray): The creation date of every habit as datetime64[D], aligned with habit_ids.
+        completion_habits (ndarray): For every completion, the position of its habit in habit_ids.
+        completion_days (ndarray): For every completion, its date as datetime64[D].
+    """
+
+    def __init__(self, habit_ids, names, periodicities, creation_days, completion_habits, completion_days):
+        _require_numpy()
+        self.habit_ids = np.asarray(habit_ids, dtype=np.int64)
+        self.names = list(names)
+        self.periodicities = np.array(list(periodicities), dtype=str)
+        self.weekly = self.periodicities == 'weekly'
+        self.creation_days = np.asarray(creation_days, dtype='datetime64[D]')
+        self.completion_habits = np.asarray(completion_habits, dtype=np.int64)
+        self.completion_days = np.asarray(completion_days, dtype='datetime64[D]')
+
+    def __len__(self):
+        """Return the number of habits."""
+        return len(self.habit_ids)
+
+    @classmethod
+    def from_database(cls, db):
+        """
+        Loads all habits and completions from the database into columns, without creating Habit objects.
+
+        Args:
+            db (Database): The database to load from.
+
+        Returns:
+            CompletionColumns: The columnar habits and completions.
+        """
+        _require_numpy()
+        habit_rows = db.conn.execute('SELECT id, name, periodicity, creation_date FROM habits ORDER BY id').fetchall()
+        habit_ids, names, periodicities, creation_dates = zip(*habit_rows) if habit_rows else ((), (), (), ())
+        habit_ids = np.array(habit_ids, dtype=np.int64)
+
+        # Completions left behind by old versions without a habit, or with a NULL habit ID, are skipped
+        if db.completion_format == "epoch":
+            # Whole days since the epoch, which is how datetime64[D] counts as well
+            cursor = db.conn.execute('SELECT habit_id, completion_date FROM completions '
+                                     'WHERE habit_id IN (SELECT id FROM habits) '
+                                     'ORDER BY habit_id, completion_date')
+        else:
+            cursor = db.conn.execute('SELECT habit_id, substr(completion_date, 1, 10) FROM completions '
+                                     'WHERE habit_id IN (SELECT id FROM habits) '
+                                     'ORDER BY habit_id, completion_date')
+        completion_rows = cursor.fetchall()
+        completion_ids, completion_dates = zip(*completion_rows) if completion_rows else ((), ())
+        completion_ids = np.array(completion_ids, dtype=np.int64)
+        if db.completion_format == "epoch":
+            completion_days = (np.array(completion_dates, dtype=np.int64) // 86400).astype('datetime64[D]')
+        else:
+            completion_days = np.array(completion_dates, dtype='datetime64[D]')
+
+        # Map habit IDs to positions, dropping completions of habits deleted between the two queries
+        positions = np.searchsorted(habit_ids, completion_ids)
+        positions = np.minimum(positions, max(len(habit_ids) - 1, 0))
+        valid = habit_ids[positions] == completion_ids if len(habit_ids) else np.zeros(len(completion_ids), bool)
+        return cls(habit_ids, names, periodicities, _day_array(creation_dates),
+                   positions[valid], completion_days[valid])
+
+    @classmethod
+    def from_habits(cls, habits):
+        """
+        Converts Habit objects into columns; the habit IDs are the positions of the habits in the list.
+
+        Args:
+            habits (list): A list of Habit objects.
+
+        Returns:
+            CompletionColumns: The columnar habits and completions.
+        """
+        _require_numpy()
+        completion_habits = []
+        completion_days = []
+        for position, habit in enumerate(habits):
+            completions = habit.get_completions()
+            completion_habits.extend([position] * len(completions))
+            completion_days.extend(completion.date() for completion in completions)
+        return cls(range(len(habits)),
+                   [habit.get_name() for habit in habits],
+                   [habit.get_periodicity() for habit in habits],
+                   [habit.get_creation_date().date() for habit in habits],
+                   completion_habits,
+                   np.array(completion_days, dtype='datetime64[D]'))
+
+
+def _periods(days, weekly):
+    """Convert datetime64[D] values into period numbers: days, or ISO weeks starting on Monday."""
+    day_numbers = days.astype(np.int64)  # Days since 1970-01-01, a Thursday
+    return np.where(weekly, (day_numbers + 3) // 7, day_numbers)
+
+
+def compute_stats(columns, today=None):
+    """
+    Computes current streak, best streak and completion rate of every habit with array operations.
+
+    Args:
+        columns (CompletionColumns): The columnar habits and completions.
+        today (date): The date up to which the completion rate is calculated, by default today.
+
+    Returns:
+        HabitStats: The statistics of all habits, aligned with columns.habit_ids.
+    """
+    _require_numpy()
+    n_habits = len(columns)
+    current = np.zeros(n_habits, dtype=np.int64)
+    best = np.zeros(n_habits, dtype=np.int64)
+    completed = np.zeros(n_habits, dtype=np.int64)
+    first_periods = np.full(n_habits, np.iinfo(np.int64).max, dtype=np.int64)
+
+    habits = columns.completion_habits
+    periods = _periods(columns.completion_days, columns.weekly[habits])
+    if len(periods):
+        # Sort by habit and period, then drop repeated periods of the same habit
+        order = np.lexsort((periods, habits))
+        habits, periods = habits[order], periods[order]
+        same_habit = habits[1:] == habits[:-1]
+        keep = np.concatenate(([True], ~(same_habit & (periods[1:] == periods[:-1]))))
+        habits, periods = habits[keep], periods[keep]
+
+        # A run starts wherever the habit changes or a period is skipped
+        same_habit = habits[1:] == habits[:-1]
+        run_starts = np.flatnonzero(np.concatenate(([True], ~(same_habit & (np.diff(periods) == 1)))))
+        run_lengths = np.diff(np.append(run_starts, len(periods)))
+        run_habits = habits[run_starts]
+
+        # Runs are grouped by habit, so reduceat over the first run of each habit aggregates per habit
+        first_runs = np.flatnonzero(np.concatenate(([True], run_habits[1:] != run_habits[:-1])))
+        last_runs = np.append(first_runs[1:], len(run_lengths)) - 1
+        with_runs = run_habits[first_runs]
+        best[with_runs] = np.maximum.reduceat(run_lengths, first_runs)
+        completed[with_runs] = np.add.reduceat(run_lengths, first_runs)
+        current[with_runs] = run_lengths[last_runs]
+        first_periods[with_runs] = periods[run_starts[first_runs]]
+
+    today = np.datetime64(today or datetime.now().date(), 'D')
+    today_periods = _periods(np.full(n_habits, today), columns.weekly)
+    start_periods = np.minimum(_periods(columns.creation_days, columns.weekly), first_periods)
+    total_periods = np.maximum(today_periods - start_periods + 1, 1)
+    rate = np.minimum(completed / total_periods, 1.0)
+    return HabitStats(current, best, completed, rate)
+
+
+def list_habits_by_periodicity(columns, periodicity):
+    """
+    Returns the names of the habits that have the specified periodicity.
+
+    Args:
+        columns (CompletionColumns): The columnar habits and completions.
+        periodicity (str): The periodicity to filter habits by ('daily' or 'weekly').
+
+    Returns:
+        list: The names of the habits with the given periodicity.
+    """
+    return [columns.names[i] for i in np.flatnonzero(columns.periodicities == periodicity)]
+
+
+def longest_streak_all_habits(columns, stats=None):
+    """
+    Returns the name of the habit with the longest current streak among all habits.
+
+    Args:
+        columns (CompletionColumns): The columnar habits and completions.
+        stats (HabitStats): Precomputed statistics of the habits, computed if not given.
+
+    Returns:
+        str: The name of the habit with the longest streak, or None if there are no habits.
+    """
+    if not len(columns):
+        return None
+    if stats is None:
+        stats = compute_stats(columns)
+    return columns.names[int(np.argmax(stats.current))]
@@ -0,0 +1,146 @@
+import asyncio # used for awaiting the database calls without blocking the event loop
+from concurrent.futures import ThreadPoolExecutor # used for running the SQLite calls on a dedicated thread
+from functools import partial # used for passing arguments to the executor
+from db import Database
+
+
+class AsyncDatabase:
+    """
+    Asyncio wrapper around Database.
+
+    Every SQLite call runs on a dedicated executor thread, so awaiting it never blocks the event loop.
+    Completions saved at the same time are grouped: they are queued, and whenever the executor thread
+    is free, all queued completions are written in one shared transaction.
+
+    Example:
+        async with await AsyncDatabase.open("habit_tracker.db") as db:
+            await db.save_completion(habit_id, datetime.now())
+    """
+
+    def __init__(self, db, executor, group_completions=True):
+        """
+        Initializes the wrapper; use AsyncDatabase.open() to create one.
+
+        Args:
+            db (Database): The database, created on the executor thread.
+            executor (ThreadPoolExecutor): The executor with the single thread that runs the SQLite calls.
+            group_completions (bool): If True, completions saved at the same time share a transaction;
+                otherwise every completion is committed on its own.
+        """
+        self.db = db
+        self._executor = executor
+        self.group_completions = group_completions
+        self._pending = []  # (habit ID, completion date, future) tuples waiting for the next flush
+        self._flush_task = None
+
+    @classmethod
+    async def open(cls, db_name="habit_tracker.db", completion_format=None, group_completions=True):
+        """
+        Opens the database on a new executor thread.
+
+        Args:
+            db_name (str): The file name of the database.
+            completion_format (str): The storage format of completion dates, see Database.
+            group_completions (bool): If True, completions saved at the same time share a transaction.
+
+        Returns:
+            AsyncDatabase: The opened database.
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="habit-db")
+        loop = asyncio.get_running_loop()
+        db = await loop.run_in_executor(executor, partial(Database, db_name, completion_format))
+        return cls(db, executor, group_completions)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _run(self, function, *args, **kwargs):
+        """Run a blocking function on the executor thread and return its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+    async def close(self):
+        """Write the queued completions, close the database and stop the executor thread."""
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+        await self._run(self.db.close)
+        self._executor.shutdown()
+
+    async def habit_exists(self, name):
+        """Check if a habit with the given name already exists in the database."""
+        return await self._run(self.db.habit_exists, name)
+
+    async def get_habit_id(self, name):
+        """Retrieve the habit's ID from the database based on the habit name."""
+        return await self._run(self.db.get_habit_id, name)
+
+    async def load_habits(self):
+        """Load all habits and their completion dates from the database, see Database.load_habits."""
+        return await self._run(self.db.load_habits)
+
+    async def load_habit_objects(self, lazy=False, compact=False, id_range=None, calendar=False, with_ids=False):
+        """Load all habits as Habit objects, or (ID, Habit) pairs, see Database.load_habit_objects."""
+        return await self._run(self.db.load_habit_objects, lazy=lazy, compact=compact, id_range=id_range,
+                               calendar=calendar, with_ids=with_ids)
+
+    async def load_stats(self):
+        """Load all habits with their materialized statistics, see Database.load_stats."""
+        return await self._run(self.db.load_stats)
+
+    async def load_completions(self, habit_id):
+        """Load all completion dates for a specific habit."""
+        return await self._run(self.db.load_completions, habit_id)
+
+    async def save_habit(self, habit):
+        """Save the new habit into the database and return its automatically generated ID."""
+        return await self._run(self.db.save_habit, habit)
+
+    async def update_habit(self, habit_id, new_name, new_description):
+        """Update the name and description of a habit in the database."""
+        await self._run(self.db.update_habit, habit_id, new_name, new_description)
+
+    async def delete_habit(self, habit_id):
+        """Delete a habit and its completions from the database."""
+        await self._run(self.db.delete_habit, habit_id)
+
+    async def save_completion(self, habit_id, completion_date):
+        """
+        Saves the completion date for a specific habit, ignoring completions in an already completed period.
+
+        Returns once the completion is committed. Completions saved while an earlier write is still running
+        are committed together in the next transaction.
+
+        Args:
+            habit_id (int): The ID of the habit.
+            completion_date (datetime): The date of the completion.
+        """
+        if not self.group_completions:
+            await self._run(self.db.save_completion, habit_id, completion_date)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((habit_id, completion_date, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+        await future
+
+    async def _flush(self):
+        """Write the queued completions in shared transactions until the queue is empty."""
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    await self._run(self.db.save_completions_many,
+                                    [(habit_id, completion_date) for habit_id, completion_date, _ in batch])
+                except Exception as error:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(error)
+                else:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_result(None)
+        finally:
+            self._flush_task = None
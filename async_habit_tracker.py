@@ -0,0 +1,120 @@
+from datetime import datetime # used for the default completion date
+from habit_tracker import HabitTracker
+
+
+class AsyncHabitTracker:
+    """
+    Asyncio counterpart of HabitTracker that keeps the habits in memory and persists every change
+    through an AsyncDatabase.
+
+    Lookups work on the in-memory HabitTracker and return immediately; changes update the habits in
+    memory and are awaited until they are saved. Habits are loaded with their completions, so checking
+    for duplicate completions never has to wait for the database.
+    """
+
+    def __init__(self, db):
+        """
+        Initialize a new AsyncHabitTracker with no habits.
+
+        Args:
+            db (AsyncDatabase): The database to load the habits from and to save changes to.
+        """
+        self.db = db
+        self.tracker = HabitTracker()
+        self._habit_ids = {}  # Habit -> ID of the habit in the database
+
+    @property
+    def habits(self):
+        """list: All tracked habits, in the order they were added."""
+        return self.tracker.habits
+
+    def get_habit(self, name):
+        """Retrieve a habit by its name, in any case, or None if not found."""
+        return self.tracker.get_habit(name)
+
+    def get_habits_by_periodicity(self, periodicity):
+        """Retrieve all habits with the given periodicity, in the order they were added."""
+        return self.tracker.get_habits_by_periodicity(periodicity)
+
+    def _require_habit(self, name):
+        """Return the tracked habit with the given name, raising ValueError if there is none."""
+        habit = self.tracker.get_habit(name)
+        if habit is None:
+            raise ValueError(f"Habit '{name}' not found.")
+        return habit
+
+    async def load(self):
+        """Load all habits and their completions from the database into the tracker."""
+        for habit_id, habit in await self.db.load_habit_objects(with_ids=True):
+            self.tracker.add_habit(habit)
+            self._habit_ids[habit] = habit_id
+
+    async def add_habit(self, habit):
+        """
+        Add a new habit to the tracker and save it in the database.
+
+        Args:
+            habit (Habit): The habit to be added.
+
+        Raises:
+            ValueError: If a habit with the same name, ignoring case, is already tracked.
+        """
+        self.tracker.add_habit(habit)  # First, so that a concurrent add of the same name is rejected
+        try:
+            self._habit_ids[habit] = await self.db.save_habit(habit)
+        except BaseException:
+            self.tracker.delete_habit(habit.get_name())  # Not saved, or cancelled: never tracked without an ID
+            raise
+
+    async def complete_habit(self, name, completion_date=None):
+        """
+        Mark a habit as complete and save the completion, unless the period was already completed.
+
+        Args:
+            name (str): The name of the habit, in any case.
+            completion_date (datetime): The date of the completion, by default now.
+
+        Returns:
+            bool: True if the completion was added, False if it was a duplicate.
+
+        Raises:
+            ValueError: If no habit with the given name is tracked.
+        """
+        habit = self._require_habit(name)
+        completion_date = completion_date or datetime.now()
+        if not habit.complete_habit(completion_date):
+            return False
+        await self.db.save_completion(self._habit_ids[habit], completion_date)
+        return True
+
+    async def update_habit(self, name, new_name, new_description):
+        """
+        Change the name and description of a habit and save them in the database.
+
+        Args:
+            name (str): The current name of the habit, in any case.
+            new_name (str): The new name of the habit.
+            new_description (str): The new description of the habit.
+
+        Raises:
+            ValueError: If the habit is not tracked, or another habit already has the new name.
+        """
+        habit = self._require_habit(name)
+        if self.tracker.get_habit(new_name) not in (None, habit):
+            raise ValueError(f"Habit '{new_name}' already exists.")
+        habit.edit_habit(new_name, new_description)
+        await self.db.update_habit(self._habit_ids[habit], new_name, new_description)
+
+    async def delete_habit(self, name):
+        """
+        Delete a habit and its completions from the tracker and the database.
+
+        Args:
+            name (str): The name of the habit to be deleted, in any case.
+
+        Raises:
+            ValueError: If no habit with the given name is tracked.
+        """
+        habit = self._require_habit(name)
+        self.tracker.delete_habit(name)
+        await self.db.delete_habit(self._habit_ids.pop(habit))
@@ -0,0 +1,69 @@
+"""
+Measure the latency of many concurrent coroutines marking habits complete through AsyncHabitTracker,
+with completions grouped into shared transactions and with one transaction per completion.
+
+A ticker coroutine measures how long the event loop is blocked while the completions are written.
+
+Usage:
+    python -m benchmarks.bench_async [n_coroutines] [n_habits]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from async_db import AsyncDatabase
+from async_habit_tracker import AsyncHabitTracker
+from habit import Habit
+
+
+async def ticker(lags, stop):
+    """Record how late the event loop wakes the ticker up, every millisecond."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def run(path, n_coroutines, n_habits, group_completions):
+    async with await AsyncDatabase.open(path, group_completions=group_completions) as db:
+        tracker = AsyncHabitTracker(db)
+        for i in range(n_habits):
+            await tracker.add_habit(Habit(f"habit {i}", "Benchmark habit", "daily"))
+        base_date = datetime(2000, 1, 1, 10)
+        latencies = []
+
+        async def complete(n):
+            start = time.perf_counter()
+            await tracker.complete_habit(f"habit {n % n_habits}", base_date + timedelta(days=n // n_habits))
+            latencies.append(time.perf_counter() - start)
+
+        lags = []
+        stop = asyncio.Event()
+        ticking = asyncio.create_task(ticker(lags, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(complete(n) for n in range(n_coroutines)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await ticking
+    return elapsed, sorted(latencies), lags
+
+
+def main(n_coroutines=2000, n_habits=100):
+    print(f"{n_coroutines} concurrent completions over {n_habits} habits")
+    for group_completions in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed, latencies, lags = asyncio.run(
+                run(os.path.join(tmp, "bench.db"), n_coroutines, n_habits, group_completions))
+        p50 = statistics.median(latencies)
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"{'grouped' if group_completions else 'ungrouped':<10} total {elapsed * 1000:8.1f} ms  "
+              f"latency p50 {p50 * 1000:8.2f} ms  p99 {p99 * 1000:8.2f} ms  "
+              f"max loop lag {max(lags, default=0) * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,53 @@
+"""
+Compare loading habits with their completions as Habit, CompactHabit and CalendarHabit objects from a
+generated database, and computing the longest-ever streak and the streak summary of all of them. The first
+calendar load rebuilds the completion bitsets from the completion rows, the second reads the stored BLOBs.
+
+Usage:
+    python -m benchmarks.bench_calendar [n_habits] [n_completions]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from analyse import longest_ever_streak_all_habits, streak_summary
+from benchmarks.generator import generate_database
+from db import Database
+
+
+def measure(db, **options):
+    start = time.perf_counter()
+    habits = db.load_habit_objects(**options)
+    loaded = time.perf_counter()
+    longest = longest_ever_streak_all_habits(habits).get_name()
+    summaries = [streak_summary(habit) for habit in habits]
+    return loaded - start, time.perf_counter() - loaded, longest, summaries
+
+
+def main(n_habits=1000, n_completions=200000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate_database(path, n_habits, n_completions)
+        db = Database(path)
+        print(f"{n_habits} habits, {n_completions} completions")
+        results = []
+        for name, options in (("Habit", {}), ("CompactHabit", {'compact': True}),
+                              ("CalendarHabit (rebuild)", {'calendar': True}),
+                              ("CalendarHabit (stored)", {'calendar': True})):
+            load, analyse, longest, summaries = measure(db, **options)
+            results.append((longest, [summary.longest for summary in summaries]))
+            tracemalloc.start()
+            habits = db.load_habit_objects(**options)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del habits
+            print(f"{name:<24} load {load * 1000:8.1f} ms  streaks {analyse * 1000:8.1f} ms  "
+                  f"{memory / 2 ** 20:7.1f} MiB")
+        assert all(result == results[0] for result in results)
+        db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,51 @@
+"""
+Measure the memory used by Habit and CompactHabit objects holding the same completions, with tracemalloc.
+
+Usage:
+    python -m benchmarks.bench_compact [n_habits] [completions_per_habit]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from habit import CompactHabit, Habit
+
+
+def build(habit_class, n_habits, completions):
+    habits = []
+    for i in range(n_habits):
+        habit = habit_class(f"habit {i}", "Synthetic habit", "daily")
+        habit.set_completions([completion.replace() for completion in completions])
+        habits.append(habit)
+    return habits, [habit.streak() for habit in habits]
+
+
+def measure(habit_class, n_habits, completions):
+    # Time and memory are measured in separate runs, because tracing allocations slows everything down
+    start = time.perf_counter()
+    build(habit_class, n_habits, completions)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    habits, streaks = build(habit_class, n_habits, completions)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return current, elapsed, streaks
+
+
+def main(n_habits=2000, completions_per_habit=365):
+    base_date = datetime(2023, 9, 25, 10, 0, 0)
+    # Every habit gets its own datetime objects, as when loading from the database
+    completions = [base_date - timedelta(days=i) for i in range(completions_per_habit)]
+    print(f"{n_habits} habits, {n_habits * completions_per_habit} completions")
+    results = {}
+    for habit_class in (Habit, CompactHabit):
+        memory, elapsed, streaks = measure(habit_class, n_habits, completions)
+        results[habit_class] = streaks
+        print(f"{habit_class.__name__:<13} {memory / 2 ** 20:8.1f} MiB  {elapsed * 1000:8.1f} ms  "
+              f"({memory / (n_habits * completions_per_habit):.1f} bytes per completion)")
+    assert results[Habit] == results[CompactHabit]
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
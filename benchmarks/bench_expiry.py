@@ -0,0 +1,56 @@
+"""
+Compare keeping the streaks of many habits up to date as the days pass with a StreakExpiry, which only
+touches the habits whose streak lapsed, against checking the deadline of every habit each time.
+
+Usage:
+    python -m benchmarks.bench_expiry [n_habits] [days]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from habit import Habit
+from streak_expiry import StreakExpiry, streak_deadline
+
+START_DATE = datetime(2024, 6, 30)
+
+
+def build(n_habits):
+    rng = random.Random(42)
+    habits = []
+    for i in range(n_habits):
+        last_completion = START_DATE - timedelta(hours=rng.randrange(24 * 7))
+        habits.append(Habit.from_summary(f"habit {i}", "Synthetic habit", rng.choice(["daily", "weekly"]),
+                                         START_DATE - timedelta(days=365), 100, last_completion,
+                                         rng.randrange(1, 50), iter))
+    return habits
+
+
+def main(n_habits=100000, days=14):
+    habits = build(n_habits)
+    print(f"{n_habits} habits, clock advanced hourly for {days} days")
+    expiry = StreakExpiry(now=START_DATE)
+    start = time.perf_counter()
+    for habit in habits:
+        expiry.track(habit)
+    print(f"schedule deadlines {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+    start = time.perf_counter()
+    expired = 0
+    for hour in range(1, 24 * days + 1):
+        expired += len(expiry.advance(START_DATE + timedelta(hours=hour)))
+    elapsed = time.perf_counter() - start
+    print(f"heap               {elapsed / (24 * days) * 1000:9.3f} ms per advance, {expired} expired")
+
+    deadlines = {habit: streak_deadline(habit) for habit in build(n_habits)}
+    start = time.perf_counter()
+    for hour in range(1, 24 * days + 1, 24):  # Only daily here, it takes as long every hour
+        now = START_DATE + timedelta(hours=hour)
+        lapsed = [habit for habit, deadline in deadlines.items() if deadline <= now]
+    elapsed = time.perf_counter() - start
+    print(f"scan               {elapsed / days * 1000:9.3f} ms per advance, {len(lapsed)} lapsed")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
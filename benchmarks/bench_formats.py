@@ -0,0 +1,58 @@
+"""
+Compare completion load throughput of the storage formats of completion dates.
+
+Measures rows per second of Database.load_all_completions for text storage with the previous strptime
+decoder and the fromisoformat decoder, and for integer epoch storage.
+
+Usage:
+    python -m benchmarks.bench_formats [n_habits] [completions_per_habit]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import db as db_module
+from benchmarks.dataset import build_database
+from db import Database
+
+
+def strptime_decoder(value):
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+
+
+def measure(db, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completions = db.load_all_completions()
+        timings.append(time.perf_counter() - start)
+    return sum(len(dates) for dates in completions.values()), min(timings)
+
+
+def main(n_habits=2000, completions_per_habit=100):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, n_habits, completions_per_habit)
+        db = Database(path)
+        size_text = os.path.getsize(path)
+
+        fast_decoder = db_module.decode_completion
+        db_module.decode_completion = strptime_decoder
+        rows, elapsed = measure(db)
+        db_module.decode_completion = fast_decoder
+        print(f"text, strptime:       {rows / elapsed:12.0f} rows/s")
+        rows, elapsed = measure(db)
+        print(f"text, fromisoformat:  {rows / elapsed:12.0f} rows/s")
+
+        db.convert_completion_format("epoch")
+        db.vacuum()
+        rows, elapsed = measure(db)
+        print(f"epoch integers:       {rows / elapsed:12.0f} rows/s")
+        print(f"file size: text {size_text / 2 ** 20:.1f} MiB, epoch {os.path.getsize(path) / 2 ** 20:.1f} MiB")
+        db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
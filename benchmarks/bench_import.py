@@ -0,0 +1,67 @@
+"""
+Measure throughput and peak memory of the streaming CSV import and export of cli.py.
+
+Peak memory should stay flat as the number of rows grows; it only depends on the batch size and the
+number of habits.
+
+Usage:
+    python -m benchmarks.bench_import [rows ...] [--habits N]
+"""
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import cli
+
+
+def write_csv(path, rows, n_habits):
+    """Write a synthetic CSV file with rows completions spread over n_habits daily habits."""
+    base_date = datetime(2000, 1, 1, 10)
+    with open(path, "w", newline="") as stream:
+        writer = csv.DictWriter(stream, fieldnames=cli.FIELDS)
+        writer.writeheader()
+        for i in range(rows):
+            writer.writerow({"name": f"habit {i % n_habits}", "description": "Synthetic habit",
+                             "periodicity": "daily", "creation_date": str(base_date),
+                             "completion_date": str(base_date + timedelta(days=i // n_habits))})
+
+
+def measure(argv):
+    """Run a CLI command and return its duration and peak traced memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    cli.run(argv)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(sizes=(50000, 200000), n_habits=100):
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "in.csv")
+            db_path = os.path.join(tmp, "bench.db")
+            write_csv(source, rows, n_habits)
+            size = os.path.getsize(source) / 2 ** 20
+            imported, import_peak = measure(["--db", db_path, "import", source])
+            exported, export_peak = measure(["--db", db_path, "export", os.path.join(tmp, "out.csv")])
+            print(f"{rows:>9} rows ({size:6.1f} MiB)  "
+                  f"import {rows / imported:9.0f} rows/s, peak {import_peak / 2 ** 20:5.1f} MiB  "
+                  f"export {rows / exported:9.0f} rows/s, peak {export_peak / 2 ** 20:5.1f} MiB")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    kwargs = {}
+    if "--habits" in args:
+        i = args.index("--habits")
+        kwargs["n_habits"] = int(args[i + 1])
+        del args[i:i + 2]
+    if args:
+        kwargs["sizes"] = [int(arg) for arg in args]
+    main(**kwargs)
@@ -0,0 +1,51 @@
+"""
+Measure the overhead of the instrumentation on hot calls: before enable(), while enabled and after
+disable().
+
+Usage:
+    python -m benchmarks.bench_instrumentation [calls]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import instrumentation
+from db import Database
+from habit import Habit
+
+
+def measure(db, habit, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        habit.streak()
+    streak = (time.perf_counter() - start) / calls
+    start = time.perf_counter()
+    for _ in range(calls // 10):
+        db.get_habit_id("read")
+    lookup = (time.perf_counter() - start) / (calls // 10)
+    return streak, lookup
+
+
+def main(calls=200000):
+    habit = Habit("Read", "Read a book", "daily")
+    for i in range(30):
+        habit.complete_habit(datetime(2023, 1, 1, 10) + timedelta(days=i))
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ("disabled", "enabled", "disabled again"):
+            if label == "enabled":
+                instrumentation.enable()
+            elif label == "disabled again":
+                instrumentation.disable()
+            db = Database(os.path.join(tmp, "bench.db"))  # Opened after enable(), so statements are counted
+            if not db.habit_exists("read"):
+                db.save_habit(habit)
+            streak, lookup = measure(db, habit, calls)
+            db.close()
+            print(f"{label:<15} Habit.streak {streak * 1e9:8.0f} ns/call  "
+                  f"Database.get_habit_id {lookup * 1e6:7.2f} us/call")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,47 @@
+"""
+Measure startup time and peak memory of loading all habits eagerly versus lazily (summaries only).
+
+For the 10M completion rows scenario run e.g.:
+    python -m benchmarks.bench_lazy 100000 100
+
+Usage:
+    python -m benchmarks.bench_lazy [n_habits] [completions_per_habit]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.dataset import build_database
+from db import Database
+
+
+def measure(db, lazy):
+    # Time and memory are measured in separate runs, because tracing allocations slows loading down
+    start = time.perf_counter()
+    db.load_habit_objects(lazy=lazy)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    habits = db.load_habit_objects(lazy=lazy)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return habits, elapsed, peak
+
+
+def main(n_habits=10000, completions_per_habit=100):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, n_habits, completions_per_habit)
+        db = Database(path)
+        print(f"{n_habits} habits, {n_habits * completions_per_habit} completions")
+        for lazy in (False, True):
+            habits, elapsed, peak = measure(db, lazy)
+            print(f"{'lazy' if lazy else 'eager':<6} startup {elapsed * 1000:9.1f} ms  "
+                  f"peak memory {peak / 2 ** 20:8.1f} MiB")
+            del habits
+        db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,63 @@
+"""
+Compare finding the habits with the longest streaks on a maintained Leaderboard against recalculating the
+streaks of all habits, and measure what keeping the leaderboard up to date adds to a completion.
+
+Usage:
+    python -m benchmarks.bench_leaderboard [n_habits] [n_completions]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from analyse import longest_streak_all_habits
+from benchmarks.generator import END_DATE, generate_database
+from db import Database
+from habit_tracker import HabitTracker
+from leaderboard import Leaderboard
+
+
+def recalculate(habits):
+    for habit in habits:
+        habit._streak = None
+    return longest_streak_all_habits(habits)
+
+
+def complete(habits, first_day, label):
+    start = time.perf_counter()
+    for day in range(first_day, first_day + 10):
+        for habit in habits:
+            habit.complete_habit(END_DATE + timedelta(days=day))
+    print(f"{label:<21} {(time.perf_counter() - start) / (10 * len(habits)) * 1e6:9.1f} us each")
+
+
+def main(n_habits=2000, n_completions=200000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate_database(path, n_habits, n_completions)
+        db = Database(path)
+        habits = db.load_habit_objects()
+        db.close()
+    print(f"{n_habits} habits, {n_completions} completions")
+    sample = [habit for habit in habits if habit.get_periodicity() == 'daily'][::10]  # One completion a day
+    complete(sample, first_day=1, label="completion")
+
+    start = time.perf_counter()
+    tracker = HabitTracker(Leaderboard())
+    for habit in habits:
+        tracker.add_habit(habit)
+    print(f"build leaderboard     {(time.perf_counter() - start) * 1000:9.1f} ms")
+    complete(sample, first_day=11, label="completion + rank")
+
+    start = time.perf_counter()
+    longest = recalculate(habits)
+    print(f"recalculate streaks   {(time.perf_counter() - start) * 1000:9.3f} ms")
+    start = time.perf_counter()
+    top = tracker.leaderboard.top(10)
+    print(f"leaderboard top 10    {(time.perf_counter() - start) * 1000:9.3f} ms")
+    assert top[0] == (longest, longest.streak())
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,57 @@
+"""
+Compare the bulk Database.load_habits loader with the previous one-query-per-habit path.
+
+Usage:
+    python -m benchmarks.bench_load_habits [n_habits] [completions_per_habit]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.dataset import build_database
+from db import Database
+
+
+def load_habits_per_habit(db):
+    """The previous N+1 loader: one completions query per habit."""
+    habits = []
+    for row in db.conn.execute('SELECT * FROM habits').fetchall():
+        habits.append({
+            'id': row[0],
+            'name': row[1],
+            'description': row[2],
+            'periodicity': row[3],
+            'creation_date': row[4],
+            'completions': db.load_completions(row[0])
+        })
+    return habits
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(n_habits=10000, completions_per_habit=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, n_habits, completions_per_habit)
+        db = Database(path)
+
+        per_habit_time, per_habit = best_of(lambda: load_habits_per_habit(db))
+        bulk_time, bulk = best_of(db.load_habits)
+        assert bulk == per_habit, "bulk loader returned different data"
+
+        print(f"{n_habits} habits, {n_habits * completions_per_habit} completions")
+        print(f"per-habit load_completions: {per_habit_time * 1000:8.1f} ms")
+        print(f"bulk load_habits:           {bulk_time * 1000:8.1f} ms  ({per_habit_time / bulk_time:.1f}x)")
+        db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,45 @@
+"""
+Measure how the sharded streak analysis scales with the number of worker processes.
+
+Worker counts double from 1 up to the number of CPUs, or max_workers. Every run computes the top 10
+current streaks of all habits; the single-threaded in-memory path (load all habits, then max() over
+Habit.streak()) is timed for comparison.
+
+Usage:
+    python -m benchmarks.bench_parallel [n_habits] [completions_per_habit] [max_workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import analyse_parallel
+from analyse import longest_streak_all_habits
+from benchmarks.dataset import build_database
+from db import Database
+
+
+def main(n_habits=20000, completions_per_habit=30, max_workers=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, n_habits, completions_per_habit)
+        print(f"{n_habits} habits, {n_habits * completions_per_habit} completions, {os.cpu_count()} CPUs")
+
+        start = time.perf_counter()
+        db = Database(path)
+        longest_streak_all_habits(db.load_habit_objects())
+        db.close()
+        baseline = time.perf_counter() - start
+        print(f"in-memory      {baseline * 1000:9.1f} ms")
+
+        workers = 1
+        while workers <= (max_workers or os.cpu_count() or 1):
+            start = time.perf_counter()
+            analyse_parallel.top_streaks(path, k=10, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:>2} worker(s)   {elapsed * 1000:9.1f} ms  speedup {baseline / elapsed:5.2f}x")
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,69 @@
+"""
+Find the crossover between the in-memory analyse functions and the SQL pushdown in analyse_sql.py.
+
+For growing databases, the in-memory path is timed twice: once on habits that are already loaded, as in the
+running application, and once including loading them. The SQL path always queries the database.
+
+Usage:
+    python -m benchmarks.bench_pushdown [n_habits ...] [--completions-per-habit N]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import analyse
+import analyse_sql
+from benchmarks.dataset import build_database
+from db import Database
+
+
+def in_memory(habits):
+    analyse.list_all_habits(habits)
+    analyse.list_habits_by_periodicity(habits, 'weekly')
+    analyse.longest_ever_streak_all_habits(habits)
+    return analyse.longest_streak_all_habits(habits)
+
+
+def pushdown(db):
+    analyse_sql.list_all_habits(db)
+    analyse_sql.list_habits_by_periodicity(db, 'weekly')
+    analyse_sql.longest_ever_streak_all_habits(db)
+    return analyse_sql.longest_streak_all_habits(db)
+
+
+def measure(n_habits, completions_per_habit):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, n_habits, completions_per_habit)
+        db = Database(path)
+
+        start = time.perf_counter()
+        habits = db.load_habit_objects()
+        loaded = time.perf_counter()
+        in_memory(habits)
+        analysed = time.perf_counter()
+        pushdown(db)
+        queried = time.perf_counter()
+        db.close()
+    return (analysed - loaded, analysed - start, queried - analysed)
+
+
+def main(sizes=(10, 100, 1000, 10000), completions_per_habit=30):
+    print(f"{completions_per_habit} completions per habit; times in ms")
+    print(f"{'habits':>8} {'loaded':>10} {'load+run':>10} {'sql':>10}")
+    for n_habits in sizes:
+        loaded, total, sql = measure(n_habits, completions_per_habit)
+        print(f"{n_habits:>8} {loaded * 1000:10.2f} {total * 1000:10.2f} {sql * 1000:10.2f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    kwargs = {}
+    if "--completions-per-habit" in args:
+        i = args.index("--completions-per-habit")
+        kwargs["completions_per_habit"] = int(args[i + 1])
+        del args[i:i + 2]
+    if args:
+        kwargs["sizes"] = [int(arg) for arg in args]
+    main(**kwargs)
@@ -0,0 +1,51 @@
+"""
+Measure the time to a ready tracker on startup: loading lazily from the database versus from a fresh
+snapshot file.
+
+Usage:
+    python -m benchmarks.bench_snapshot [n_habits] [completions_per_habit]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.dataset import build_database
+from db import Database
+from habit_tracker import HabitTracker
+from snapshot import load_tracker, read_snapshot, snapshot_path
+
+
+def from_database(path):
+    db = Database(path)
+    tracker = HabitTracker()
+    for habit in db.load_habit_objects(lazy=True):
+        tracker.add_habit(habit)
+    return db, tracker
+
+
+def from_snapshot(path):
+    db = Database(path)
+    return db, load_tracker(db)
+
+
+def main(n_habits=100000, completions_per_habit=10):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, n_habits, completions_per_habit)
+        print(f"{n_habits} habits, {n_habits * completions_per_habit} completions")
+        for label, startup in (("database", from_database), ("snapshot (stale)", from_snapshot),
+                               ("snapshot (fresh)", from_snapshot)):
+            start = time.perf_counter()
+            db, tracker = startup(path)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<17} {elapsed * 1000:9.1f} ms  {len(tracker.habits)} habits")
+            db.close()
+        db = Database(path)
+        assert read_snapshot(db) is not None
+        print(f"snapshot file: {os.path.getsize(snapshot_path(db)) / 2 ** 20:.1f} MiB")
+        db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
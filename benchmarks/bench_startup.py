@@ -0,0 +1,39 @@
+"""
+Measure startup time of the tracker across repeated launches against the same database.
+
+Every launch opens the database, seeds it and loads all habits, like main.py does on startup.
+The completions row count shows whether seeding grows the database on every launch.
+
+Usage:
+    python -m benchmarks.bench_startup [launches]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from db import Database, initialize_predefined_habits
+
+
+def launch(path):
+    start = time.perf_counter()
+    db = Database(path)
+    initialize_predefined_habits(db, seed=True)
+    habits = db.load_habit_objects()
+    elapsed = time.perf_counter() - start
+    completions = db.conn.execute('SELECT COUNT(*) FROM completions').fetchone()[0]
+    db.close()
+    return elapsed, len(habits), completions
+
+
+def main(launches=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print("launch  time (ms)  habits  completions")
+        for i in range(1, launches + 1):
+            elapsed, habits, completions = launch(path)
+            print(f"{i:6d}  {elapsed * 1000:9.2f}  {habits:6d}  {completions:11d}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,45 @@
+"""
+Compare answering "View All Habits" and "View Habit with Longest Streak" from the materialized
+habit_stats table against loading every habit with its completions and computing the streaks.
+
+Usage:
+    python -m benchmarks.bench_stats [n_habits] [completions_per_habit]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from analyse import longest_streak_all_habits
+from benchmarks.dataset import build_database
+from db import Database
+
+
+def from_completions(db):
+    habits = db.load_habit_objects()
+    for habit in habits:
+        habit.get_last_completion()
+        habit.streak()
+    return longest_streak_all_habits(habits)
+
+
+def from_stats(db):
+    db.load_stats()
+    return db.load_longest_streak()
+
+
+def main(n_habits=2000, completions_per_habit=100):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, n_habits, completions_per_habit)
+        db = Database(path)
+        print(f"{n_habits} habits, {n_habits * completions_per_habit} completions")
+        for name, function in (("completions", from_completions), ("habit_stats", from_stats)):
+            start = time.perf_counter()
+            function(db)
+            print(f"{name:<12} {(time.perf_counter() - start) * 1000:9.1f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,51 @@
+"""
+Compare counting the completions of every habit per week of a quarter from the weekly rollups against
+loading every habit with its completions and counting them in Python.
+
+Usage:
+    python -m benchmarks.bench_timeseries [n_habits] [n_completions]
+"""
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+
+from analyse_timeseries import bucket_of, completions_per_habit
+from benchmarks.generator import END_DATE, generate_database
+from db import Database
+
+START_DATE = END_DATE - timedelta(weeks=13)
+
+
+def from_completions(db):
+    first, last = bucket_of(START_DATE, 'week'), bucket_of(END_DATE, 'week')
+    counts = {}
+    for habit in db.load_habit_objects():
+        weeks = Counter(bucket_of(completion, 'week') for completion in habit.get_completions())
+        counts[habit.get_name()] = [weeks.get(week, 0) for week in range(first, last + 1)]
+    return counts
+
+
+def from_rollups(db):
+    return completions_per_habit(db, START_DATE, END_DATE, 'week')
+
+
+def main(n_habits=1000, n_completions=200000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        generate_database(path, n_habits, n_completions)
+        db = Database(path)
+        print(f"{n_habits} habits, {n_completions} completions, 14 weeks")
+        results = []
+        for name, function in (("completions", from_completions), ("rollups", from_rollups)):
+            start = time.perf_counter()
+            results.append(function(db))
+            print(f"{name:<12} {(time.perf_counter() - start) * 1000:9.1f} ms")
+        assert results[0] == results[1]
+        db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
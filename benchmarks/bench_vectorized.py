@@ -0,0 +1,50 @@
+"""
+Compare the NumPy analysis backend with the pure-Python path over all habits.
+
+The pure-Python path loads Habit objects and builds the run-length index of every habit; the vectorized
+path loads the completions into columns and computes all statistics with array operations.
+
+Usage:
+    python -m benchmarks.bench_vectorized [n_habits] [completions_per_habit]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import analyse_vectorized
+from analyse import longest_ever_streak_all_habits, streak_summary
+from benchmarks.dataset import build_database
+from db import Database
+
+
+def main(n_habits=10000, completions_per_habit=100):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, n_habits, completions_per_habit)
+        db = Database(path)
+
+        start = time.perf_counter()
+        habits = db.load_habit_objects()
+        loaded = time.perf_counter()
+        summaries = [streak_summary(habit) for habit in habits]
+        longest_ever_streak_all_habits(habits)
+        python_done = time.perf_counter()
+
+        columns = analyse_vectorized.CompletionColumns.from_database(db)
+        columns_loaded = time.perf_counter()
+        stats = analyse_vectorized.compute_stats(columns)
+        analyse_vectorized.longest_streak_all_habits(columns, stats)
+        vectorized_done = time.perf_counter()
+
+        assert [summary.longest for summary in summaries] == stats.best.tolist()
+        print(f"{n_habits} habits, {n_habits * completions_per_habit} completions")
+        print(f"pure Python:  load {(loaded - start) * 1000:8.1f} ms  "
+              f"analyse {(python_done - loaded) * 1000:8.1f} ms")
+        print(f"vectorized:   load {(columns_loaded - python_done) * 1000:8.1f} ms  "
+              f"analyse {(vectorized_done - columns_loaded) * 1000:8.1f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
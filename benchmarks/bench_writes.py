@@ -0,0 +1,53 @@
+"""
+Compare completion write throughput of single inserts, batched inserts and the write-behind buffer.
+
+Usage:
+    python -m benchmarks.bench_writes [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from db import CompletionBuffer, Database
+from habit import Habit
+
+
+def run(label, path, write):
+    db = Database(path)
+    habit_id = db.save_habit(Habit(label, "Benchmark habit", "daily"))
+    start = time.perf_counter()
+    count = write(db, habit_id)
+    elapsed = time.perf_counter() - start
+    db.close()
+    print(f"{label:<10} {count:8d} rows  {elapsed * 1000:9.1f} ms  {count / elapsed:12.0f} rows/s")
+
+
+def main(rows=2000):
+    dates = [datetime(2000, 1, 1, 10) + timedelta(days=i) for i in range(rows)]
+
+    def single(db, habit_id):
+        for date in dates:
+            db.save_completion(habit_id, date)
+        return len(dates)
+
+    def batched(db, habit_id):
+        db.save_completions_bulk(habit_id, dates)
+        return len(dates)
+
+    def buffered(db, habit_id):
+        with CompletionBuffer(db, max_rows=500) as buffer:
+            for date in dates:
+                buffer.add(habit_id, date)
+        return len(dates)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        run("single", path, single)
+        run("batched", path, batched)
+        run("buffered", path, buffered)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+
+def build_database(path, n_habits=1000, completions_per_habit=30, completion_format=None):
+    """
+    Create a synthetic habit_tracker database for benchmarking.
+
+    Half of the habits are daily and half are weekly, each with a run of consecutive completions.
+
+    Args:
+        path (str): The file path of the database to create.
+        n_habits (int): The number of habits to insert.
+        completions_per_habit (int): The number of completions to insert for every habit.
+        completion_format (str): The storage format of completion dates, see Database.
+    """
+    from db import Database
+
+    db = Database(path, completion_format)
+    base_date = datetime(2023, 9, 25, 10, 0, 0)
+    habits = []
+    completions = []
+    for habit_id in range(1, n_habits + 1):
+        periodicity = 'daily' if habit_id % 2 else 'weekly'
+        step = timedelta(days=1) if periodicity == 'daily' else timedelta(weeks=1)
+        habits.append((habit_id, f"habit {habit_id}", "Synthetic habit", periodicity, str(base_date)))
+        for i in range(completions_per_habit):
+            completion_date = base_date - step * i
+            completions.append((habit_id, completion_date))
+    with db.transaction():
+        db.conn.executemany('INSERT INTO habits (id, name, description, periodicity, creation_date) '
+                            'VALUES (?, ?, ?, ?, ?)', habits)
+        db.save_completions_many(completions)
+    db.close()
@@ -0,0 +1,117 @@
+"""
+Generator of large synthetic habit_tracker databases with realistic completion patterns.
+
+Every habit is daily (70%) or weekly (30%) and is completed in runs of consecutive periods separated by
+gaps: after each completed period the next one is completed with the habit's adherence probability, and
+a missed period is followed by a gap of geometrically distributed length. Completions happen around a
+preferred time of day per habit, with an hour or two of jitter, and some habits were abandoned before the
+end of the generated history. The same seed always generates the same database.
+
+The completions are streamed into the database in batches, so the size of the database is not limited by
+memory; expect on the order of 15k completions per second with the triggers that maintain habit_stats
+and the rollup tables.
+
+Usage:
+    python -m benchmarks.generator PATH [n_habits] [n_completions] [--seed N]
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from db import Database
+
+END_DATE = datetime(2024, 6, 30)  # A Sunday; the generated histories end on this day, so runs are repeatable
+BATCH_SIZE = 50000
+
+
+def habit_completions(rng, periodicity, n_completions):
+    """
+    Generates the completions of one habit, latest first.
+
+    Args:
+        rng (random.Random): The random number generator.
+        periodicity (str): 'daily' or 'weekly'.
+        n_completions (int): The number of completions to generate.
+
+    Returns:
+        list: The completion dates, latest first.
+    """
+    step = timedelta(days=1) if periodicity == 'daily' else timedelta(weeks=1)
+    adherence = rng.uniform(0.5, 0.98)
+    mean_gap = rng.uniform(1.5, 6.0)
+    preferred_hour = rng.randrange(6, 22)
+    end = END_DATE
+    if rng.random() < 0.2:  # Abandoned some time ago
+        end -= step * rng.randrange(1, 60)
+    completions = []
+    period = 0
+    while len(completions) < n_completions:
+        minutes = preferred_hour * 60 + int(rng.gauss(0, 60))
+        minutes = min(max(minutes, 0), 24 * 60 - 1)
+        if periodicity == 'weekly':
+            minutes -= rng.randrange(7) * 24 * 60  # Any day of the calendar week, which ends on END_DATE
+        completions.append(end - step * period + timedelta(minutes=minutes))
+        if rng.random() < adherence:
+            period += 1
+        else:
+            period += 1 + int(rng.expovariate(1 / mean_gap)) + 1  # Miss at least one period
+    return completions
+
+
+def generate_database(path, n_habits=1000, n_completions=100000, seed=42, completion_format=None):
+    """
+    Creates a synthetic database with realistic daily and weekly habits.
+
+    Args:
+        path (str): The file path of the database to create.
+        n_habits (int): The number of habits.
+        n_completions (int): The total number of completions, spread unevenly over the habits.
+        seed (int): The seed of the random number generator.
+        completion_format (str): The storage format of completion dates, see Database.
+    """
+    rng = random.Random(seed)
+    weights = [rng.paretovariate(2.0) for _ in range(n_habits)]  # Some habits are tracked much longer
+    scale = n_completions / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for i in range(n_completions - sum(counts)):
+        counts[i % n_habits] += 1
+
+    db = Database(path, completion_format)
+    habits = []
+    completions = []
+
+    def flush():
+        # One transaction per batch keeps the write-ahead log small
+        with db.transaction():
+            db.conn.executemany('INSERT INTO habits (id, name, description, periodicity, creation_date) '
+                                'VALUES (?, ?, ?, ?, ?)', habits)
+            db.save_completions_many(completions)
+        habits.clear()
+        completions.clear()
+
+    for habit_id in range(1, n_habits + 1):
+        periodicity = 'daily' if rng.random() < 0.7 else 'weekly'
+        dates = habit_completions(rng, periodicity, counts[habit_id - 1])
+        creation_date = (dates[-1] if dates else END_DATE) - timedelta(days=rng.randrange(1, 30))
+        habits.append((habit_id, f"habit {habit_id}", f"Synthetic {periodicity} habit", periodicity,
+                       creation_date.isoformat(" ", "seconds")))
+        completions.extend((habit_id, completion_date) for completion_date in dates)
+        if len(completions) >= BATCH_SIZE:
+            flush()
+    flush()
+    db.close()
+
+
+def main(argv):
+    args = list(argv)
+    seed = 42
+    if "--seed" in args:
+        i = args.index("--seed")
+        seed = int(args[i + 1])
+        del args[i:i + 2]
+    path, *sizes = args
+    generate_database(path, *(int(size) for size in sizes), seed=seed)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,296 @@
+"""
+Repeatable benchmark suite over a synthetic database, with machine-readable results.
+
+The database is generated once per size and seed (see benchmarks/generator.py) and kept in the data
+directory for later runs. Every benchmark is repeated and its per-operation times are written to a JSON
+file together with the commit, Python and SQLite versions, so that runs of different commits can be
+compared.
+
+Usage:
+    python -m benchmarks.suite run [--habits N] [--completions N] [--seed N] [--repeats N]
+                                   [--data-dir DIR] [--output FILE] [--only NAME ...]
+    python -m benchmarks.suite compare BASELINE.json RESULTS.json [--threshold 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import analyse
+from benchmarks.generator import END_DATE, generate_database
+from db import Database
+from habit_tracker import HabitTracker
+
+BENCHMARKS = {}  # Name -> setup function, see benchmark()
+
+
+def benchmark(name):
+    """
+    Registers a benchmark. The decorated setup function receives the Context and returns a function that
+    runs the measured code once, and the number of operations it performs.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class Context:
+    """The benchmark database and the habits loaded from it, shared by all benchmarks of a run."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = Database(path)
+        self.habits = self.db.load_habit_objects()
+        self.tracker = HabitTracker()
+        for habit in self.habits:
+            self.tracker.add_habit(habit)
+        # A sample of the habits for the benchmarks of single habits, the same in every run
+        self.sample = self.habits[::max(len(self.habits) // 100, 1)]
+
+    def close(self):
+        self.db.close()
+
+
+@benchmark("Database.load_habits")
+def bench_load_habits(context):
+    return context.db.load_habits, 1
+
+
+@benchmark("Database.load_habit_objects")
+def bench_load_habit_objects(context):
+    return context.db.load_habit_objects, 1
+
+
+@benchmark("Database.save_completion")
+def bench_save_completion(context):
+    # Completes a dedicated daily habit on consecutive days after the generated history; the habit and its
+    # completions are deleted again at the end of the run
+    habit_id = context.db.get_habit_id("benchmark habit")
+    if habit_id is None:
+        habit_id = context.db.conn.execute('SELECT MAX(id) FROM habits').fetchone()[0] + 1
+        with context.db.transaction():
+            context.db.conn.execute('INSERT INTO habits (id, name, description, periodicity, creation_date) '
+                                    'VALUES (?, ?, ?, ?, ?)',
+                                    (habit_id, "benchmark habit", "Benchmark", "daily", str(END_DATE)))
+    days = iter(range(1, 10 ** 9))
+    context.cleanups.append(lambda: context.db.delete_habit(habit_id))
+
+    def run():
+        for _ in range(100):
+            context.db.save_completion(habit_id, END_DATE + timedelta(days=next(days)))
+    return run, 100
+
+
+@benchmark("HabitTracker.get_habit")
+def bench_get_habit(context):
+    names = [habit.get_name().upper() for habit in context.sample]
+
+    def run():
+        for name in names:
+            context.tracker.get_habit(name)
+    return run, len(names)
+
+
+@benchmark("Habit.streak")
+def bench_streak(context):
+    # Calculates the streaks from scratch; the cached streak would only measure an attribute lookup
+    def run():
+        for habit in context.sample:
+            habit._streak = None
+            habit.streak()
+    return run, len(context.sample)
+
+
+@benchmark("analyse.list_all_habits")
+def bench_list_all_habits(context):
+    return lambda: analyse.list_all_habits(context.habits), 1
+
+
+@benchmark("analyse.list_habits_by_periodicity")
+def bench_list_habits_by_periodicity(context):
+    return lambda: analyse.list_habits_by_periodicity(context.habits, 'weekly'), 1
+
+
+@benchmark("analyse.longest_streak_all_habits")
+def bench_longest_streak_all_habits(context):
+    def run():
+        for habit in context.habits:
+            habit._streak = None
+        analyse.longest_streak_all_habits(context.habits)
+    return run, 1
+
+
+@benchmark("analyse.longest_streak_for_habit")
+def bench_longest_streak_for_habit(context):
+    def run():
+        for habit in context.sample:
+            habit._streak = None
+            analyse.longest_streak_for_habit(habit)
+    return run, len(context.sample)
+
+
+@benchmark("analyse.longest_ever_streak_for_habit")
+def bench_longest_ever_streak_for_habit(context):
+    def run():
+        for habit in context.sample:
+            habit._run_index = None
+            analyse.longest_ever_streak_for_habit(habit)
+    return run, len(context.sample)
+
+
+@benchmark("analyse.longest_ever_streak_all_habits")
+def bench_longest_ever_streak_all_habits(context):
+    def run():
+        for habit in context.habits:
+            habit._run_index = None
+        analyse.longest_ever_streak_all_habits(context.habits)
+    return run, 1
+
+
+@benchmark("analyse.streak_summary")
+def bench_streak_summary(context):
+    def run():
+        for habit in context.sample:
+            habit._run_index = None
+            analyse.streak_summary(habit)
+    return run, len(context.sample)
+
+
+def git_commit():
+    """Return the current commit hash of the repository, or None outside a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(path, repeats=5, only=None):
+    """
+    Runs the benchmarks against a database.
+
+    Args:
+        path (str): The file path of the benchmark database.
+        repeats (int): How often every benchmark is repeated.
+        only (list): The names of the benchmarks to run, by default all.
+
+    Returns:
+        dict: Benchmark name to its repeats, operations per repeat and min, median and mean seconds per operation.
+    """
+    context = Context(path)
+    context.cleanups = []
+    results = {}
+    try:
+        for name, setup in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            run, operations = setup(context)
+            run()  # Warm-up
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                run()
+                times.append((time.perf_counter() - start) / operations)
+            results[name] = {'repeats': repeats, 'operations': operations, 'min_s': min(times),
+                             'median_s': statistics.median(times), 'mean_s': statistics.mean(times)}
+            print(f"{name:<40} median {results[name]['median_s'] * 1e6:12.2f} us/op", file=sys.stderr)
+    finally:
+        for cleanup in context.cleanups:
+            cleanup()
+        context.close()
+    return results
+
+
+def command_run(args):
+    os.makedirs(args.data_dir, exist_ok=True)
+    path = os.path.join(args.data_dir, f"bench_{args.habits}_{args.completions}_{args.seed}.db")
+    if not os.path.exists(path):
+        print(f"Generating {path} ...", file=sys.stderr)
+        generate_database(path + ".partial", args.habits, args.completions, args.seed)
+        os.replace(path + ".partial", path)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.now().isoformat(timespec="seconds"),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'habits': args.habits,
+            'completions': args.completions,
+            'seed': args.seed,
+        },
+        'results': run_suite(path, args.repeats, args.only),
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as stream:
+            json.dump(report, stream, indent=2)
+    return 0
+
+
+def compare(baseline, results, threshold=0.1):
+    """
+    Compares the median times of two benchmark reports.
+
+    Args:
+        baseline (dict): The report of the earlier run.
+        results (dict): The report of the later run.
+        threshold (float): The relative slowdown reported as a regression.
+
+    Returns:
+        list: (name, baseline median, median, ratio, regression) tuples for the benchmarks in both reports.
+    """
+    rows = []
+    for name, result in results['results'].items():
+        before = baseline['results'].get(name)
+        if before:
+            ratio = result['median_s'] / before['median_s']
+            rows.append((name, before['median_s'], result['median_s'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def command_compare(args):
+    with open(args.baseline) as stream:
+        baseline = json.load(stream)
+    with open(args.results) as stream:
+        results = json.load(stream)
+    regressions = 0
+    print(f"{'benchmark':<40} {'before us':>12} {'after us':>12} {'ratio':>7}")
+    for name, before, after, ratio, regression in compare(baseline, results, args.threshold):
+        regressions += regression
+        print(f"{name:<40} {before * 1e6:12.2f} {after * 1e6:12.2f} {ratio:7.2f}{'  REGRESSION' if regression else ''}")
+    return 1 if regressions else 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks and write the results as JSON")
+    run_parser.add_argument("--habits", type=int, default=10000)
+    run_parser.add_argument("--completions", type=int, default=1000000)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--repeats", type=int, default=5)
+    run_parser.add_argument("--data-dir", default=os.path.join("benchmarks", "data"))
+    run_parser.add_argument("--output", default="-", help="results file (default: standard output)")
+    run_parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    run_parser.set_defaults(handler=command_run)
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown to flag")
+    compare_parser.set_defaults(handler=command_compare)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,248 @@
+"""
+Non-interactive command-line interface for scripting the habit tracker.
+
+Subcommands:
+    import FILE      Import habits and completions from a CSV or JSON Lines file.
+    export [FILE]    Export all habits and completions as CSV or JSON Lines.
+    complete NAME    Mark a habit as complete.
+    stats            Show the statistics of all habits.
+    list             List the names of the habits.
+
+Import and export stream their rows, one habit or completion per row, so memory use does not grow with the
+size of the file: rows are read and written one at a time, completions are saved in batches through a
+CompletionBuffer, and the export fetches the completions of every habit page by page.
+
+Usage:
+    python main.py [--db FILE] import habits.csv
+    python main.py [--db FILE] export --format jsonl > habits.jsonl
+"""
+import argparse # used for parsing the subcommands and their options
+import csv # used for reading and writing CSV files
+import json # used for reading and writing JSON Lines files
+import sys # used for standard input and output
+from contextlib import contextmanager # used for opening files or standard streams alike
+from datetime import datetime # used for parsing completion and creation dates
+from analyse_sql import list_all_habits, list_habits_by_periodicity
+from db import CompletionBuffer, Database
+from habit import Habit
+from streak_expiry import completion_deadline
+
+# Columns of the import and export rows; rows of habits without completions have an empty completion_date
+FIELDS = ["name", "description", "periodicity", "creation_date", "completion_date"]
+FORMATS = ("csv", "jsonl")
+
+
+def detect_format(path, file_format=None):
+    """
+    Determines the file format from the --format option or the file extension, defaulting to CSV.
+
+    Args:
+        path (str): The file path, or '-' for standard input or output.
+        file_format (str): The format given on the command line, if any.
+
+    Returns:
+        str: 'csv' or 'jsonl'.
+    """
+    if file_format:
+        return file_format
+    if path.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+    return "csv"
+
+
+@contextmanager
+def open_stream(path, mode):
+    """Open a file for streaming text, or standard input or output for '-'."""
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+    else:
+        with open(path, mode, newline="", encoding="utf-8") as stream:
+            yield stream
+
+
+def read_rows(stream, file_format):
+    """
+    Reads rows from a CSV or JSON Lines stream, one at a time.
+
+    Yields:
+        dict: The fields of a row.
+    """
+    if file_format == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def import_rows(db, rows, batch_size=1000):
+    """
+    Imports habits and completions row by row, creating habits that do not exist yet.
+
+    Completions are saved through a CompletionBuffer, in one transaction per batch; completions in an
+    already completed day or week are ignored.
+
+    Args:
+        db (Database): The database to import into.
+        rows (iterable): Dictionaries with the FIELDS of every row.
+        batch_size (int): The number of completions saved per transaction.
+
+    Returns:
+        tuple: The number of habits created and the number of completion rows read.
+    """
+    habit_ids = {}  # Case-folded name -> habit ID, only one entry per habit
+    habits_created = 0
+    completions = 0
+    with CompletionBuffer(db, max_rows=batch_size) as buffer:
+        for row in rows:
+            key = row["name"].casefold()
+            habit_id = habit_ids.get(key)
+            if habit_id is None:
+                habit_id = db.get_habit_id(row["name"])
+                if habit_id is None:
+                    habit = Habit(row["name"], row.get("description") or "", row.get("periodicity") or "daily")
+                    if row.get("creation_date"):
+                        habit._creation_date = datetime.fromisoformat(row["creation_date"])
+                    habit_id = db.save_habit(habit)
+                    habits_created += 1
+                habit_ids[key] = habit_id
+            if row.get("completion_date"):
+                buffer.add(habit_id, datetime.fromisoformat(row["completion_date"]))
+                completions += 1
+    return habits_created, completions
+
+
+def export_rows(db):
+    """
+    Exports all habits and their completions, one row per completion.
+
+    Yields:
+        dict: The FIELDS of every row, in order of habit and completion date.
+    """
+    habits = db.conn.execute('SELECT id, name, description, periodicity, creation_date FROM habits '
+                             'ORDER BY id').fetchall()
+    for habit_id, name, description, periodicity, creation_date in habits:
+        row = {"name": name, "description": description, "periodicity": periodicity,
+               "creation_date": str(creation_date), "completion_date": ""}
+        completed = False
+        for completion in db.iter_completions(habit_id):
+            completed = True
+            yield dict(row, completion_date=completion.isoformat(" "))
+        if not completed:
+            yield row
+
+
+def write_rows(stream, rows, file_format):
+    """Write rows to a CSV or JSON Lines stream, one at a time."""
+    if file_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            stream.write(json.dumps(row) + "\n")
+
+
+def command_import(db, args):
+    with open_stream(args.file, "r") as stream:
+        habits, completions = import_rows(db, read_rows(stream, detect_format(args.file, args.format)),
+                                          args.batch_size)
+    print(f"Imported {completions} completions, {habits} new habits.", file=sys.stderr)
+    return 0
+
+
+def command_export(db, args):
+    with open_stream(args.file, "w") as stream:
+        write_rows(stream, export_rows(db), detect_format(args.file, args.format))
+    return 0
+
+
+def command_complete(db, args):
+    habit_id = db.get_habit_id(args.name)
+    if habit_id is None:
+        print(f"Habit '{args.name}' not found.", file=sys.stderr)
+        return 1
+    completion_date = datetime.fromisoformat(args.date) if args.date else datetime.now()
+    if db.save_completion(habit_id, completion_date):
+        print(f"Marked '{args.name.title()}' as complete.")
+    else:
+        print(f"'{args.name.title()}' was already completed in this period.")
+    return 0
+
+
+def command_stats(db, args):
+    now = datetime.fromisoformat(args.date) if args.date else datetime.now()
+    for habit in db.load_stats():
+        deadline = completion_deadline(habit['last_completion'], habit['periodicity'])
+        if deadline is not None and deadline <= now:
+            habit['current_streak'] = 0  # The stored streak only lapses when the habit is next completed
+        if args.format == "jsonl":
+            print(json.dumps({key: str(value) if isinstance(value, datetime) else value
+                              for key, value in habit.items()}))
+        else:
+            last_completion = habit['last_completion'] or "never"
+            print(f"{habit['name']:<24} {habit['periodicity']:<7} streak {habit['current_streak']:>5}  "
+                  f"best {habit['best_streak']:>5}  completions {habit['completion_count']:>6}  "
+                  f"last {last_completion}")
+    return 0
+
+
+def command_list(db, args):
+    if args.periodicity:
+        names = list_habits_by_periodicity(db, args.periodicity)
+    else:
+        names = list_all_habits(db)
+    for name in names:
+        print(name)
+    return 0
+
+
+def build_parser():
+    """Create the argument parser with all subcommands."""
+    parser = argparse.ArgumentParser(prog="main.py", description="Habit tracker command-line interface.")
+    parser.add_argument("--db", default="habit_tracker.db", help="database file (default: habit_tracker.db)")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subcommands.add_parser("import", help="import habits and completions from a file")
+    import_parser.add_argument("file", help="CSV or JSON Lines file, or - for standard input")
+    import_parser.add_argument("--format", choices=FORMATS, help="file format (default: from the extension)")
+    import_parser.add_argument("--batch-size", type=int, default=1000, help="completions per transaction")
+    import_parser.set_defaults(handler=command_import)
+
+    export_parser = subcommands.add_parser("export", help="export all habits and completions")
+    export_parser.add_argument("file", nargs="?", default="-", help="output file (default: standard output)")
+    export_parser.add_argument("--format", choices=FORMATS, help="file format (default: from the extension)")
+    export_parser.set_defaults(handler=command_export)
+
+    complete_parser = subcommands.add_parser("complete", help="mark a habit as complete")
+    complete_parser.add_argument("name", help="name of the habit")
+    complete_parser.add_argument("--date", help="completion date in ISO format (default: now)")
+    complete_parser.set_defaults(handler=command_complete)
+
+    stats_parser = subcommands.add_parser("stats", help="show the statistics of all habits")
+    stats_parser.add_argument("--format", choices=("table", "jsonl"), default="table")
+    stats_parser.add_argument("--date", help="show the streaks as of this date in ISO format (default: now)")
+    stats_parser.set_defaults(handler=command_stats)
+
+    list_parser = subcommands.add_parser("list", help="list the names of the habits")
+    list_parser.add_argument("--periodicity", choices=("daily", "weekly"))
+    list_parser.set_defaults(handler=command_list)
+    return parser
+
+
+def run(argv):
+    """
+    Runs a subcommand.
+
+    Args:
+        argv (list): The command-line arguments, without the program name.
+
+    Returns:
+        int: The exit status.
+    """
+    args = build_parser().parse_args(argv)
+    db = Database(args.db)
+    try:
+        return args.handler(db, args)
+    finally:
+        db.close()
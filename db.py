@@ -1,97 +1,977 @@
+import os
 import sqlite3
-from habit import Habit
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
+from urllib.parse import quote
+import instrumentation
+from habit import CalendarHabit, CompactHabit, Habit
+from streaks import PeriodBitset
 from datetime import datetime, timedelta
 
 
+def _create_base_tables(conn):
+    """Schema version 1: the original habits and completions tables."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS habits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        description TEXT,
+        periodicity TEXT,
+        creation_date DATE
+    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS completions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER,
+        completion_date DATE,
+        FOREIGN KEY (habit_id) REFERENCES habits(id)
+    )''')
+
+
+def _add_indexes(conn):
+    """
+    Schema version 2: index habit names case-insensitively and completions by habit and date.
+
+    Habits whose names only differ in case from an older habit are renamed with a number suffix,
+    e.g. "read (2)", keeping their completions, and duplicate completions are removed first, so that
+    the unique indexes can be created on existing data.
+    """
+    duplicates = conn.execute('''SELECT id, name FROM habits h WHERE EXISTS (
+                                     SELECT 1 FROM habits o WHERE o.name = h.name COLLATE NOCASE AND o.id < h.id)
+                                 ORDER BY id''').fetchall()
+    for habit_id, name in duplicates:
+        number = 2
+        while conn.execute('SELECT 1 FROM habits WHERE name = ? COLLATE NOCASE',
+                           (f"{name} ({number})",)).fetchone():
+            number += 1
+        conn.execute('UPDATE habits SET name = ? WHERE id = ?', (f"{name} ({number})", habit_id))
+    conn.execute('''DELETE FROM completions WHERE id NOT IN (
+                        SELECT MIN(id) FROM completions GROUP BY habit_id, completion_date)''')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_habits_name ON habits (name COLLATE NOCASE)')
+    conn.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_completions_habit_date
+                    ON completions (habit_id, completion_date)''')
+
+
+def _create_seeds_table(conn):
+    """Schema version 3: record which seed sets have been applied to the database."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS seeds (
+        name TEXT PRIMARY KEY,
+        applied_date DATE
+    )''')
+
+
+def _seconds_sql(date_expression):
+    """Return an SQL expression for the seconds since the epoch of a completion date stored in either format."""
+    return (f"(CASE typeof({date_expression}) WHEN 'integer' THEN {date_expression} "
+            f"ELSE CAST(strftime('%s', {date_expression}) AS INTEGER) END)")
+
+
+def _day_sql(date_expression):
+    """Return an SQL expression for the day number of a completion date, matching Python's date.toordinal()."""
+    return f"CAST(julianday(date({_seconds_sql(date_expression)}, 'unixepoch')) - 1721424.5 AS INTEGER)"
+
+
+def _period_sql(date_expression):
+    """
+    Return an SQL expression for the period number of a completion date, matching streaks.period_ordinal:
+    the day number for daily habits and the ISO week number for weekly habits. The expression reads the
+    periodicity column, so it has to be evaluated against the habits table.
+    """
+    day = _day_sql(date_expression)
+    return f"CASE periodicity WHEN 'weekly' THEN ({day} - 1) / 7 ELSE {day} END"
+
+
+def _add_completion_periods(conn):
+    """
+    Schema version 4: store the period (day or ISO week) of every completion and allow only one
+    completion per habit and period.
+
+    Of several existing completions in the same period, only the earliest one is kept.
+    """
+    conn.execute('ALTER TABLE completions ADD COLUMN period INTEGER')
+    conn.execute(f'''UPDATE completions SET period = (
+                        SELECT {_period_sql('completion_date')} FROM habits WHERE habits.id = completions.habit_id)''')
+    conn.execute('''DELETE FROM completions WHERE period IS NOT NULL AND id NOT IN (
+                        SELECT id FROM (
+                            SELECT id, ROW_NUMBER() OVER (
+                                PARTITION BY habit_id, period ORDER BY completion_date, id) AS position
+                            FROM completions)
+                        WHERE position = 1)''')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_completions_habit_period ON completions (habit_id, period)')
+
+
+def _create_settings_table(conn):
+    """
+    Schema version 5: key-value settings of the database file, starting with the storage format of
+    completion dates. Existing completions are stored as text.
+    """
+    conn.execute('''CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )''')
+    conn.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('completion_format', 'text')")
+
+
+# Inserts a completion given its date (?1) and habit ID (?2), together with its period; completions
+# in a period that was already completed are ignored
+_INSERT_COMPLETION_SQL = f'''INSERT OR IGNORE INTO completions (habit_id, completion_date, period)
+                             SELECT id, ?1, {_period_sql('?1')} FROM habits WHERE id = ?2'''
+
+
+def _habit_stats_sql(habit_id_expression):
+    """
+    Return an SQL statement that inserts the habit_stats row of one habit, calculated from its completions.
+
+    A completion starts a new run unless its period follows that of the previous one, i.e. the next calendar
+    day (daily habits) or calendar week (weekly habits), as in Habit.streak. The current streak is the length
+    of the last run and the best streak the length of the longest run.
+
+    Args:
+        habit_id_expression (str): SQL expression for the habit ID, e.g. a parameter or NEW.habit_id in a trigger.
+    """
+    return f'''
+        INSERT INTO habit_stats
+            (habit_id, completion_count, last_completion, last_period, current_streak, best_streak)
+        SELECT {habit_id_expression}, COUNT(*), MAX(completion_date), MAX(period),
+               COALESCE(SUM(run = last_run), 0), COALESCE(MAX(run_length), 0)
+        FROM (
+            SELECT completion_date, period, run, MAX(run) OVER () AS last_run,
+                   COUNT(*) OVER (PARTITION BY run) AS run_length
+            FROM (
+                SELECT completion_date, period, SUM(starts_run) OVER (ORDER BY completion_date) AS run
+                FROM (
+                    SELECT c.completion_date, c.period,
+                           CASE WHEN h.periodicity IN ('daily', 'weekly')
+                               THEN COALESCE(c.period - LAG(c.period) OVER w != 1, 1)
+                               ELSE 1
+                           END AS starts_run
+                    FROM completions c JOIN habits h ON h.id = c.habit_id
+                    WHERE c.habit_id = {habit_id_expression}
+                    WINDOW w AS (ORDER BY c.completion_date))))'''
+
+
+def _create_habit_stats(conn):
+    """
+    Schema version 6: materialized per-habit statistics, kept up to date by triggers on completions.
+    Streaks count consecutive calendar periods, like Habit.streak.
+
+    A completion that is newer than the latest one extends or restarts the current streak in constant time;
+    any other insert, and every delete, recalculates the statistics of that habit from its completions.
+    """
+    conn.execute('''CREATE TABLE IF NOT EXISTS habit_stats (
+        habit_id INTEGER PRIMARY KEY,
+        completion_count INTEGER,
+        last_completion DATE,
+        last_period INTEGER,
+        current_streak INTEGER,
+        best_streak INTEGER,
+        FOREIGN KEY (habit_id) REFERENCES habits(id)
+    )''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_habit_stats_current_streak '
+                 'ON habit_stats (current_streak DESC, habit_id)')
+    is_latest = '''COALESCE(NEW.completion_date > (
+                      SELECT last_completion FROM habit_stats WHERE habit_id = NEW.habit_id), 0)'''
+    continues_streak = '''CASE WHEN (SELECT periodicity FROM habits WHERE id = NEW.habit_id) IN ('daily', 'weekly')
+                              THEN NEW.period - last_period = 1
+                              ELSE 0
+                          END'''
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_completions_insert_latest
+                     AFTER INSERT ON completions WHEN {is_latest}
+                     BEGIN
+                         UPDATE habit_stats SET
+                             completion_count = completion_count + 1,
+                             current_streak = CASE WHEN {continues_streak} THEN current_streak + 1 ELSE 1 END,
+                             best_streak = MAX(best_streak,
+                                               CASE WHEN {continues_streak} THEN current_streak + 1 ELSE 1 END),
+                             last_completion = NEW.completion_date,
+                             last_period = NEW.period
+                         WHERE habit_id = NEW.habit_id;
+                     END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_completions_insert
+                     AFTER INSERT ON completions WHEN NOT {is_latest}
+                     BEGIN
+                         DELETE FROM habit_stats WHERE habit_id = NEW.habit_id;
+                         {_habit_stats_sql('NEW.habit_id')};
+                     END''')
+    # The row is deleted and inserted again rather than replaced, because a conflict clause in a trigger is
+    # overridden by the one of the triggering statement, such as INSERT OR IGNORE.
+    # Deleting a habit removes the habit first, so its completions are deleted without recalculating
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_completions_delete
+                     AFTER DELETE ON completions WHEN EXISTS (SELECT 1 FROM habits WHERE id = OLD.habit_id)
+                     BEGIN
+                         DELETE FROM habit_stats WHERE habit_id = OLD.habit_id;
+                         {_habit_stats_sql('OLD.habit_id')};
+                     END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_habits_delete
+                    AFTER DELETE ON habits
+                    BEGIN
+                        DELETE FROM habit_stats WHERE habit_id = OLD.id;
+                    END''')
+    stats_sql = _habit_stats_sql('?1')
+    for (habit_id,) in conn.execute('SELECT id FROM habits WHERE id IN (SELECT habit_id FROM completions)').fetchall():
+        conn.execute(stats_sql, (habit_id,))
+
+
+def _add_change_counter(conn):
+    """
+    Schema version 7: a counter of all changes to habits and completions, together with a random ID of the
+    database file, so that caches of the database content can tell whether they are still up to date.
+
+    PRAGMA data_version only detects changes from other connections of the same process, and in WAL mode
+    neither the change counter in the file header nor the file's modification time follows every commit,
+    so the counter is kept up to date by triggers.
+    """
+    conn.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('database_id', lower(hex(randomblob(8))))")
+    conn.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('change_counter', 0)")
+    for table in ("habits", "completions"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_change_counter
+                             AFTER {event} ON {table}
+                             BEGIN
+                                 UPDATE settings SET value = value + 1 WHERE key = 'change_counter';
+                             END''')
+
+
+# Rollup table per calendar bucket size, and the SQL expression for the bucket number of a completion date:
+# the day number, the ISO week number (as streaks.period_ordinal) and the month number, year * 12 + month - 1
+ROLLUP_TABLES = {
+    'day': 'daily_rollups',
+    'week': 'weekly_rollups',
+    'month': 'monthly_rollups',
+}
+
+
+def _bucket_sql(granularity, date_expression):
+    """Return an SQL expression for the number of the day, week or month bucket of a completion date."""
+    if granularity == 'day':
+        return _day_sql(date_expression)
+    if granularity == 'week':
+        return f"({_day_sql(date_expression)} - 1) / 7"
+    month = f"strftime('%Y %m', {_seconds_sql(date_expression)}, 'unixepoch')"
+    return f"(CAST(substr({month}, 1, 4) AS INTEGER) * 12 + CAST(substr({month}, 6, 2) AS INTEGER) - 1)"
+
+
+def _create_completion_rollups(conn):
+    """
+    Schema version 8: the number of completions of every habit per day, week and month, kept up to date by
+    triggers on completions, so that range queries read one row per bucket instead of every completion.
+
+    Buckets without completions have no row.
+    """
+    for granularity, table in ROLLUP_TABLES.items():
+        conn.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+            habit_id INTEGER,
+            bucket INTEGER,
+            completions INTEGER,
+            PRIMARY KEY (habit_id, bucket)
+        ) WITHOUT ROWID''')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table} (bucket)')
+        new_bucket = _bucket_sql(granularity, 'NEW.completion_date')
+        old_bucket = _bucket_sql(granularity, 'OLD.completion_date')
+        # An upsert clause, unlike a conflict clause such as OR IGNORE, is not overridden by the one of the
+        # triggering statement
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_completions_insert_{table}
+                         AFTER INSERT ON completions
+                         BEGIN
+                             INSERT INTO {table} (habit_id, bucket, completions)
+                             VALUES (NEW.habit_id, {new_bucket}, 1)
+                             ON CONFLICT (habit_id, bucket) DO UPDATE SET completions = completions + 1;
+                         END''')
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_completions_delete_{table}
+                         AFTER DELETE ON completions WHEN EXISTS (SELECT 1 FROM habits WHERE id = OLD.habit_id)
+                         BEGIN
+                             UPDATE {table} SET completions = completions - 1
+                             WHERE habit_id = OLD.habit_id AND bucket = {old_bucket};
+                             DELETE FROM {table}
+                             WHERE habit_id = OLD.habit_id AND bucket = {old_bucket} AND completions <= 0;
+                         END''')
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_habits_delete_{table}
+                         AFTER DELETE ON habits
+                         BEGIN
+                             DELETE FROM {table} WHERE habit_id = OLD.id;
+                         END''')
+        # Completions of habits that no longer exist, which older versions left behind, are not counted
+        conn.execute(f'''INSERT INTO {table} (habit_id, bucket, completions)
+                         SELECT habit_id, {_bucket_sql(granularity, 'completion_date')} AS bucket, COUNT(*)
+                         FROM completions WHERE habit_id IN (SELECT id FROM habits)
+                         GROUP BY habit_id, bucket''')
+
+
+def _create_completion_bitsets(conn):
+    """
+    Schema version 9: the completed days of every habit as a bitset (see streaks.PeriodBitset), stored as a
+    BLOB with one bit per day from first_day on.
+
+    The bitsets are a cache that Database.load_completion_bitsets fills from the completions; the triggers
+    drop the bitset of a habit whenever its completions change, so that it is rebuilt on the next load.
+    """
+    conn.execute('''CREATE TABLE IF NOT EXISTS completion_bitsets (
+        habit_id INTEGER PRIMARY KEY,
+        first_day INTEGER,
+        days BLOB,
+        FOREIGN KEY (habit_id) REFERENCES habits(id)
+    )''')
+    for event, row in (("INSERT", "NEW"), ("DELETE", "OLD")):
+        conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_completions_{event.lower()}_completion_bitsets
+                         AFTER {event} ON completions
+                         BEGIN
+                             DELETE FROM completion_bitsets WHERE habit_id = {row}.habit_id;
+                         END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_habits_delete_completion_bitsets
+                    AFTER DELETE ON habits
+                    BEGIN
+                        DELETE FROM completion_bitsets WHERE habit_id = OLD.id;
+                    END''')
+
+
+# Schema migrations in order; the schema version stored in PRAGMA user_version is the number of
+# migrations that have been applied to the database file.
+MIGRATIONS = [
+    _create_base_tables,
+    _add_indexes,
+    _create_seeds_table,
+    _add_completion_periods,
+    _create_settings_table,
+    _create_habit_stats,
+    _add_change_counter,
+    _create_completion_rollups,
+    _create_completion_bitsets,
+]
+
+# Storage formats of completion dates: "text" stores 'YYYY-MM-DD HH:MM:SS' strings, "epoch" stores integer
+# seconds since EPOCH, which take less space in the table and its indexes and decode faster
+COMPLETION_FORMATS = ("text", "epoch")
+EPOCH = datetime(1970, 1, 1)  # Completion dates are naive, so they are counted from a naive epoch
+_ONE_SECOND = timedelta(seconds=1)
+
+
+def decode_completion(value):
+    """
+    Converts a stored completion date into a datetime, whichever storage format it was saved in.
+
+    Args:
+        value (int or str): Seconds since EPOCH, or a 'YYYY-MM-DD HH:MM:SS' string.
+
+    Returns:
+        datetime: The completion date.
+    """
+    if isinstance(value, int):
+        return EPOCH + timedelta(0, value)
+    return datetime.fromisoformat(value)  # Much faster than strptime for this fixed format
+
+class _Reader:
+    """The reader connection of one thread, kept in thread-local storage so that it is closed when the thread ends."""
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+def _close_reader(conn, readers, readers_lock):
+    """Close the reader connection of a thread that ended and remove it from the pool."""
+    with readers_lock:
+        if conn in readers:
+            readers.remove(conn)
+    conn.close()
+
+
+# Oldest SQLite library the schema and queries run on: window functions need 3.25 and upserts 3.24
+MIN_SQLITE_VERSION = (3, 25, 0)
+
+# Environment variable that disables seeding the predefined habits and sample data when set to
+# a false value such as "0", e.g. for production databases
+SEED_ENV_VAR = "HABIT_TRACKER_SEED"
+
+
 class Database:
-    def __init__(self, db_name="habit_tracker.db"):
-        """Initialize the database connection and create tables if they don't exist."""
-        self.conn = sqlite3.connect(db_name)
-        self.create_tables()
+    """
+    Connection pool for the habit tracker database, safe to share between threads and to use from
+    several processes at the same time.
+
+    The database runs in WAL mode, so readers do not block the writer and the writer does not block
+    readers. Every thread reads through its own connection, which is closed when the thread ends, while all
+    writes go through a single writer
+    connection, serialized by a lock; inside transaction() the writing thread also reads through the
+    writer connection, so it sees its own uncommitted writes. The reader connections are query-only, so
+    statements that write through conn have to run inside transaction(). A busy timeout makes connections
+    wait for locks held by other processes instead of failing with "database is locked".
+    """
+
+    def __init__(self, db_name="habit_tracker.db", completion_format=None, read_only=False, busy_timeout=5.0):
+        """
+        Initialize the database connection and create or upgrade the tables if needed.
+
+        Args:
+            db_name (str): The file name of the database.
+            completion_format (str): The storage format of completion dates, "text" or "epoch". Existing
+                completions are converted if the database uses another format; by default the format of
+                the database is kept.
+            read_only (bool): If True, open an existing, up-to-date database file without write access, e.g.
+                in a worker process. The schema is neither created nor upgraded.
+            busy_timeout (float): The number of seconds to wait for a lock held by another connection.
+
+        Raises:
+            sqlite3.NotSupportedError: If the SQLite library is older than MIN_SQLITE_VERSION.
+        """
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise sqlite3.NotSupportedError(
+                f"SQLite {sqlite3.sqlite_version} is too old, the habit tracker needs SQLite "
+                f"{'.'.join(map(str, MIN_SQLITE_VERSION))} or newer.")
+        self.db_name = db_name
+        self.read_only = read_only
+        self.busy_timeout = busy_timeout
+        self._transaction_depth = 0
+        self._write_lock = threading.RLock()
+        self._writer_thread = None  # The thread inside transaction(), which reads through the writer
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+        self._writer = self._connect()
+        if read_only or db_name == ":memory:":
+            # Nothing to write, or a private in-memory database that only the writer connection can see
+            self._readers = None
+        if not read_only:
+            self._writer.execute('PRAGMA journal_mode = WAL')
+            self._writer.execute('PRAGMA synchronous = NORMAL')  # Safe in WAL mode; commits skip the fsync
+            self.create_tables()
+        self.completion_format = self.get_setting("completion_format")
+        if completion_format and completion_format != self.completion_format:
+            self.convert_completion_format(completion_format)
+
+    def _connect(self):
+        """Open a new connection to the database file, usable from any thread."""
+        factory = instrumentation.connection_factory()  # Counts statements and rows while profiling
+        if self.read_only:
+            conn = sqlite3.connect(f"file:{quote(self.db_name)}?mode=ro", uri=True,
+                                   timeout=self.busy_timeout, check_same_thread=False, factory=factory)
+        else:
+            conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout, check_same_thread=False,
+                                   factory=factory)
+        return conn
+
+    @property
+    def conn(self):
+        """
+        The connection for the calling thread: the writer connection inside transaction(), otherwise the
+        thread's own reader connection, which is opened on first use and closed when the thread ends.
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+        if self._writer_thread == threading.get_ident() or self._readers is None:
+            return self._writer
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            conn = self._connect()
+            conn.execute('PRAGMA query_only = ON')  # Writes outside transaction() fail instead of locking the file
+            reader = self._local.reader = _Reader(conn)
+            # The thread-local storage of a thread is released when it ends, e.g. a short-lived worker thread
+            weakref.finalize(reader, _close_reader, conn, self._readers, self._readers_lock)
+            with self._readers_lock:
+                self._readers.append(conn)
+        return reader.conn
+
+    @contextmanager
+    def _read_snapshot(self):
+        """
+        Run the reads of the block on a single snapshot of the database, in a read transaction on the reader
+        connection of the thread. Inside transaction() and with a single connection the block runs as is.
+        """
+        conn = self.conn
+        if conn is self._writer:
+            yield
+            return
+        conn.execute('BEGIN')
+        try:
+            yield
+        finally:
+            conn.commit()
+
+    def vacuum(self):
+        """Rebuild the database file to reclaim unused space; VACUUM cannot run inside a transaction."""
+        with self._write_lock:
+            self._writer.execute('VACUUM')
+
+    def close(self):
+        """Close the writer connection and the reader connections of all threads."""
+        with self._write_lock:
+            if self._closed:
+                return
+            self._closed = True
+            with self._readers_lock:
+                for conn in self._readers or ():
+                    conn.close()
+                if self._readers:
+                    self._readers.clear()
+            self._writer.close()
 
     def create_tables(self):
-        """Create habits and completions tables."""
-        self.conn.execute('''CREATE TABLE IF NOT EXISTS habits (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT,
-            description TEXT,
-            periodicity TEXT,
-            creation_date DATE
-        )''')
-        self.conn.execute('''CREATE TABLE IF NOT EXISTS completions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            habit_id INTEGER,
-            completion_date DATE,
-            FOREIGN KEY (habit_id) REFERENCES habits(id)
-        )''')
-        self.conn.commit()
+        """Create the habits and completions tables, upgrading an existing schema to the latest version."""
+        self.migrate()
+
+    def get_schema_version(self):
+        """Return the schema version of the database file."""
+        return self.conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def migrate(self, target_version=len(MIGRATIONS)):
+        """
+        Apply all pending schema migrations up to the target version.
+
+        Every migration runs in its own transaction together with the version bump, so an
+        interrupted upgrade leaves the database at the last fully applied version.
+
+        Args:
+            target_version (int): The schema version to upgrade to, by default the latest one.
+        """
+        version = self.get_schema_version()
+        while version < target_version:
+            with self.transaction():
+                MIGRATIONS[version](self.conn)
+                version += 1
+                self.conn.execute(f'PRAGMA user_version = {version}')
+
+    def get_setting(self, key):
+        """Return the value of a database setting, or None if it is not set."""
+        row = self.conn.execute('SELECT value FROM settings WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_version_token(self):
+        """
+        Return a value that changes whenever habits or completions change, for validating caches.
+
+        Returns:
+            tuple: The database ID, the schema version and the change counter.
+        """
+        rows = dict(self.conn.execute("SELECT key, value FROM settings WHERE key IN ('database_id', 'change_counter')"))
+        return rows['database_id'], self.get_schema_version(), int(rows['change_counter'])
+
+    def convert_completion_format(self, completion_format):
+        """
+        Convert all stored completion dates to another storage format in a single transaction.
+
+        Args:
+            completion_format (str): The new storage format, "text" or "epoch".
+
+        Raises:
+            ValueError: If the storage format is unknown.
+        """
+        if completion_format not in COMPLETION_FORMATS:
+            raise ValueError(f"Unknown completion format '{completion_format}', expected one of {COMPLETION_FORMATS}.")
+        with self.transaction():
+            for table, column in (("completions", "completion_date"), ("habit_stats", "last_completion")):
+                if completion_format == "epoch":
+                    self.conn.execute(f"""UPDATE {table} SET {column} = CAST(strftime('%s', {column}) AS INTEGER)
+                                          WHERE typeof({column}) = 'text'""")
+                else:
+                    self.conn.execute(f"""UPDATE {table} SET {column} = strftime('%Y-%m-%d %H:%M:%S', {column}, 'unixepoch')
+                                          WHERE typeof({column}) = 'integer'""")
+            self.conn.execute("UPDATE settings SET value = ? WHERE key = 'completion_format'", (completion_format,))
+        self.completion_format = completion_format
+
+    def encode_completion(self, completion_date):
+        """Convert a completion datetime into the storage format of the database, truncated to whole seconds."""
+        if self.completion_format == "epoch":
+            return (completion_date - EPOCH) // _ONE_SECOND
+        return completion_date.isoformat(" ", "seconds")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes into a single transaction that is committed when the block exits.
+
+        The mutator methods do not commit on their own inside the block, so bulk writes pay for
+        a single commit. Transactions can be nested; only the outermost block commits, and any
+        exception rolls back the whole transaction. Only one thread at a time can be inside a
+        transaction; other threads wait until it is committed or rolled back.
+
+        Example:
+            with db.transaction():
+                habit_id = db.save_habit(habit)
+                db.save_completion(habit_id, datetime.now())
+        """
+        with self._write_lock:
+            if self._transaction_depth == 0:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+                # Take the write lock of the file right away, so that waiting for other processes is
+                # covered by the busy timeout instead of failing when a read lock cannot be upgraded
+                self._writer.execute('BEGIN IMMEDIATE')
+                self._writer_thread = threading.get_ident()
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self._writer_thread = None
+                    self._writer.rollback()
+                raise
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._writer_thread = None
+                self._writer.commit()
 
     def habit_exists(self, name):
         """Check if a habit with the given name already exists in the database."""
-        cursor = self.conn.execute('SELECT id FROM habits WHERE LOWER(name) = ?', (name.lower(),))
+        cursor = self.conn.execute('SELECT id FROM habits WHERE name = ? COLLATE NOCASE', (name,))
         result = cursor.fetchone()
         return result is not None  # Returns True if the habit exists, False otherwise
 
     def save_habit(self, habit):
         """Save the new habit into the database and return its automatically generated ID."""
-        self.conn.execute('''INSERT INTO habits (name, description, periodicity, creation_date)
-                                 VALUES (?, ?, ?, ?)''',
-                          (habit.get_name(), habit.get_description(), habit.get_periodicity(),
-                           habit.get_creation_date()))
-        habit_id = self.conn.execute('SELECT last_insert_rowid()').fetchone()[0]
-        self.conn.commit()
-        return habit_id
+        with self.transaction():
+            cursor = self.conn.execute('''INSERT INTO habits (name, description, periodicity, creation_date)
+                                     VALUES (?, ?, ?, ?)''',
+                              (habit.get_name(), habit.get_description(), habit.get_periodicity(),
+                               habit.get_creation_date()))
+        return cursor.lastrowid
 
     def save_completion(self, habit_id, completion_date):
-        """Saves the completion date for a specific habit in the completions table."""
-        self.conn.execute('''INSERT INTO completions (habit_id, completion_date)
-                             VALUES (?, ?)''', (habit_id, completion_date.strftime("%Y-%m-%d %H:%M:%S")))
-        self.conn.commit()
+        """
+        Saves the completion date for a specific habit in the completions table.
+
+        Completions in a day (daily habits) or calendar week (weekly habits) that was already completed are ignored.
+
+        Returns:
+            bool: True if the completion was saved, False if it was ignored.
+        """
+        with self.transaction():
+            cursor = self.conn.execute(_INSERT_COMPLETION_SQL, (self.encode_completion(completion_date), habit_id))
+        return cursor.rowcount == 1
+
+    def save_completions_bulk(self, habit_id, completion_dates):
+        """
+        Save many completion dates for a specific habit with a single statement, ignoring duplicate periods.
+
+        Args:
+            habit_id (int): The ID of the habit.
+            completion_dates (iterable): The datetime objects of the completions.
+        """
+        self.save_completions_many((habit_id, completion_date) for completion_date in completion_dates)
+
+    def save_completions_many(self, completions):
+        """
+        Save completions of any number of habits with a single statement, ignoring duplicate periods.
+
+        The completions are streamed into a temporary table and inserted from there in chronological order
+        per habit, so that the habit_stats triggers can extend the streaks incrementally instead of
+        recalculating them, without holding the whole batch in memory.
+
+        Args:
+            completions (iterable): Pairs of habit ID and completion datetime, in any order.
+        """
+        with self.transaction():
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS pending_completions (habit_id INTEGER, completion_date)')
+            self.conn.executemany('INSERT INTO temp.pending_completions (habit_id, completion_date) VALUES (?, ?)',
+                                  ((habit_id, self.encode_completion(completion_date))
+                                   for habit_id, completion_date in completions))
+            self.conn.execute(f'''INSERT OR IGNORE INTO completions (habit_id, completion_date, period)
+                                 SELECT p.habit_id, p.completion_date, {_period_sql('p.completion_date')}
+                                 FROM temp.pending_completions p JOIN habits ON habits.id = p.habit_id
+                                 ORDER BY p.habit_id, p.completion_date''')
+            self.conn.execute('DELETE FROM temp.pending_completions')
 
     def update_habit(self, habit_id, new_name, new_description):
         """Update the name and description of a habit in the database."""
-        self.conn.execute('''UPDATE habits
-                             SET name = ?, description = ?
-                             WHERE id = ?''', (new_name, new_description, habit_id))
-        self.conn.commit()
+        with self.transaction():
+            self.conn.execute('''UPDATE habits
+                                 SET name = ?, description = ?
+                                 WHERE id = ?''', (new_name, new_description, habit_id))
 
     def load_habits(self):
-        """Load all habits and their completion dates from the database."""
+        """
+        Load all habits and their completion dates from the database.
+
+        Habits and completions are fetched with one query each and the completions are grouped
+        by habit ID in a single pass, instead of running one completions query per habit.
+        """
         habits = []
+        completions_by_habit = self.load_all_completions()
         cursor = self.conn.execute('SELECT * FROM habits')
-        habit_data = cursor.fetchall()
-        for row in habit_data:
+        for row in cursor.fetchall():
             habit = {
                 'id': row[0],
                 'name': row[1],
                 'description': row[2],
                 'periodicity': row[3],
                 'creation_date': row[4],
-                'completions': self.load_completions(row[0])  # Ensure completions are properly loaded
+                'completions': completions_by_habit.get(row[0], [])
             }
             habits.append(habit)
         return habits
 
+    def load_habit_objects(self, lazy=False, compact=False, id_range=None, calendar=False, with_ids=False):
+        """
+        Load all habits from the database as Habit objects, ready to be added to a HabitTracker.
+
+        Args:
+            lazy (bool): If True, only load the number of completions, the latest completion and the current
+                streak of every habit; the full completion history is fetched page by page when needed.
+            compact (bool): If True, load CompactHabit objects, which store their completions in less memory.
+            id_range (tuple): The first and last habit ID to load, e.g. a shard of the habits; by default all.
+            calendar (bool): If True, load CalendarHabit objects, which keep their completed days in a bitset,
+                from the stored bitsets instead of the completion rows.
+            with_ids (bool): If True, return (habit ID, Habit) pairs, with the IDs read in the same query as the habits.
+
+        Returns:
+            list: A list of Habit objects with their creation dates and completions filled in, or of
+                (habit ID, Habit) pairs.
+        """
+        habits = []
+        if lazy:
+            summaries = self.load_completion_summaries()
+        elif calendar:
+            bitsets = self.load_completion_bitsets(id_range)
+        else:
+            completions_by_habit = self.load_all_completions(id_range)
+        habit_class = CalendarHabit if calendar else CompactHabit if compact else Habit
+        if id_range is None:
+            cursor = self.conn.execute('SELECT id, name, description, periodicity, creation_date FROM habits')
+        else:
+            cursor = self.conn.execute('SELECT id, name, description, periodicity, creation_date FROM habits '
+                                       'WHERE id BETWEEN ? AND ? ORDER BY id', id_range)
+        for habit_id, name, description, periodicity, creation_date in cursor:
+            habit = habit_class(name, description, periodicity)
+            habit._creation_date = datetime.fromisoformat(creation_date)
+            if lazy:
+                count, last_completion, streak = summaries.get(habit_id, (0, None, 0))
+                habit.set_summary(count, last_completion, streak,
+                                  lambda habit_id=habit_id: self.iter_completions(habit_id))
+            elif calendar:
+                habit.set_completion_days(bitsets.get(habit_id) or PeriodBitset())
+            else:
+                habit.set_completions(completions_by_habit.get(habit_id, []))
+            habits.append((habit_id, habit) if with_ids else habit)
+        return habits
+
+    def load_completion_bitsets(self, id_range=None):
+        """
+        Load the completed days of all habits as bitsets, one BLOB per habit.
+
+        Bitsets that are missing or out of date are rebuilt from the completion rows, lossless at day
+        granularity, and stored for the next load, unless the database is read-only.
+
+        Args:
+            id_range (tuple): The first and last habit ID to load the bitsets of; by default all habits.
+
+        Returns:
+            dict: A mapping of habit ID to a PeriodBitset of its completed days, numbered as date.toordinal(),
+                for habits with completions.
+        """
+        in_range = ' AND habit_id BETWEEN ? AND ?' if id_range else ''
+        params = id_range or ()
+        # Read on the reader connection, so that loading does not wait for the write lock
+        with self._read_snapshot():
+            change_counter = self.get_setting('change_counter')
+            bitsets = {habit_id: PeriodBitset.from_bytes(first_day, days) for habit_id, first_day, days
+                       in self.conn.execute(f'SELECT habit_id, first_day, days FROM completion_bitsets '
+                                            f'WHERE 1{in_range}', params)}
+            cursor = self.conn.execute(f'''SELECT habit_id, {_day_sql('completion_date')} FROM completions
+                                           WHERE habit_id NOT IN (SELECT habit_id FROM completion_bitsets){in_range}
+                                           ORDER BY habit_id''', params)
+            rebuilt = {habit_id: PeriodBitset(day for _, day in rows)
+                       for habit_id, rows in groupby(cursor, itemgetter(0))}
+        if rebuilt and not self.read_only:
+            with self.transaction():
+                # Stored only if no habit or completion changed since the snapshot, otherwise they may be stale
+                if self.get_setting('change_counter') == change_counter:
+                    self.conn.executemany('INSERT OR REPLACE INTO completion_bitsets (habit_id, first_day, days) '
+                                          'VALUES (?, ?, ?)',
+                                          ((habit_id, bitset.first_period, bitset.to_bytes())
+                                           for habit_id, bitset in rebuilt.items()))
+        bitsets.update(rebuilt)
+        return bitsets
+
+    def load_completion_summaries(self):
+        """
+        Load the number of completions, the latest completion and the current streak of all habits from the
+        habit_stats table, without transferring the completions themselves.
+
+        Returns:
+            dict: A mapping of habit ID to a (count, last completion, streak) tuple, for habits with completions.
+        """
+        cursor = self.conn.execute('''SELECT habit_id, completion_count, last_completion, current_streak
+                                      FROM habit_stats WHERE completion_count > 0''')
+        return {habit_id: (count, decode_completion(last_completion), streak)
+                for habit_id, count, last_completion, streak in cursor}
+
+    def load_stats(self):
+        """
+        Load all habits with their materialized statistics, without loading any completions.
+
+        Returns:
+            list: A list of dictionaries with the habit's id, name, description, periodicity, creation_date,
+                completion_count, last_completion (None if never completed), current_streak and best_streak.
+        """
+        cursor = self.conn.execute('''SELECT h.id, h.name, h.description, h.periodicity, h.creation_date,
+                                             s.completion_count, s.last_completion, s.current_streak, s.best_streak
+                                      FROM habits h LEFT JOIN habit_stats s ON s.habit_id = h.id
+                                      ORDER BY h.id''')
+        return [self._stats_row(row) for row in cursor]
+
+    def load_longest_streak(self):
+        """
+        Load the habit with the longest current streak with a single indexed query; on ties the oldest habit.
+        If no habit was completed yet, that is the oldest habit, with a streak of 0.
+
+        Returns:
+            dict: The habit and its statistics, as returned by load_stats, or None if there are no habits.
+        """
+        row = self.conn.execute('''SELECT h.id, h.name, h.description, h.periodicity, h.creation_date,
+                                          s.completion_count, s.last_completion, s.current_streak, s.best_streak
+                                   FROM habit_stats s JOIN habits h ON h.id = s.habit_id
+                                   ORDER BY s.current_streak DESC, s.habit_id LIMIT 1''').fetchone()
+        if row is None:  # Only habits with completions have statistics
+            row = self.conn.execute('''SELECT id, name, description, periodicity, creation_date,
+                                              0, NULL, 0, 0
+                                       FROM habits ORDER BY id LIMIT 1''').fetchone()
+        return self._stats_row(row) if row else None
+
+    @staticmethod
+    def _stats_row(row):
+        """Convert a habits row joined with its habit_stats row into a dictionary."""
+        habit_id, name, description, periodicity, creation_date, count, last_completion, current, best = row
+        return {
+            'id': habit_id,
+            'name': name,
+            'description': description,
+            'periodicity': periodicity,
+            'creation_date': datetime.fromisoformat(creation_date),
+            'completion_count': count or 0,
+            'last_completion': decode_completion(last_completion) if last_completion is not None else None,
+            'current_streak': current or 0,
+            'best_streak': best or 0
+        }
+
+    def load_all_completions(self, id_range=None):
+        """
+        Load the completion dates of all habits with a single query.
+
+        Args:
+            id_range (tuple): The first and last habit ID to load the completions of; by default all habits.
+
+        Returns:
+            dict: A mapping of habit ID to its list of completion dates, in chronological order.
+        """
+        completions_by_habit = {}
+        if id_range is None:
+            cursor = self.conn.execute('SELECT habit_id, completion_date FROM completions '
+                                       'ORDER BY habit_id, completion_date')
+        else:
+            cursor = self.conn.execute('SELECT habit_id, completion_date FROM completions '
+                                       'WHERE habit_id BETWEEN ? AND ? ORDER BY habit_id, completion_date', id_range)
+        for habit_id, completion_date in cursor:
+            completion = decode_completion(completion_date)
+            completions = completions_by_habit.get(habit_id)
+            if completions is None:
+                completions = completions_by_habit[habit_id] = []
+            completions.append(completion)
+        return completions_by_habit
+
     def load_completions(self, habit_id):
         """Load all completion dates for a specific habit."""
-        cursor = self.conn.execute('SELECT completion_date FROM completions WHERE habit_id = ?', (habit_id,))
-        completions = [datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S") for row in cursor.fetchall()]
+        cursor = self.conn.execute('SELECT completion_date FROM completions WHERE habit_id = ? '
+                                   'ORDER BY completion_date', (habit_id,))
+        completions = [decode_completion(row[0]) for row in cursor.fetchall()]
         return completions
 
+    def iter_completions(self, habit_id, since=None, page_size=1000):
+        """
+        Iterate over the completion dates of a specific habit in chronological order, fetching them in pages.
+
+        Args:
+            habit_id (int): The ID of the habit.
+            since (datetime): Only return completions at or after this date, by default all completions.
+            page_size (int): The number of completions fetched per query.
+
+        Yields:
+            datetime: The completion dates.
+        """
+        bound = ' AND completion_date >= ?' if since else ''
+        params = (habit_id, self.encode_completion(since)) if since else (habit_id,)
+        while True:
+            rows = self.conn.execute(f'''SELECT completion_date FROM completions WHERE habit_id = ?{bound}
+                                         ORDER BY completion_date LIMIT ?''', params + (page_size,)).fetchall()
+            for row in rows:
+                yield decode_completion(row[0])
+            if len(rows) < page_size:
+                return
+            bound = ' AND completion_date > ?'  # Continue after the last completion of the previous page
+            params = (habit_id, rows[-1][0])
+
+    def load_rollups(self, granularity, first_bucket, last_bucket, habit_id=None):
+        """
+        Load the completion counts per day, week or month bucket in a range of buckets.
+
+        Args:
+            granularity (str): The bucket size, 'day', 'week' or 'month' (see ROLLUP_TABLES).
+            first_bucket (int): The number of the first bucket of the range.
+            last_bucket (int): The number of the last bucket of the range, inclusive.
+            habit_id (int): Only load the counts of this habit, by default those of all habits.
+
+        Returns:
+            list: (habit ID, bucket, completions) tuples ordered by habit and bucket, only for buckets with
+                completions.
+
+        Raises:
+            ValueError: If the granularity is unknown.
+        """
+        table = ROLLUP_TABLES.get(granularity)
+        if table is None:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {tuple(ROLLUP_TABLES)}.")
+        if habit_id is None:
+            cursor = self.conn.execute(f'SELECT habit_id, bucket, completions FROM {table} '
+                                       'WHERE bucket BETWEEN ? AND ? ORDER BY habit_id, bucket',
+                                       (first_bucket, last_bucket))
+        else:
+            cursor = self.conn.execute(f'SELECT habit_id, bucket, completions FROM {table} '
+                                       'WHERE habit_id = ? AND bucket BETWEEN ? AND ? ORDER BY bucket',
+                                       (habit_id, first_bucket, last_bucket))
+        return cursor.fetchall()
+
+    def load_rollup_totals(self, granularity, first_bucket, last_bucket):
+        """
+        Load the completion counts of all habits together per day, week or month bucket in a range of buckets.
+
+        Args:
+            granularity (str): The bucket size, 'day', 'week' or 'month' (see ROLLUP_TABLES).
+            first_bucket (int): The number of the first bucket of the range.
+            last_bucket (int): The number of the last bucket of the range, inclusive.
+
+        Returns:
+            list: (bucket, completions) tuples ordered by bucket, only for buckets with completions.
+
+        Raises:
+            ValueError: If the granularity is unknown.
+        """
+        table = ROLLUP_TABLES.get(granularity)
+        if table is None:
+            raise ValueError(f"Unknown granularity '{granularity}', expected one of {tuple(ROLLUP_TABLES)}.")
+        return self.conn.execute(f'SELECT bucket, SUM(completions) FROM {table} WHERE bucket BETWEEN ? AND ? '
+                                 'GROUP BY bucket ORDER BY bucket', (first_bucket, last_bucket)).fetchall()
+
     def delete_habit(self, habit_id):
         """Delete a habit and its completions from the database."""
-        self.conn.execute('DELETE FROM completions WHERE habit_id = ?', (habit_id,))
-        self.conn.execute('DELETE FROM habits WHERE id = ?', (habit_id,))
-        self.conn.commit()
+        with self.transaction():
+            self.conn.execute('DELETE FROM habits WHERE id = ?', (habit_id,))
+            self.conn.execute('DELETE FROM completions WHERE habit_id = ?', (habit_id,))
 
     def get_habit_id(self, name):
         """Retrieve the habit's ID from the database based on the habit name."""
-        cursor = self.conn.execute('SELECT id FROM habits WHERE LOWER(name) = LOWER(?)', (name,))
+        cursor = self.conn.execute('SELECT id FROM habits WHERE name = ? COLLATE NOCASE', (name,))
         result = cursor.fetchone()
         return result[0] if result else None
 
     def insert_test_data(self):
-        """Insert sample data for habits"""
+        """
+        Insert sample data for the predefined habits, unless it has already been inserted.
+
+        Returns:
+            bool: True if the sample data was inserted, False if it was already present.
+        """
         base_date = datetime(2023, 9, 25)
         sample_data = {
             "Exercise": [
@@ -123,37 +1003,145 @@ class Database:
             ]
         }
 
-        for habit_name, dates in sample_data.items():
-            habit_id = self.get_habit_id(habit_name)
-            if habit_id is not None:
-                for date in dates:
-                    completion_date = date
-                    self.save_completion(habit_id, completion_date)
+        rows = [(self.encode_completion(date), habit_name)
+                for habit_name, dates in sample_data.items() for date in dates]
 
+        def insert_completions(conn):
+            conn.executemany(f'''INSERT OR IGNORE INTO completions (habit_id, completion_date, period)
+                                 SELECT id, ?1, {_period_sql('?1')} FROM habits WHERE name = ?2 COLLATE NOCASE''',
+                             rows)
 
-def initialize_predefined_habits(db):
-    """Initialize predefined habits in the database and load sample tracking data."""
+        return self.apply_seed("sample_completions", insert_completions)
 
-    predefined_habits = [
-        {"name": "Exercise", "description": "Weekly Exercise", "periodicity": "weekly"},
-        {"name": "Read", "description": "Read every day", "periodicity": "daily"},
-        {"name": "Meditate", "description": "Daily meditation", "periodicity": "daily"},
-        {"name": "Art Class", "description": "Attend weekly art class", "periodicity": "weekly"},
-        {"name": "Learn French", "description": "Daily French lesson", "periodicity": "daily"}
-    ]
+    def is_seeded(self, seed_name):
+        """Check if the seed set with the given name has already been applied to the database."""
+        cursor = self.conn.execute('SELECT 1 FROM seeds WHERE name = ?', (seed_name,))
+        return cursor.fetchone() is not None
 
-    # Insert predefined habits if they don't already exist in the database
-    for habit in predefined_habits:
-        if not db.habit_exists(habit["name"]):  # Check if the habit already exists
-            db.save_habit(Habit(habit["name"], habit["description"], habit["periodicity"]))
+    def apply_seed(self, seed_name, seed_function):
+        """
+        Apply a seed set to the database once.
+
+        The seed function and the record of the seed set run in a single transaction, so a seed
+        set is either fully applied and recorded, or not at all.
+
+        Args:
+            seed_name (str): The unique name of the seed set.
+            seed_function (callable): Function that receives the connection and inserts the seed rows.
+
+        Returns:
+            bool: True if the seed set was applied, False if it had already been applied before.
+        """
+        if self.is_seeded(seed_name):
+            return False
+        with self.transaction():
+            seed_function(self.conn)
+            self.conn.execute('INSERT INTO seeds (name, applied_date) VALUES (?, ?)', (seed_name, datetime.now()))
+        return True
 
-    db.insert_test_data()
 
+class CompletionBuffer:
+    """
+    Write-behind buffer that collects completions and saves them to the database in batches.
 
+    The buffer is flushed with a single transaction once it holds max_rows completions, or at the latest
+    max_delay_ms milliseconds after the oldest buffered completion was added, by a timer thread if no
+    further completion arrives. Call flush() or use the buffer as a context manager to write out the
+    remaining completions right away.
 
+    Example:
+        with CompletionBuffer(db, max_rows=500) as buffer:
+            for habit_id, completion_date in rows:
+                buffer.add(habit_id, completion_date)
+    """
 
+    def __init__(self, db, max_rows=1000, max_delay_ms=1000):
+        """
+        Initializes a new completion buffer.
 
+        Args:
+            db (Database): The database to write the completions to.
+            max_rows (int): The number of buffered completions that triggers a flush.
+            max_delay_ms (float): The age in milliseconds of the oldest buffered completion that triggers a flush.
+        """
+        self.db = db
+        self.max_rows = max_rows
+        self.max_delay_ms = max_delay_ms
+        self._pending = []
+        self._oldest = None
+        self._timer = None
+        self._lock = threading.RLock()  # Shared with the timer thread; held while a batch is written
 
+    def __len__(self):
+        return len(self._pending)
 
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
 
+    def add(self, habit_id, completion_date):
+        """Buffer a completion for a habit, flushing the buffer if it is full or too old."""
+        with self._lock:
+            now = time.monotonic()
+            if not self._pending:
+                self._oldest = now
+                self._timer = threading.Timer(self.max_delay_ms / 1000, self.flush)
+                self._timer.daemon = True  # Does not keep the process alive; flush() before exiting
+                self._timer.start()
+            self._pending.append((habit_id, completion_date))
+            if len(self._pending) >= self.max_rows or (now - self._oldest) * 1000 >= self.max_delay_ms:
+                self.flush()
+
+    def flush(self):
+        """Save all buffered completions in a single transaction."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                with self.db.transaction():
+                    self.db.save_completions_many(self._pending)
+                self._pending = []
+                self._oldest = None
+
+
+def seeding_enabled():
+    """Check if seeding is enabled, i.e. the seed environment variable is not set to a false value."""
+    return os.environ.get(SEED_ENV_VAR, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def initialize_predefined_habits(db, seed=None):
+    """
+    Initialize predefined habits in the database and load sample tracking data.
+
+    Each seed set is applied only once per database, so calling this on every start is cheap.
+
+    Args:
+        db (Database): The database to seed.
+        seed (bool): Whether to seed the database; by default decided by the HABIT_TRACKER_SEED
+            environment variable.
+    """
+    if seed is None:
+        seed = seeding_enabled()
+    if not seed:
+        return
+
+    predefined_habits = [
+        {"name": "Exercise", "description": "Weekly Exercise", "periodicity": "weekly"},
+        {"name": "Read", "description": "Read every day", "periodicity": "daily"},
+        {"name": "Meditate", "description": "Daily meditation", "periodicity": "daily"},
+        {"name": "Art Class", "description": "Attend weekly art class", "periodicity": "weekly"},
+        {"name": "Learn French", "description": "Daily French lesson", "periodicity": "daily"}
+    ]
+
+    # Insert predefined habits, ignoring those that already exist in the database
+    def insert_habits(conn):
+        conn.executemany('''INSERT OR IGNORE INTO habits (name, description, periodicity, creation_date)
+                            VALUES (?, ?, ?, ?)''',
+                         [(habit["name"], habit["description"], habit["periodicity"], datetime.now())
+                          for habit in predefined_habits])
+
+    db.apply_seed("predefined_habits", insert_habits)
+    db.insert_test_data()
@@ -1,4 +1,7 @@
-from datetime import datetime # used for managing dates and times, setting creation and completion dates and comparing them
+from array import array # used for the compact storage of completions in CompactHabit
+from bisect import bisect_left, insort # used for keeping the completions in chronological order
+from datetime import datetime, timedelta # used for managing dates and times, setting creation and completion dates and comparing them
+from streaks import PeriodBitset, RunIndex, period_ordinal, period_start # used for the streak statistics and duplicate checks
 
 class Habit:
     """
@@ -9,9 +12,24 @@ class Habit:
         _description (str): The description of the habit.
         _periodicity (str): The frequency of the habit ('daily' or 'weekly').
         _creation_date (datetime): The date and time the habit was created.
-        _completions (list): List of datetime objects representing when the habit was completed.
+        _completions (list): Sorted list of datetime objects representing when the habit was completed,
+            or None while the completions of a lazily loaded habit have not been fetched yet.
+        _periods (set): Period numbers (day or ISO week, see streaks.period_ordinal) of the completions.
+        _completion_source (callable): Returns an iterator over the completions of a lazily loaded habit.
+        _completion_count (int): Number of completions of a lazily loaded habit, known without fetching them.
+        _last_completion (datetime): Latest completion of a lazily loaded habit, known without fetching them.
+        _streak (int): Cached current streak, or None if it has to be recalculated.
+        _streak_broken (bool): True if the streak lapsed without a completion since, see break_streak().
+        _run_index (RunIndex): Cached run-length index of the completed periods, or None if not built yet.
+        _observers (tuple): Objects notified through habit_renamed(habit, old_name) when the habit is renamed
+            and through habit_completed(habit, completion_date) when a completion is added.
     """
 
+    # No per-instance __dict__, which keeps large numbers of habits small in memory
+    __slots__ = ("_name", "_description", "_periodicity", "_creation_date", "_completions", "_periods",
+                 "_completion_source", "_completion_count", "_last_completion", "_streak", "_streak_broken",
+                 "_run_index", "_observers")
+
     def __init__(self, name: str, description: str, periodicity: str):
         """
         Initializes a new habit.
@@ -25,7 +43,15 @@ class Habit:
         self._description = description
         self._periodicity = periodicity  # 'daily' or 'weekly'
         self._creation_date = datetime.now()
-        self._completions = []
+        self._completions = self._new_completion_store(())
+        self._periods = self._new_period_store()
+        self._completion_source = None
+        self._completion_count = 0
+        self._last_completion = None
+        self._streak = 0
+        self._streak_broken = False
+        self._run_index = None
+        self._observers = ()
 
     # Getter methods to access non-public attributes
     def get_name(self):
@@ -40,26 +66,178 @@ class Habit:
     def get_creation_date(self):
         return self._creation_date
 
+    def add_observer(self, observer):
+        """Register an object, such as a HabitTracker, to be notified when the habit is renamed or completed."""
+        self._observers += (observer,)
+
+    def remove_observer(self, observer):
+        """Stop notifying an object registered with add_observer."""
+        self._observers = tuple(registered for registered in self._observers if registered is not observer)
+
     def get_completions(self):
-        """Return the list of completion dates."""
+        """Return the list of completion dates in chronological order. The list must not be modified directly."""
+        self._ensure_completions()
         return self._completions
 
+    def iter_completions(self):
+        """Iterate over the completion dates in chronological order, fetching them page by page if not loaded yet."""
+        if self._completions is None:
+            return iter(self._completion_source())
+        return iter(self._completions)
+
+    def get_completion_count(self):
+        """Return the number of completions, without fetching the completions of a lazily loaded habit."""
+        if self._completions is None:
+            return self._completion_count
+        return len(self._completions)
+
+    def get_last_completion(self):
+        """Return the latest completion date, or None, without fetching the completions of a lazily loaded habit."""
+        if self._completions is None:
+            return self._last_completion
+        return self._completions[-1] if self._completions else None
+
+    def set_completions(self, completions):
+        """
+        Replaces all completion dates of the habit, e.g. when loading it from the database.
+
+        Args:
+            completions (iterable): The datetime objects of the completions, in any order.
+        """
+        self._completions = self._new_completion_store(sorted(completions))
+        self._periods = self._new_period_store()
+        self._completion_source = None
+        self._streak = None  # Recalculated on the next call to streak()
+        self._run_index = None  # Rebuilt on the next call to run_index()
+
+    def set_summary(self, completion_count, last_completion, streak, completion_source):
+        """
+        Loads the habit lazily: only summary values are kept, and the completions are fetched from the
+        completion source the first time they are needed.
+
+        Args:
+            completion_count (int): The number of completions.
+            last_completion (datetime): The latest completion, or None.
+            streak (int): The current streak, as calculated by streak().
+            completion_source (callable): Returns an iterator over the completion dates in chronological order.
+        """
+        self._completions = None
+        self._periods = None
+        self._completion_source = completion_source
+        self._completion_count = completion_count
+        self._last_completion = last_completion
+        self._streak = streak
+        self._run_index = None
+
+    @classmethod
+    def from_summary(cls, name, description, periodicity, creation_date, completion_count, last_completion,
+                     streak, completion_source):
+        """
+        Creates a lazily loaded habit directly from stored values, e.g. from a snapshot, without the work
+        of __init__ and set_summary.
+
+        Args:
+            name (str): The name of the habit.
+            description (str): The description of the habit.
+            periodicity (str): The frequency of the habit ('daily' or 'weekly').
+            creation_date (datetime): The date and time the habit was created.
+            completion_count (int): The number of completions.
+            last_completion (datetime): The latest completion, or None.
+            streak (int): The current streak, as calculated by streak().
+            completion_source (callable): Returns an iterator over the completion dates in chronological order.
+
+        Returns:
+            Habit: The lazily loaded habit.
+        """
+        habit = cls.__new__(cls)
+        habit._name = name
+        habit._description = description
+        habit._periodicity = periodicity
+        habit._creation_date = creation_date
+        habit._completions = None
+        habit._periods = None
+        habit._completion_source = completion_source
+        habit._completion_count = completion_count
+        habit._last_completion = last_completion
+        habit._streak = streak
+        habit._streak_broken = False
+        habit._run_index = None
+        habit._observers = ()
+        return habit
+
+    def _new_completion_store(self, completions):
+        """Create the container for the sorted completions; a list of datetime objects."""
+        return list(completions)
+
+    def _new_period_store(self):
+        """Create the container for the completed periods of the current completions; a set of period numbers."""
+        return {period_ordinal(completion, self._periodicity) for completion in self._completions}
+
+    def _ensure_completions(self):
+        """Fetch the completions of a lazily loaded habit, if that has not happened yet."""
+        if self._completions is None:
+            self.set_completions(self._completion_source())
+
+    def is_completed_in_period(self, completion_date: datetime):
+        """
+        Checks if the habit was already completed in the day or calendar week of the given date.
+
+        Args:
+            completion_date (datetime): The date to check.
+
+        Returns:
+            bool: True if there is a completion in the same period, False otherwise.
+        """
+        self._ensure_completions()
+        return period_ordinal(completion_date, self._periodicity) in self._periods
+
     def complete_habit(self, completion_date: datetime = None):
+        """
+        Marks the habit as complete, unless it was already completed in the same day or calendar week.
+
+        Args:
+            completion_date (datetime): The date of the completion, by default now.
+
+        Returns:
+            bool: True if the completion was added, False if it was a duplicate.
+        """
         if not completion_date:
             completion_date = datetime.now()
+        self._ensure_completions()
 
         # Avoid duplicate completions for the same day or calendar week
-        if self._completions:
-            last_completion = self._completions[-1]
-            if self._periodicity == 'daily' and last_completion.date() == completion_date.date():
-                print("Habit already completed today.")
-                return
-            elif self._periodicity == 'weekly' and last_completion.isocalendar()[1] == completion_date.isocalendar()[1]:
+        period = period_ordinal(completion_date, self._periodicity)
+        if period in self._periods:
+            if self._periodicity == 'weekly':
                 print("Habit already completed this week.")
-                return
+            else:
+                print("Habit already completed today.")
+            return False
+        self._periods.add(period)
 
-        # Add the completion date
-        self._completions.append(completion_date)
+        if self._run_index is not None:
+            self._run_index.add(period)
+
+        # Add the completion date, updating the cached streak if it is the latest completion
+        if not self._completions:
+            self._completions.append(completion_date)
+            self._streak = 1
+        elif completion_date >= self._completions[-1]:
+            last_completion = self._completions[-1]
+            self._completions.append(completion_date)
+            if self._streak is not None and completion_date != last_completion:
+                self._streak = self._streak + 1 if self._is_consecutive(last_completion, completion_date) else 1
+        else:
+            self._insert_completion(completion_date)
+            self._streak = None  # An earlier completion can join or split runs, recalculate on demand
+        self._streak_broken = False  # Observers such as a StreakExpiry break it again if it is still lapsed
+        for observer in self._observers:
+            observer.habit_completed(self, completion_date)
+        return True
+
+    def _insert_completion(self, completion_date):
+        """Insert a completion that is earlier than the latest one, keeping the completions in order."""
+        insort(self._completions, completion_date)
 
     def edit_habit(self, new_name, new_description):
         """
@@ -69,64 +247,324 @@ class Habit:
             new_name (str): The new name of the habit.
             new_description (str): The new description of the habit.
         """
+        old_name = self._name
         self._name = new_name
         self._description = new_description
+        if new_name != old_name:
+            for observer in self._observers:
+                observer.habit_renamed(self, old_name)
 
     def streak(self):
         """
-        Calculates the current streak of completing the habit.
+        Calculates the current streak of completing the habit: the number of consecutive days or calendar
+        weeks, up to the period of the latest completion, in which the habit was completed.
+
+        The streak is cached and updated incrementally when a new latest completion is added. Lazily loaded
+        habits return the streak loaded with their summary, without fetching the completions. A streak that
+        was broken with break_streak() is 0 until the next completion.
+
+        Returns:
+            int: The current streak of consecutive periods.
+        """
+        if self._streak_broken:
+            return 0
+        if self._streak is None:
+            self._ensure_completions()
+            self._streak = self._calculate_streak()
+        return self._streak
+
+    def break_streak(self):
+        """
+        Marks the current streak as lapsed because its day or week passed without a completion, e.g. by a
+        StreakExpiry. streak() then returns 0 until the habit is completed again.
+        """
+        self._streak_broken = True
+
+    def run_index(self):
+        """
+        Returns the run-length index of the periods in which the habit was completed.
+
+        The index is built on first use and then extended in place as completions are added.
 
         Returns:
-            int: The current streak of consecutive completions.
+            RunIndex: The run-length index of the completed periods.
         """
+        if self._run_index is None:
+            self._ensure_completions()
+            self._run_index = RunIndex.from_completions(self._completions, self._periodicity)
+        return self._run_index
+
+    def _calculate_streak(self):
+        """Calculates the current streak from scratch by walking back from the latest completion."""
         if not self._completions:
             return 0
 
-        sorted_completions = sorted(set(self._completions))  # Ensure unique and sorted entries
         current_streak = 1  # Start with the latest completion
 
-        # Start from the end of the list and move backwards
-        for i in range(len(sorted_completions) - 1, 0, -1):
-            current = sorted_completions[i]
-            previous = sorted_completions[i - 1]
-
-            # Handling daily streaks
-            if self._periodicity == 'daily':
-                if (current - previous).days == 1:
-                    current_streak += 1
-                else:
-                    break  # Stop counting if a day is missed
-
-            # Handling weekly streaks
-            elif self._periodicity == 'weekly':
-                current_week = current.isocalendar()[1]
-                previous_week = previous.isocalendar()[1]
-                current_year = current.isocalendar()[0]
-                previous_year = previous.isocalendar()[0]
-
-                # Checking if the calendar weeks are consecutive
-                if (current_year == previous_year and current_week == previous_week + 1) or (
-                        current_year == previous_year + 1 and current_week == 1 and previous_week in {52, 53}):
-                    current_streak += 1
-                else:
-                    break  # Stop counting if a week is missed
+        # Start from the end of the list and move backwards, skipping duplicate entries
+        current = self._completions[-1]
+        for i in range(len(self._completions) - 2, -1, -1):
+            previous = self._completions[i]
+            if previous == current:
+                continue
+            if self._is_consecutive(previous, current):
+                current_streak += 1
+                current = previous
+            else:
+                break  # Stop counting if a day or week is missed
 
         return current_streak
 
+    def _is_consecutive(self, previous, current):
+        """
+        Checks if two completions, in chronological order, belong to consecutive periods.
 
+        Args:
+            previous (datetime): The earlier completion.
+            current (datetime): The later completion.
+
+        Returns:
+            bool: True if the completions continue a streak, False otherwise.
+        """
+        # Consecutive calendar days or ISO weeks, whatever the time of day, as in RunIndex and the SQL backends
+        if self._periodicity in ('daily', 'weekly'):
+            return period_ordinal(current, self._periodicity) == period_ordinal(previous, self._periodicity) + 1
+
+        return False
 
 
+class CompletionArray:
+    """
+    Sorted sequence of completion dates stored as microseconds since the epoch in an array of 64-bit
+    integers, which takes 8 bytes per completion instead of a datetime object and a list pointer.
+
+    datetime objects are only created when items are accessed, so the sequence can be used wherever
+    the list of completions of a Habit is used.
+    """
 
+    __slots__ = ("_values",)
 
+    _EPOCH = datetime(1970, 1, 1)
+    _ONE_MICROSECOND = timedelta(microseconds=1)
 
+    def __init__(self, completions=()):
+        self._values = array('q', (self._encode(completion) for completion in completions))
 
+    @classmethod
+    def _encode(cls, completion):
+        return (completion - cls._EPOCH) // cls._ONE_MICROSECOND
 
+    @classmethod
+    def _decode(cls, value):
+        return cls._EPOCH + timedelta(0, 0, value)
 
+    def __len__(self):
+        return len(self._values)
 
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._decode(value) for value in self._values[index]]
+        return self._decode(self._values[index])
 
+    def __iter__(self):
+        return map(self._decode, self._values)
 
+    def __eq__(self, other):
+        if isinstance(other, CompletionArray):
+            return self._values == other._values
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
 
+    def __repr__(self):
+        return f"CompletionArray({list(self)!r})"
 
+    def append(self, completion):
+        self._values.append(self._encode(completion))
 
+    def insert(self, index, completion):
+        self._values.insert(index, self._encode(completion))
 
+    def bisect_left(self, completion):
+        """Return the position of the first completion at or after the given date."""
+        return bisect_left(self._values, self._encode(completion))
 
+    def insort(self, completion):
+        """Insert a completion in order, searching the integers without decoding them."""
+        insort(self._values, self._encode(completion))
+
+
+class _CompletionPeriods:
+    """
+    Period membership of the completions in a CompletionArray, answered with a binary search on the
+    sorted completions instead of keeping a set with one entry per completion.
+    """
+
+    __slots__ = ("_completions", "_periodicity")
+
+    def __init__(self, completions, periodicity):
+        self._completions = completions
+        self._periodicity = periodicity
+
+    def __contains__(self, period):
+        i = self._completions.bisect_left(period_start(period, self._periodicity))
+        return i < len(self._completions) and period_ordinal(self._completions[i], self._periodicity) == period
+
+    def add(self, period):
+        pass  # The completion itself is added to the CompletionArray
+
+
+class CompactHabit(Habit):
+    """
+    Habit that stores its completions compactly for large numbers of habits and completions.
+
+    The completions are kept in a CompletionArray of 64-bit integers and duplicate periods are found by
+    binary search instead of a set. The public API and all results are the same as those of Habit.
+    """
+
+    __slots__ = ()
+
+    def _new_completion_store(self, completions):
+        return CompletionArray(completions)
+
+    def _new_period_store(self):
+        return _CompletionPeriods(self._completions, self._periodicity)
+
+    def _insert_completion(self, completion_date):
+        self._completions.insort(completion_date)
+
+
+class CompletionCalendar:
+    """
+    Sorted sequence of completion days stored as a PeriodBitset with one bit per day, which takes an eighth
+    of a byte per day of the habit's history instead of a datetime object per completion.
+
+    The completions are kept at day granularity: the items are the completion days at midnight. For weekly
+    habits the completed calendar weeks are kept in a second bitset, for the duplicate checks and streaks.
+
+    Attributes:
+        days (PeriodBitset): The completed days, numbered as date.toordinal().
+        periods (PeriodBitset): The completed periods (see streaks.period_ordinal); the same bitset as days
+            for daily habits.
+    """
+
+    __slots__ = ("days", "periods", "_periodicity")
+
+    def __init__(self, completions=(), periodicity='daily', first_day=None):
+        """
+        Args:
+            completions (iterable): The datetime objects of the completions.
+            periodicity (str): The frequency of the habit ('daily' or 'weekly').
+            first_day (int): The day of bit 0, e.g. that of the creation date.
+        """
+        self.days = PeriodBitset((completion.toordinal() for completion in completions), first_day)
+        self._periodicity = periodicity
+        self.periods = self._periods_of(self.days, periodicity)
+
+    @classmethod
+    def from_days(cls, days, periodicity):
+        """Create the calendar from a PeriodBitset of completed days, e.g. as loaded from the database."""
+        calendar = cls.__new__(cls)
+        calendar.days = days
+        calendar._periodicity = periodicity
+        calendar.periods = cls._periods_of(days, periodicity)
+        return calendar
+
+    @staticmethod
+    def _periods_of(days, periodicity):
+        if periodicity == 'weekly':
+            return PeriodBitset((day - 1) // 7 for day in days)  # As period_ordinal
+        return days
+
+    def __len__(self):
+        return self.days.count()
+
+    def __getitem__(self, index):
+        if index == -1 and self.days.bits:
+            return datetime.fromordinal(self.days.last_period())  # The latest completion, without a scan
+        return list(self)[index]
+
+    def __iter__(self):
+        return map(datetime.fromordinal, self.days)
+
+    def __eq__(self, other):
+        if isinstance(other, CompletionCalendar):
+            return self.days.first_period == other.days.first_period and self.days.bits == other.days.bits
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return f"CompletionCalendar({list(self)!r})"
+
+    def append(self, completion):
+        self.days.add(completion.toordinal())
+        if self.periods is not self.days:
+            self.periods.add(period_ordinal(completion, self._periodicity))
+
+    def insert(self, index, completion):
+        self.append(completion)  # The bits are ordered by themselves
+
+    def insort(self, completion):
+        """Insert a completion in order by setting its bits, without listing the other completions."""
+        self.append(completion)
+
+
+class _CalendarPeriods:
+    """Period membership of the completions in a CompletionCalendar, answered from its bitset of periods."""
+
+    __slots__ = ("_calendar",)
+
+    def __init__(self, calendar):
+        self._calendar = calendar
+
+    def __contains__(self, period):
+        return period in self._calendar.periods
+
+    def add(self, period):
+        pass  # The completion itself is added to the CompletionCalendar
+
+
+class CalendarHabit(Habit):
+    """
+    Habit that stores its completions as a bitset of completed days, see CompletionCalendar.
+
+    The completions keep only their day: get_completions returns the completion days at midnight. The
+    current streak, the run statistics used by analyse.py (run_index returns the bitset of completed
+    periods, which answers the same queries as a RunIndex) and the duplicate checks are bit operations.
+    """
+
+    __slots__ = ()
+
+    def _new_completion_store(self, completions):
+        return CompletionCalendar(completions, self._periodicity, self._creation_date.toordinal())
+
+    def _new_period_store(self):
+        return _CalendarPeriods(self._completions)
+
+    def _insert_completion(self, completion_date):
+        self._completions.insort(completion_date)
+
+    def set_completion_days(self, days):
+        """
+        Replaces all completions of the habit with the days of a bitset, e.g. when loading it from the database.
+
+        Args:
+            days (PeriodBitset): The completed days, numbered as date.toordinal().
+        """
+        self._completions = CompletionCalendar.from_days(days, self._periodicity)
+        self._periods = self._new_period_store()
+        self._completion_source = None
+        self._streak = None
+        self._run_index = None
+
+    def run_index(self):
+        """Return the PeriodBitset of the completed periods, which is updated in place as completions are added."""
+        self._ensure_completions()
+        return self._completions.periods
+
+    def _calculate_streak(self):
+        """Calculates the current streak as the latest run of one bits."""
+        return self._completions.periods.current_run()
@@ -1,9 +1,31 @@
 class HabitTracker:
-    """Class to manage a collection of habits."""
+    """
+    Class to manage a collection of habits.
 
-    def __init__(self):
-        """Initialize a new HabitTracker with an empty list of habits."""
-        self.habits = []
+    Habits are indexed by their case-folded name and by periodicity, so lookups and deletes take
+    constant time and periodicity listings take time proportional to the number of results.
+    An optional Leaderboard and an optional StreakExpiry are kept up to date as habits are added, completed
+    and deleted.
+    """
+
+    def __init__(self, leaderboard=None, expiry=None):
+        """
+        Initialize a new HabitTracker with no habits.
+
+        Args:
+            leaderboard (Leaderboard): A leaderboard to rank the tracked habits on, by default none.
+            expiry (StreakExpiry): A scheduler that breaks the streaks of the tracked habits when they lapse,
+                see advance_clock; by default none.
+        """
+        self._habits_by_name = {}  # Case-folded name -> Habit, in insertion order
+        self._habits_by_periodicity = {}  # Periodicity -> {case-folded name: Habit}, used as an ordered set
+        self.leaderboard = leaderboard
+        self.expiry = expiry
+
+    @property
+    def habits(self):
+        """list: All tracked habits, in the order they were added."""
+        return list(self._habits_by_name.values())
 
     def add_habit(self, habit):
         """
@@ -11,39 +33,110 @@ class HabitTracker:
 
         Args:
             habit (Habit): The habit to be added.
+
+        Raises:
+            ValueError: If a habit with the same name, ignoring case, is already tracked.
         """
-        self.habits.append(habit)
+        key = habit.get_name().casefold()
+        if key in self._habits_by_name:
+            raise ValueError(f"Habit '{habit.get_name()}' already exists.")
+        self._habits_by_name[key] = habit
+        self._habits_by_periodicity.setdefault(habit.get_periodicity(), {})[key] = habit
+        habit.add_observer(self)
+        if self.expiry is not None:
+            self.expiry.track(habit)  # First, so that a lapsed streak is ranked as broken
+        if self.leaderboard is not None:
+            self.leaderboard.add(habit)
 
     def delete_habit(self, habit_name):
         """
-        Delete a habit by its name.
+        Delete a habit by its name, ignoring case.
 
         Args:
             habit_name (str): The name of the habit to be deleted.
         """
-        # Use a list comprehension to filter out the habit with the specified name
-        self.habits = [habit for habit in self.habits if habit.get_name() != habit_name]
+        key = habit_name.casefold()
+        habit = self._habits_by_name.pop(key, None)
+        if habit is not None:
+            del self._habits_by_periodicity[habit.get_periodicity()][key]
+            habit.remove_observer(self)
+            if self.expiry is not None:
+                self.expiry.untrack(habit)
+            if self.leaderboard is not None:
+                self.leaderboard.remove(habit)
 
     def get_habit(self, name: str):
         """
         Retrieve a habit by its name.
 
         Args:
-            name (str): The name of the habit to retrieve.
+            name (str): The name of the habit to retrieve, in any case.
 
         Returns:
             Habit: The habit with the specified name, or None if not found.
         """
-        # Convert both the stored habit names and input name to lowercase for comparison
-        name_lower = name.lower()
-        for habit in self.habits:
-            if habit.get_name().lower() == name_lower:  # Case-insensitive comparison
-                return habit
-        return None
+        return self._habits_by_name.get(name.casefold())
 
+    def get_habits_by_periodicity(self, periodicity):
+        """
+        Retrieve all habits with the given periodicity.
 
+        Args:
+            periodicity (str): The periodicity to filter habits by ('daily' or 'weekly').
 
+        Returns:
+            list: The habits with the given periodicity, in the order they were added.
+        """
+        return list(self._habits_by_periodicity.get(periodicity, {}).values())
 
+    def habit_renamed(self, habit, old_name):
+        """
+        Update the name index after a tracked habit was renamed with Habit.edit_habit.
 
+        Args:
+            habit (Habit): The renamed habit.
+            old_name (str): The name of the habit before the rename.
+        """
+        old_key = old_name.casefold()
+        new_key = habit.get_name().casefold()
+        if old_key == new_key:
+            return
+        del self._habits_by_name[old_key]
+        self._habits_by_name[new_key] = habit
+        habits_with_periodicity = self._habits_by_periodicity[habit.get_periodicity()]
+        del habits_with_periodicity[old_key]
+        habits_with_periodicity[new_key] = habit
+
+    def habit_completed(self, habit, completion_date):
+        """
+        Reschedule the streak deadline and re-rank a tracked habit after a completion was added with
+        Habit.complete_habit.
+
+        Args:
+            habit (Habit): The completed habit.
+            completion_date (datetime): The date of the added completion.
+        """
+        if self.expiry is not None:
+            self.expiry.completed(habit, completion_date)
+        if self.leaderboard is not None:
+            self.leaderboard.completed(habit, completion_date)
 
+    def advance_clock(self, now=None):
+        """
+        Break the streaks of the tracked habits that lapsed by now, also on the leaderboard.
+
+        Only the habits whose deadline passed are touched, so this is cheap enough to call before every view.
+
+        Args:
+            now (datetime): The current time, by default now.
 
+        Returns:
+            list: The habits whose streaks were broken.
+        """
+        if self.expiry is None:
+            return []
+        expired = self.expiry.advance(now)
+        if self.leaderboard is not None:
+            for habit in expired:
+                self.leaderboard.break_streak(habit)
+        return expired
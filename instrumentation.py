@@ -0,0 +1,270 @@
+"""
+Opt-in performance instrumentation of the database, tracker, habit and analysis hot paths.
+
+While enabled, every instrumented operation records its number of calls, cumulative time, p50 and p99
+latency, and the SQL statements it ran and the rows it fetched, including those of the instrumented
+operations it calls. The figures are available through stats(), can be logged periodically with
+start_log_dump(), and are shown by the "Show Performance Stats" menu action of main.py.
+
+Disabled instrumentation costs nothing: enable() replaces the instrumented methods and functions with
+timing wrappers and disable() puts the originals back. Statements and rows are counted by the connections
+that the Database opens while instrumentation is enabled. Functions of analyse.py are instrumented through
+their module attribute, so calls through names imported with "from analyse import ..." before enable()
+are not counted.
+
+Example:
+    instrumentation.enable()
+    ...
+    for name, operation in instrumentation.stats().items():
+        print(name, operation['calls'], operation['p99_ms'])
+"""
+import functools
+import importlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# Environment variable that enables the instrumentation in main.py when set to a true value such as "1"
+PROFILE_ENV_VAR = "HABIT_TRACKER_PROFILE"
+
+# Module, class (None for module functions) and attribute names of the instrumented operations
+TARGETS = [
+    ("db", "Database", ["habit_exists", "get_habit_id", "save_habit", "save_completion", "save_completions_many",
+                        "update_habit", "delete_habit", "load_habits", "load_habit_objects",
+                        "load_completion_summaries", "load_completion_bitsets", "load_stats", "load_longest_streak",
+                        "load_rollups", "load_rollup_totals", "load_all_completions", "load_completions"]),
+    ("habit_tracker", "HabitTracker", ["add_habit", "delete_habit", "get_habit", "get_habits_by_periodicity"]),
+    ("habit", "Habit", ["complete_habit", "streak", "run_index"]),
+    ("analyse", None, ["list_all_habits", "list_habits_by_periodicity", "longest_streak_all_habits",
+                       "longest_streak_for_habit", "longest_ever_streak_for_habit",
+                       "longest_ever_streak_all_habits", "streak_summary"]),
+]
+
+MAX_SAMPLES = 10000  # Latency samples kept per operation for the percentiles, the most recent ones
+
+logger = logging.getLogger("habit_tracker.performance")
+
+_enabled = False
+_originals = {}  # (owner, attribute name) -> original function, while enabled
+_operations = {}  # Operation name -> _Operation
+_lock = threading.Lock()
+_local = threading.local()  # .stack: counters of the operations running in the thread, innermost last
+_dump_stop = None  # Event that stops the periodic log dump
+
+
+class _Operation:
+    """Accumulated measurements of one instrumented operation."""
+
+    __slots__ = ("calls", "total", "samples", "statements", "rows")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=MAX_SAMPLES)
+        self.statements = 0
+        self.rows = 0
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _count(statements, rows):
+    """Add statements and fetched rows to all operations running in the current thread."""
+    for counters in _stack():
+        counters[0] += statements
+        counters[1] += rows
+
+
+def _record(name, elapsed, counters):
+    with _lock:
+        operation = _operations.get(name)
+        if operation is None:
+            operation = _operations[name] = _Operation()
+        operation.calls += 1
+        operation.total += elapsed
+        operation.samples.append(elapsed)
+        operation.statements += counters[0]
+        operation.rows += counters[1]
+
+
+def _instrument(name, function):
+    """Wrap a function so that its calls are timed and attributed to the operation name."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        stack = _stack()
+        counters = [0, 0]  # Statements, rows
+        stack.append(counters)
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            _record(name, elapsed, counters)
+    return wrapper
+
+
+class CountingCursor(sqlite3.Cursor):
+    """Cursor that counts the statements it executes and the rows it fetches."""
+
+    def execute(self, sql, parameters=()):
+        _count(1, 0)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        def counted(parameters):
+            for row in parameters:
+                _count(1, 0)
+                yield row
+        return super().executemany(sql, counted(seq_of_parameters))
+
+    def __next__(self):
+        row = super().__next__()
+        _count(0, 1)
+        return row
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _count(0, 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        _count(0, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        _count(0, len(rows))
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    """Connection whose cursors, including those of the execute shortcuts, are CountingCursors."""
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    """Return the connection class for new database connections: counting ones while enabled."""
+    return CountingConnection if _enabled else sqlite3.Connection
+
+
+def is_enabled():
+    """Return True if the instrumentation is enabled."""
+    return _enabled
+
+
+def enable():
+    """Start instrumenting the TARGETS; measurements recorded before are kept."""
+    global _enabled
+    with _lock:
+        if _enabled:
+            return
+        for module_name, class_name, attributes in TARGETS:
+            module = importlib.import_module(module_name)
+            owner = getattr(module, class_name) if class_name else module
+            prefix = f"{class_name or module_name}."
+            for attribute in attributes:
+                original = owner.__dict__[attribute]
+                _originals[(owner, attribute)] = original
+                setattr(owner, attribute, _instrument(prefix + attribute, original))
+        _enabled = True
+
+
+def disable():
+    """Stop instrumenting and restore the original methods and functions."""
+    global _enabled
+    with _lock:
+        for (owner, attribute), original in _originals.items():
+            setattr(owner, attribute, original)
+        _originals.clear()
+        _enabled = False
+
+
+def reset():
+    """Discard all measurements."""
+    with _lock:
+        _operations.clear()
+
+
+def _percentile(sorted_samples, fraction):
+    return sorted_samples[min(int(len(sorted_samples) * fraction), len(sorted_samples) - 1)]
+
+
+def stats():
+    """
+    Returns the measurements of all operations that were called while instrumented.
+
+    Returns:
+        dict: Operation name, e.g. 'Database.load_stats', to a dictionary with its calls, total_ms, p50_ms,
+            p99_ms (over the most recent MAX_SAMPLES calls), statements and rows.
+    """
+    with _lock:
+        snapshot = {name: (operation.calls, operation.total, sorted(operation.samples), operation.statements,
+                           operation.rows)
+                    for name, operation in _operations.items()}
+    return {name: {'calls': calls,
+                   'total_ms': total * 1000,
+                   'p50_ms': _percentile(samples, 0.5) * 1000,
+                   'p99_ms': _percentile(samples, 0.99) * 1000,
+                   'statements': statements,
+                   'rows': rows}
+            for name, (calls, total, samples, statements, rows) in sorted(snapshot.items())}
+
+
+def format_stats():
+    """Return the measurements as a table, slowest operations (by cumulative time) first."""
+    lines = [f"{'operation':<40} {'calls':>8} {'total ms':>10} {'p50 ms':>9} {'p99 ms':>9} "
+             f"{'statements':>10} {'rows':>10}"]
+    for name, operation in sorted(stats().items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(f"{name:<40} {operation['calls']:>8} {operation['total_ms']:>10.2f} "
+                     f"{operation['p50_ms']:>9.3f} {operation['p99_ms']:>9.3f} "
+                     f"{operation['statements']:>10} {operation['rows']:>10}")
+    return "\n".join(lines)
+
+
+def start_log_dump(interval=60.0):
+    """
+    Log the measurements at INFO level every interval seconds, on a daemon thread, until stop_log_dump().
+
+    Args:
+        interval (float): The number of seconds between two dumps.
+    """
+    global _dump_stop
+    stop_log_dump()
+    stop = _dump_stop = threading.Event()
+
+    def dump():
+        while not stop.wait(interval):
+            logger.info("Performance stats:\n%s", format_stats())
+
+    threading.Thread(target=dump, name="performance-log-dump", daemon=True).start()
+
+
+def stop_log_dump():
+    """Stop the periodic log dump, if it is running."""
+    global _dump_stop
+    if _dump_stop is not None:
+        _dump_stop.set()
+        _dump_stop = None
+
+
+def profiling_requested():
+    """Check if the profile environment variable is set to a true value."""
+    return os.environ.get(PROFILE_ENV_VAR, "0").strip().lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,213 @@
+"""
+Leaderboards of the habits with the longest current and best streaks.
+
+A Leaderboard keeps the habits ranked instead of recalculating every streak for each query: it is updated
+when a habit is added, completed or removed, so the top-k habits, the rank of a habit and the leaderboards
+of daily or weekly habits only take binary searches and slices (see Leaderboard for the cost of updates). A HabitTracker created with a Leaderboard
+keeps it up to date through its adds, deletes and the completions of its habits.
+"""
+from bisect import bisect_left, insort # used for keeping the rankings sorted
+from analyse import longest_ever_streak_for_habit
+
+RANKINGS = ("current", "best")
+
+
+class Leaderboard:
+    """
+    Ranking of habits by current streak and by best-ever streak.
+
+    Habits are ranked by descending streak, and habits with the same streak in the order they were added.
+    Every ranking is a sorted list of (-streak, sequence number) keys, one list for all habits and one per
+    periodicity; the current streak is Habit.streak() and the best streak the longest run of consecutive
+    periods (see analyse.longest_ever_streak_for_habit), never shorter than the current streak.
+
+    Best streaks that were not given when a habit was added are calculated on the first query of the best
+    ranking, so that ranking lazily loaded habits by current streak does not fetch their completions.
+
+    Costs: queries take a binary search and a slice. An update finds its position by binary search, but
+    inserting into or deleting from a Python list shifts the keys after it, so adding, completing or removing
+    a habit is O(n) in the number of ranked habits; that shift is a memmove of pointers, which is cheaper
+    than a balanced tree up to many thousands of habits. The first query of the best ranking calculates every
+    pending best streak at once, which fetches the full history of every lazily loaded habit added since the
+    previous such query; streaks() only calculates the best streak of the one habit.
+    """
+
+    def __init__(self, habits=()):
+        """
+        Initialize the leaderboard.
+
+        Args:
+            habits (iterable): Habit objects to rank.
+        """
+        self._entries = {}  # Habit -> [sequence number, current streak, best streak or None until calculated]
+        self._habits = {}  # Sequence number -> Habit
+        self._pending_best = {}  # Habits whose best streak is not calculated yet, used as an ordered set
+        self._rankings = {ranking: {None: []} for ranking in RANKINGS}  # Ranking -> periodicity -> keys
+        self._next_sequence = 0
+        for habit in habits:
+            self.add(habit)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, habit):
+        return habit in self._entries
+
+    def _keys(self, ranking, periodicity):
+        """Return the sorted keys of a ranking, of all habits or of those with a periodicity."""
+        if ranking not in self._rankings:
+            raise ValueError(f"Unknown ranking '{ranking}', expected one of {RANKINGS}.")
+        return self._rankings[ranking].get(periodicity, [])
+
+    def _insert(self, habit, entry):
+        sequence, current, best = entry
+        for ranking, streak in (("current", current), ("best", best)):
+            if streak is None:
+                continue  # Ranked once it is calculated
+            for periodicity in (None, habit.get_periodicity()):
+                insort(self._rankings[ranking].setdefault(periodicity, []), (-streak, sequence))
+
+    def _remove(self, habit, entry):
+        sequence, current, best = entry
+        for ranking, streak in (("current", current), ("best", best)):
+            if streak is None:
+                continue
+            for periodicity in (None, habit.get_periodicity()):
+                keys = self._rankings[ranking][periodicity]
+                del keys[bisect_left(keys, (-streak, sequence))]
+
+    def _calculate_best(self, habit):
+        """Calculate and rank the best streak of a habit whose best streak is pending."""
+        del self._pending_best[habit]
+        entry = self._entries[habit]
+        entry[2] = max(longest_ever_streak_for_habit(habit), entry[1])
+        for periodicity in (None, habit.get_periodicity()):
+            insort(self._rankings["best"].setdefault(periodicity, []), (-entry[2], entry[0]))
+
+    def _calculate_pending(self):
+        """Calculate the pending best streaks, before the best ranking is queried."""
+        for habit in list(self._pending_best):
+            self._calculate_best(habit)
+
+    def add(self, habit, current=None, best=None):
+        """
+        Add a habit to the leaderboard.
+
+        Args:
+            habit (Habit): The habit to rank.
+            current (int): Its current streak, by default calculated with Habit.streak().
+            best (int): Its best streak, by default calculated from its completions when the best ranking is
+                first queried.
+
+        Raises:
+            ValueError: If the habit is already ranked.
+        """
+        if habit in self._entries:
+            raise ValueError(f"Habit '{habit.get_name()}' is already ranked.")
+        current = habit.streak() if current is None else current
+        entry = [self._next_sequence, current, None if best is None else max(best, current)]
+        if best is None:
+            self._pending_best[habit] = None
+        self._next_sequence += 1
+        self._entries[habit] = entry
+        self._habits[entry[0]] = habit
+        self._insert(habit, entry)
+
+    def remove(self, habit):
+        """Remove a habit from the leaderboard, if it is ranked."""
+        entry = self._entries.pop(habit, None)
+        self._pending_best.pop(habit, None)
+        if entry is not None:
+            del self._habits[entry[0]]
+            self._remove(habit, entry)
+
+    def update(self, habit, current=None, best=None):
+        """
+        Re-rank a habit after its streaks changed, e.g. after a completion.
+
+        Args:
+            habit (Habit): The ranked habit.
+            current (int): Its new current streak, by default calculated with Habit.streak().
+            best (int): Its new best streak, by default calculated from its completions, or left pending if
+                it was not calculated yet.
+        """
+        entry = self._entries[habit]
+        current = habit.streak() if current is None else current
+        if best is not None:
+            self._pending_best.pop(habit, None)
+        elif habit not in self._pending_best:
+            best = longest_ever_streak_for_habit(habit)
+        if best is not None:
+            best = max(best, current)
+        if (current, best) != (entry[1], entry[2]):
+            self._remove(habit, entry)
+            entry[1], entry[2] = current, best
+            self._insert(habit, entry)
+
+    def completed(self, habit, completion_date):
+        """
+        Re-rank a habit after a completion was added.
+
+        A new latest completion can only extend the latest run, which is the current streak, so the best
+        streak is updated from the current streak alone; an earlier completion can join runs anywhere in the
+        history, which recalculates it.
+
+        Args:
+            habit (Habit): The ranked habit.
+            completion_date (datetime): The date of the added completion.
+        """
+        current = habit.streak()
+        best = self._entries[habit][2]
+        if best is not None and completion_date != habit.get_last_completion():
+            best = None
+        self.update(habit, current, best)
+
+    def break_streak(self, habit):
+        """Set the current streak of a habit to 0, e.g. when a period passed without a completion."""
+        self.update(habit, current=0, best=self._entries[habit][2])
+
+    def streaks(self, habit):
+        """Return the current and best streak of a ranked habit, as ranked."""
+        if habit in self._pending_best:
+            self._calculate_best(habit)
+        _, current, best = self._entries[habit]
+        return current, best
+
+    def top(self, k=10, by="current", periodicity=None):
+        """
+        Returns the habits with the longest streaks.
+
+        Args:
+            k (int): The maximum number of habits to return.
+            by (str): The ranking, 'current' or 'best' streak.
+            periodicity (str): Only rank the habits with this periodicity ('daily' or 'weekly'), by default all.
+
+        Returns:
+            list: (Habit, streak) pairs, longest streak first.
+
+        Raises:
+            ValueError: If the ranking is unknown.
+        """
+        if by == "best":
+            self._calculate_pending()
+        return [(self._habits[sequence], -streak) for streak, sequence in self._keys(by, periodicity)[:k]]
+
+    def rank(self, habit, by="current", periodicity=None):
+        """
+        Returns the position of a habit on the leaderboard.
+
+        Args:
+            habit (Habit): The ranked habit.
+            by (str): The ranking, 'current' or 'best' streak.
+            periodicity (str): Rank among the habits with this periodicity, by default among all habits.
+
+        Returns:
+            int: The rank, starting at 1 for the longest streak, or None if the habit is not ranked there.
+        """
+        entry = self._entries.get(habit)
+        if entry is None or periodicity not in (None, habit.get_periodicity()):
+            return None
+        if by == "best":
+            self._calculate_pending()
+        streak = entry[1] if by == "current" else entry[2]
+        return bisect_left(self._keys(by, periodicity), (-streak, entry[0])) + 1
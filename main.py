@@ -1,28 +1,57 @@
-import questionary
-from habit_tracker import HabitTracker
+import logging
+import sys
+import instrumentation
 from habit import Habit
+from habit_tracker import HabitTracker
 from db import Database, initialize_predefined_habits
+from leaderboard import Leaderboard
+from snapshot import load_tracker, write_snapshot
+from streak_expiry import StreakExpiry
 from datetime import datetime
-from analyse import list_habits_by_periodicity, longest_streak_all_habits
 
-# Create HabitTracker and Database instances
-tracker = HabitTracker()
-db = Database()
 
-# Initialize predefined habits
-initialize_predefined_habits(db)
+def main(argv=None):
+    """
+    Entry point: runs a command-line subcommand if arguments are given (see cli.py), otherwise the
+    interactive menu.
+
+    Args:
+        argv (list): The command-line arguments, by default sys.argv[1:].
+
+    Returns:
+        int: The exit status.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        import cli  # Only needed for the non-interactive mode
+        return cli.run(argv)
+
+    # Opt-in performance instrumentation, enabled before the database connections are opened
+    if instrumentation.profiling_requested():
+        logging.basicConfig(level=logging.INFO)
+        instrumentation.enable()
+        instrumentation.start_log_dump()
+
+    # Create the Database instance
+    db = Database()
+
+    # Initialize predefined habits
+    initialize_predefined_habits(db)
+
+    # Load existing habits from the snapshot file, or from the database if the snapshot is out of date
+    # Completion histories are only fetched when a menu action needs them; streaks that lapsed are broken,
+    # and the leaderboard keeps the habits ranked by their current streaks
+    tracker = load_tracker(db, tracker=HabitTracker(Leaderboard(), StreakExpiry()))
 
-# Load existing habits from the database on startup
-for habit_data in db.load_habits():
-    loaded_habit = Habit(habit_data['name'], habit_data['description'], habit_data['periodicity'])
-    loaded_habit._creation_date = datetime.strptime(habit_data['creation_date'], "%Y-%m-%d %H:%M:%S.%f")
-    loaded_habit._completions = habit_data['completions']
-    tracker.add_habit(loaded_habit)
+    interactive_menu(tracker, db)
+    return 0
 
 
-def main():
+def interactive_menu(tracker, db):
     """Main function to handle the habit tracker operations, interaction with main menu."""
+    import questionary  # Imported here, so that the non-interactive mode works without it
     while True:
+        tracker.advance_clock()  # Break the streaks that lapsed since the last action
         action = questionary.select(
             "What would you like to do?",
             choices=[
@@ -35,7 +64,7 @@ def main():
                 "View Habits by Periodicity",
                 "View Habit with Longest Streak",
                 "Exit"
-            ]
+            ] + (["Show Performance Stats"] if instrumentation.is_enabled() else [])  # Only while profiling
         ).ask()
 
         if action == "Add Habit":
@@ -86,9 +115,14 @@ def main():
                 print(f"Periodicity: {habit_to_view.get_periodicity()}")
                 print(f"Creation Date: {habit_to_view.get_creation_date().strftime('%Y-%m-%d %H:%M:%S')}")
                 print(f"Streak: {habit_to_view.streak() or 0}")
-                completions_list = habit_to_view.get_completions()
-                if completions_list:
-                    print(f"Completions: {', '.join(str(completion) for completion in completions_list)}")
+                if habit_to_view.get_completion_count():
+                    # Stream the completions instead of building one string of the whole history
+                    print("Completions: ", end="")
+                    separator = ""
+                    for completion in habit_to_view.iter_completions():
+                        print(f"{separator}{completion}", end="")
+                        separator = ", "
+                    print()
                 else:
                     print("Completions: 0")
             else:
@@ -110,85 +144,70 @@ def main():
             habit_to_complete = tracker.get_habit(name.lower())
             if habit_to_complete:
                 now = datetime.now()
-                # Check for duplicate completion
-                habit_periodicity = habit_to_complete.get_periodicity()
-                if habit_periodicity == "daily":
-                    for completion in habit_to_complete.get_completions():
-                        if completion.date() == now.date():
-                            print(
-                                f"Cannot mark '{name.title()}' as complete. It has already been marked complete today.")
-                            break
-                    else:
-                        habit_to_complete.complete_habit()
-                        habit_id = db.get_habit_id(name)
-                        db.save_completion(habit_id, now)
-                        print(f"Marked '{name.title()}' as complete.")
-                        print(
-                            f"Completions for '{name.title()}': {', '.join(str(completion) for completion in habit_to_complete.get_completions())}")
-
-                elif habit_periodicity == "weekly":
-                    current_week = now.isocalendar()[1]
-                    current_year = now.isocalendar()[0]
-                    for completion in habit_to_complete.get_completions():
-                        comp_week = completion.isocalendar()[1]
-                        comp_year = completion.isocalendar()[0]
-                        if comp_week == current_week and comp_year == current_year:
-                            print(
-                                f"Cannot mark '{name.title()}' as complete. It has already been marked complete this week.")
-                            break
-                    else:
-                        habit_to_complete.complete_habit()
-                        habit_id = db.get_habit_id(name)
-                        db.save_completion(habit_id, now)
-                        print(f"Marked '{name.title()}' as complete.")
-                        print(
-                            f"Completions for '{name.title()}': {', '.join(str(completion) for completion in habit_to_complete.get_completions())}")
-
+                # complete_habit rejects a second completion in the same day or calendar week
+                if habit_to_complete.complete_habit(now):
+                    habit_id = db.get_habit_id(name)
+                    db.save_completion(habit_id, now)
+                    print(f"Marked '{name.title()}' as complete.")
+                    print(
+                        f"Completions for '{name.title()}': {', '.join(str(completion) for completion in habit_to_complete.get_completions())}")
+                else:
+                    print(f"Cannot mark '{name.title()}' as complete.")
             else:
                 print("Habit not found.")
 
         elif action == "View All Habits":
-            all_habits = tracker.habits
+            # Answered from the materialized habit statistics, without loading any completions
+            all_habits = db.load_stats()
             if not all_habits:
                 print("No habits found.")
             else:
                 print("\nAll Habits:")
                 for habit in all_habits:
+                    # The tracked habit knows whether the streak has lapsed since the statistics were stored
+                    tracked_habit = tracker.get_habit(habit['name'])
+                    streak = tracked_habit.streak() if tracked_habit else habit['current_streak']
                     # Get the latest completion date
-                    completions = habit.get_completions()
-                    if completions:
-                        latest_completion = max(completions)
+                    latest_completion = habit['last_completion']
+                    if latest_completion:
                         latest_completion_str = latest_completion.strftime("%Y-%m-%d %H:%M:%S")
                     else:
                         latest_completion_str = "No completions yet"
 
-                    print(f"- Habit: {habit.get_name()}")
-                    print(f"  Description: {habit.get_description()}")
-                    print(f"  Periodicity: {habit.get_periodicity().capitalize()}")
-                    print(f"  Creation Date: {habit.get_creation_date().strftime('%Y-%m-%d %H:%M:%S')}")
-                    print(f"  Streak: {habit.streak() or 0} consecutive completions")
+                    print(f"- Habit: {habit['name']}")
+                    print(f"  Description: {habit['description']}")
+                    print(f"  Periodicity: {habit['periodicity'].capitalize()}")
+                    print(f"  Creation Date: {habit['creation_date'].strftime('%Y-%m-%d %H:%M:%S')}")
+                    print(f"  Streak: {streak} consecutive completions")
                     print(f"  Latest Completion: {latest_completion_str}\n")
 
         elif action == "View Habits by Periodicity":
             periodicity = questionary.select("Choose periodicity to view:", choices=["daily", "weekly"]).ask()
-            habits_by_period = list_habits_by_periodicity(tracker.habits, periodicity)
+            habits_by_period = tracker.get_habits_by_periodicity(periodicity)
             habit_names = [habit.get_name() for habit in habits_by_period]
             print(f"\n{periodicity.capitalize()} Habits:", ", ".join(habit_names))
 
         elif action == "View Habit with Longest Streak":
-            longest_streak_habit = longest_streak_all_habits(tracker.habits)
-            if longest_streak_habit:
-                print(
-                    f"\nThe habit with the longest streak is '{longest_streak_habit.get_name().title()}' with a streak of {longest_streak_habit.streak() or 0}")
+            # The leaderboard is kept up to date by completions and by advance_clock, so nothing is recalculated
+            top = tracker.leaderboard.top(1)
+            if top:
+                longest_streak_habit, streak = top[0]
+                print(f"\nThe habit with the longest streak is '{longest_streak_habit.get_name().title()}' "
+                      f"with a streak of {streak}")
             else:
                 print("No habits found.")
 
+        elif action == "Show Performance Stats":
+            print("\n" + instrumentation.format_stats())
+
         elif action == "Exit":
+            write_snapshot(db)  # So that the next start can use the snapshot despite the changes of this session
+            db.close()
             break
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
 
 
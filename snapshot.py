@@ -0,0 +1,107 @@
+"""
+Snapshot cache of the tracker state for a fast startup.
+
+The snapshot is a pickle file next to the database file that holds the habits together with their summary
+statistics (see Database.load_stats) as plain tuples, and the version token of the database
+(Database.get_version_token) at the time it was written. Loading a fresh snapshot takes a single read of
+the file; the completion histories are fetched lazily from the database, as with
+Database.load_habit_objects(lazy=True). A snapshot whose token no longer matches the database is stale:
+the tracker is then rebuilt from the database and the snapshot rewritten.
+"""
+import gc
+import os
+import pickle
+
+from habit import Habit
+from habit_tracker import HabitTracker
+
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_VERSION = 1  # Incremented when the layout of the snapshot rows changes
+
+
+def snapshot_path(db):
+    """Return the path of the snapshot file of a database, or None for an in-memory database."""
+    if db.db_name == ":memory:":
+        return None
+    return db.db_name + SNAPSHOT_SUFFIX
+
+
+def write_snapshot(db, path=None):
+    """
+    Writes the current habits of the database to the snapshot file.
+
+    The file is written under a temporary name and then renamed, so readers never see a partial snapshot.
+
+    Args:
+        db (Database): The database to take the snapshot of.
+        path (str): The snapshot file, by default next to the database file.
+
+    Returns:
+        list: The snapshot rows, (id, name, description, periodicity, creation date, completion count,
+            last completion, current streak) tuples.
+    """
+    path = path or snapshot_path(db)
+    token = db.get_version_token()  # Taken first, so changes made while loading make the snapshot stale
+    rows = [(stats['id'], stats['name'], stats['description'], stats['periodicity'], stats['creation_date'],
+             stats['completion_count'], stats['last_completion'], stats['current_streak'])
+            for stats in db.load_stats()]
+    if path:
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as stream:
+            pickle.dump((SNAPSHOT_VERSION, token, rows), stream, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+    return rows
+
+
+def read_snapshot(db, path=None):
+    """
+    Reads the snapshot file if it is still up to date.
+
+    Args:
+        db (Database): The database the snapshot was taken of.
+        path (str): The snapshot file, by default next to the database file.
+
+    Returns:
+        list: The snapshot rows, or None if there is no snapshot or it is stale or unreadable.
+    """
+    path = path or snapshot_path(db)
+    try:
+        with open(path, "rb") as stream:
+            version, token, rows = pickle.loads(stream.read())
+    except (OSError, AttributeError, EOFError, TypeError, ValueError, pickle.UnpicklingError):
+        return None
+    if version != SNAPSHOT_VERSION or token != db.get_version_token():
+        return None
+    return rows
+
+
+def load_tracker(db, path=None, tracker=None):
+    """
+    Builds a HabitTracker with lazily loaded habits, from the snapshot if it is fresh and otherwise from
+    the database, rewriting the snapshot.
+
+    Args:
+        db (Database): The database to load the habits from.
+        path (str): The snapshot file, by default next to the database file.
+        tracker (HabitTracker): The empty tracker to add the habits to, e.g. one with a StreakExpiry; by
+            default a new HabitTracker.
+
+    Returns:
+        HabitTracker: The tracker with all habits of the database.
+    """
+    # The cyclic garbage collector would scan the growing number of new objects again and again while they
+    # are created, which takes longer than creating them; it is switched off until the tracker is built
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        rows = read_snapshot(db, path)
+        if rows is None:
+            rows = write_snapshot(db, path)
+        if tracker is None:
+            tracker = HabitTracker()
+        for habit_id, *summary in rows:
+            tracker.add_habit(Habit.from_summary(*summary, lambda habit_id=habit_id: db.iter_completions(habit_id)))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return tracker
@@ -0,0 +1,150 @@
+"""
+Expiry of streaks as time passes.
+
+Habit.streak() counts the run that ends with the latest completion, however long ago that was. A
+StreakExpiry keeps the deadline of every tracked habit, the end of the day or calendar week after the one
+of its latest completion, in a min-heap. When the clock is advanced, it breaks exactly the streaks whose
+deadline has passed (see Habit.break_streak), in time proportional to the number of expired streaks rather
+than the number of habits. A HabitTracker created with a StreakExpiry keeps the deadlines up to date as
+habits are added, completed and deleted.
+"""
+import heapq # used for the min-heap of deadlines
+from datetime import datetime # used for the current time
+from streaks import period_ordinal, period_start
+
+
+def streak_deadline(habit):
+    """
+    Returns the moment at which the current streak of a habit lapses unless it is completed again.
+
+    Args:
+        habit (Habit): The habit.
+
+    Returns:
+        datetime: Midnight at the end of the day or calendar week after the period of the latest completion,
+            or None if the habit was never completed.
+    """
+    # The latest completion is known without fetching the completions of a lazy habit
+    return completion_deadline(habit.get_last_completion(), habit.get_periodicity())
+
+
+def completion_deadline(last_completion, periodicity):
+    """
+    Returns the moment at which a streak ending with the given completion lapses, see streak_deadline.
+
+    Args:
+        last_completion (datetime): The latest completion, or None if the habit was never completed.
+        periodicity (str): The periodicity of the habit, "daily" or "weekly".
+
+    Returns:
+        datetime: Midnight at the end of the day or calendar week after the period of the completion,
+            or None if there is no completion.
+    """
+    if last_completion is None:
+        return None
+    return period_start(period_ordinal(last_completion, periodicity) + 2, periodicity)
+
+
+class StreakExpiry:
+    """
+    Scheduler that breaks the streaks of habits whose deadline has passed.
+
+    The heap holds (deadline, sequence number, habit) entries. A habit's entry is replaced, not removed,
+    when its deadline changes; entries that are no longer the habit's current one are skipped when they
+    reach the top of the heap.
+
+    Attributes:
+        now (datetime): The current time of the scheduler, which only moves forward.
+    """
+
+    def __init__(self, now=None):
+        """
+        Initialize a scheduler without habits.
+
+        Args:
+            now (datetime): The current time, by default now.
+        """
+        self.now = now or datetime.now()
+        self._heap = []
+        self._deadlines = {}  # Habit -> (deadline, sequence number) of its current heap entry
+        self._next_sequence = 0
+
+    def __len__(self):
+        """Return the number of habits whose streak has not lapsed yet."""
+        return len(self._deadlines)
+
+    def track(self, habit):
+        """
+        Schedule the deadline of a habit from its latest completion, replacing any earlier deadline.
+
+        A streak whose deadline has already passed is broken right away.
+
+        Args:
+            habit (Habit): The habit.
+
+        Returns:
+            bool: True if the streak of the habit was broken.
+        """
+        self._deadlines.pop(habit, None)
+        deadline = streak_deadline(habit)
+        if deadline is None:
+            return False
+        if deadline <= self.now:
+            habit.break_streak()
+            return True
+        entry = (deadline, self._next_sequence)
+        self._next_sequence += 1
+        self._deadlines[habit] = entry
+        heapq.heappush(self._heap, (*entry, habit))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            # Too many replaced entries; rebuild the heap from the current ones
+            self._heap = [(*entry, tracked) for tracked, entry in self._deadlines.items()]
+            heapq.heapify(self._heap)
+        return False
+
+    def untrack(self, habit):
+        """Stop scheduling the deadline of a habit, e.g. when it is deleted."""
+        self._deadlines.pop(habit, None)
+
+    def completed(self, habit, completion_date):
+        """
+        Move the deadline of a habit after a completion was added.
+
+        Args:
+            habit (Habit): The completed habit.
+            completion_date (datetime): The date of the added completion.
+
+        Returns:
+            bool: True if the streak is still broken, because the completion is too old to continue it.
+        """
+        return self.track(habit)
+
+    def next_deadline(self):
+        """Return the earliest pending deadline, or None if no streak can lapse."""
+        while self._heap:
+            deadline, sequence, habit = self._heap[0]
+            if self._deadlines.get(habit) == (deadline, sequence):
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def advance(self, now=None):
+        """
+        Move the clock forward and break the streaks whose deadline has passed.
+
+        Args:
+            now (datetime): The new current time, by default now. An earlier time than the current one is
+                ignored.
+
+        Returns:
+            list: The habits whose streaks were broken, earliest deadline first.
+        """
+        self.now = max(self.now, now or datetime.now())
+        expired = []
+        while self._heap and self._heap[0][0] <= self.now:
+            deadline, sequence, habit = heapq.heappop(self._heap)
+            if self._deadlines.get(habit) == (deadline, sequence):
+                del self._deadlines[habit]
+                habit.break_streak()
+                expired.append(habit)
+        return expired
@@ -0,0 +1,312 @@
+from bisect import bisect_right # used for locating the run a period belongs to
+from collections import Counter, namedtuple # used for the gap histogram and the summary result
+from datetime import datetime # used for converting period numbers back into dates
+
+
+StreakSummary = namedtuple("StreakSummary", ["longest", "current", "runs", "gaps"])
+StreakSummary.__doc__ = """
+Streak statistics of a habit.
+
+Attributes:
+    longest (int): The longest run of consecutive periods ever completed.
+    current (int): The length of the latest run of consecutive periods.
+    runs (int): The number of separate runs.
+    gaps (Counter): Histogram mapping the number of missed periods between two runs to how often it occurred.
+"""
+
+
+def period_ordinal(completion_date, periodicity):
+    """
+    Converts a completion date into the number of the period it belongs to.
+
+    Daily habits use the day number, weekly habits the number of the ISO calendar week (weeks start on
+    Monday), so that consecutive periods always have consecutive numbers, also across years. This is the
+    one adjacency rule of all streaks: two completions continue a streak if their period numbers differ by
+    one, whatever their time of day.
+
+    Args:
+        completion_date (datetime): The completion date.
+        periodicity (str): The frequency of the habit ('daily' or 'weekly').
+
+    Returns:
+        int: The period number.
+    """
+    day = completion_date.toordinal()
+    if periodicity == 'weekly':
+        return (day - 1) // 7  # Day 1 of the proleptic Gregorian calendar is a Monday
+    return day
+
+
+def period_start(period, periodicity):
+    """
+    Converts a period number back into the first moment of that period, the inverse of period_ordinal.
+
+    Args:
+        period (int): The period number.
+        periodicity (str): The frequency of the habit ('daily' or 'weekly').
+
+    Returns:
+        datetime: Midnight at the start of the day, or of the Monday of the calendar week.
+    """
+    if periodicity == 'weekly':
+        return datetime.fromordinal(period * 7 + 1)
+    return datetime.fromordinal(period)
+
+
+class RunIndex:
+    """
+    Run-length index of the periods in which a habit was completed.
+
+    Consecutive periods are stored as runs with a start and an end period, so the streak statistics
+    only need a pass over the runs instead of over every completion.
+
+    Attributes:
+        _starts (list): Sorted first period of each run.
+        _ends (list): Last period of each run, in the same order as _starts.
+    """
+
+    def __init__(self, periods=()):
+        """
+        Builds the index from period numbers.
+
+        Args:
+            periods (iterable): Period numbers in any order; duplicates are ignored.
+        """
+        self._starts = []
+        self._ends = []
+        for period in sorted(set(periods)):
+            if self._ends and self._ends[-1] == period - 1:
+                self._ends[-1] = period
+            else:
+                self._starts.append(period)
+                self._ends.append(period)
+
+    @classmethod
+    def from_completions(cls, completions, periodicity):
+        """Builds the index from completion dates of a habit with the given periodicity."""
+        return cls(period_ordinal(completion, periodicity) for completion in completions)
+
+    def __len__(self):
+        """Return the number of runs."""
+        return len(self._starts)
+
+    def __contains__(self, period):
+        i = bisect_right(self._starts, period) - 1
+        return i >= 0 and period <= self._ends[i]
+
+    def runs(self):
+        """Return the runs as a list of (start, end) period pairs in chronological order."""
+        return list(zip(self._starts, self._ends))
+
+    def add(self, period):
+        """
+        Adds a completed period to the index in place, extending or merging the neighbouring runs.
+
+        Args:
+            period (int): The period number.
+
+        Returns:
+            bool: True if the period was new, False if it was already in the index.
+        """
+        i = bisect_right(self._starts, period) - 1
+        if i >= 0 and period <= self._ends[i]:
+            return False
+        joins_previous = i >= 0 and self._ends[i] == period - 1
+        joins_next = i + 1 < len(self._starts) and self._starts[i + 1] == period + 1
+        if joins_previous and joins_next:
+            self._ends[i] = self._ends[i + 1]
+            del self._starts[i + 1]
+            del self._ends[i + 1]
+        elif joins_previous:
+            self._ends[i] = period
+        elif joins_next:
+            self._starts[i + 1] = period
+        else:
+            self._starts.insert(i + 1, period)
+            self._ends.insert(i + 1, period)
+        return True
+
+    def longest_run(self):
+        """Return the length of the longest run ever."""
+        return max((end - start + 1 for start, end in zip(self._starts, self._ends)), default=0)
+
+    def current_run(self):
+        """Return the length of the latest run."""
+        return self._ends[-1] - self._starts[-1] + 1 if self._starts else 0
+
+    def summary(self):
+        """
+        Calculates all streak statistics in a single pass over the runs.
+
+        Returns:
+            StreakSummary: The longest run, current run, number of runs and gap histogram.
+        """
+        longest = 0
+        gaps = Counter()
+        previous_end = None
+        for start, end in zip(self._starts, self._ends):
+            longest = max(longest, end - start + 1)
+            if previous_end is not None:
+                gaps[start - previous_end - 1] += 1
+            previous_end = end
+        return StreakSummary(longest, self.current_run(), len(self._starts), gaps)
+
+
+def _set_bits(value):
+    """Yield the positions of the set bits of a non-negative int, lowest first."""
+    for i, byte in enumerate(value.to_bytes((value.bit_length() + 7) // 8, "little")):
+        while byte:
+            lowest = byte & -byte
+            yield i * 8 + lowest.bit_length() - 1
+            byte ^= lowest
+
+
+class PeriodBitset:
+    """
+    Bitset of completed periods, stored in a Python int in which bit i stands for period first_period + i.
+
+    Membership, counting and the run statistics are word-level operations on the int instead of walks over
+    the completions: runs of completed periods are runs of one bits. The bitset offers the same queries as
+    RunIndex, so it can be used in its place.
+
+    Attributes:
+        first_period (int): The period of bit 0, or None while the bitset is empty.
+        bits (int): The bits of the completed periods.
+    """
+
+    __slots__ = ("first_period", "bits")
+
+    def __init__(self, periods=(), first_period=None):
+        """
+        Builds the bitset from period numbers.
+
+        Args:
+            periods (iterable): Period numbers in any order; duplicates are ignored.
+            first_period (int): The period of bit 0, e.g. that of the creation date; lowered if an earlier
+                period is added.
+        """
+        periods = set(periods)
+        if periods and (first_period is None or min(periods) < first_period):
+            first_period = min(periods)
+        self.first_period = first_period
+        self.bits = 0
+        if periods:
+            data = bytearray((max(periods) - first_period) // 8 + 1)
+            for period in periods:
+                offset = period - first_period
+                data[offset >> 3] |= 1 << (offset & 7)
+            self.bits = int.from_bytes(data, "little")
+
+    @classmethod
+    def from_bytes(cls, first_period, data):
+        """Builds the bitset from the output of to_bytes."""
+        bitset = cls(first_period=first_period)
+        bitset.bits = int.from_bytes(data, "little")
+        return bitset
+
+    def to_bytes(self):
+        """Return the bits as little-endian bytes, one bit per period starting with first_period."""
+        return self.bits.to_bytes((self.bits.bit_length() + 7) // 8, "little")
+
+    def __contains__(self, period):
+        return self.first_period is not None and period >= self.first_period and \
+            (self.bits >> (period - self.first_period)) & 1 == 1
+
+    def __iter__(self):
+        """Iterate over the completed periods in chronological order."""
+        first_period = self.first_period
+        return (first_period + offset for offset in _set_bits(self.bits))
+
+    def add(self, period):
+        """
+        Adds a completed period.
+
+        Args:
+            period (int): The period number.
+
+        Returns:
+            bool: True if the period was new, False if it was already in the bitset.
+        """
+        if self.first_period is None:
+            self.first_period = period
+        elif period < self.first_period:
+            self.bits <<= self.first_period - period
+            self.first_period = period
+        bit = 1 << (period - self.first_period)
+        if self.bits & bit:
+            return False
+        self.bits |= bit
+        return True
+
+    def count(self, first=None, last=None):
+        """
+        Counts the completed periods, all of them or those in a range of periods.
+
+        Args:
+            first (int): The first period of the range, by default the earliest one.
+            last (int): The last period of the range, inclusive, by default the latest one.
+
+        Returns:
+            int: The number of completed periods.
+        """
+        bits = self.bits
+        if not bits:
+            return 0
+        if last is not None:
+            if last < self.first_period:
+                return 0
+            bits &= (1 << (last - self.first_period + 1)) - 1
+        if first is not None and first > self.first_period:
+            bits >>= first - self.first_period
+        return bits.bit_count()
+
+    def last_period(self):
+        """Return the latest completed period, or None."""
+        return self.first_period + self.bits.bit_length() - 1 if self.bits else None
+
+    def runs(self):
+        """Return the runs as a list of (start, end) period pairs in chronological order."""
+        # A run starts at a one bit below which there is a zero, and ends at one above which there is a zero
+        starts = self.bits & ~(self.bits << 1)
+        ends = self.bits & ~(self.bits >> 1)
+        first_period = self.first_period
+        return [(first_period + start, first_period + end) for start, end in zip(_set_bits(starts), _set_bits(ends))]
+
+    def longest_run(self):
+        """Return the length of the longest run ever."""
+        if not self.bits:
+            return 0
+        # windows[k] has bit i set if the 2 ** k periods from i on are all completed; the longest run is found
+        # by doubling the window length while any window is complete, then adding the smaller lengths back
+        windows = [self.bits]
+        while True:
+            window = windows[-1] & (windows[-1] >> (1 << (len(windows) - 1)))
+            if not window:
+                break
+            windows.append(window)
+        length = 1 << (len(windows) - 1)
+        complete = windows[-1]
+        for k in range(len(windows) - 2, -1, -1):
+            longer = complete & (windows[k] >> length)
+            if longer:
+                complete = longer
+                length += 1 << k
+        return length
+
+    def current_run(self):
+        """Return the length of the latest run."""
+        top = self.bits.bit_length()
+        # Inverting the bits below the top one turns the latest run into zeros, so the highest remaining
+        # bit is the missed period before it
+        return top - (self.bits ^ ((1 << top) - 1)).bit_length()
+
+    def summary(self):
+        """
+        Calculates all streak statistics from the runs.
+
+        Returns:
+            StreakSummary: The longest run, current run, number of runs and gap histogram.
+        """
+        runs = self.runs()
+        gaps = Counter(start - previous_end - 1 for (_, previous_end), (start, _) in zip(runs, runs[1:]))
+        return StreakSummary(self.longest_run(), self.current_run(), len(runs), gaps)
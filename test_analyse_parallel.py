@@ -0,0 +1,49 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from habit import Habit
+from db import Database
+import analyse
+import analyse_parallel
+
+
+# Fixture to set up a database file with random habits, including habits without completions
+@pytest.fixture
+def random_db_path(tmp_path):
+    rng = random.Random(5)
+    path = str(tmp_path / "parallel.db")
+    db = Database(path)
+    for i in range(40):
+        habit = Habit(f"Habit {i}", "Random completions", rng.choice(["daily", "weekly"]))
+        start = datetime(2023, 1, 1, 9) + timedelta(days=rng.randrange(30))
+        for day in range(rng.randrange(0, 40)):
+            if rng.random() < 0.8:
+                habit.complete_habit(start + timedelta(days=day))
+        db.save_completions_bulk(db.save_habit(habit), habit.get_completions())
+    db.close()
+    return path
+
+
+# Test that the shards cover all habit IDs without overlapping
+def test_shard_ranges(random_db_path):
+    shards = analyse_parallel.shard_ranges(random_db_path, 3)
+    assert shards == [(1, 14), (15, 28), (29, 40)]
+
+
+# Test that the merged top k of the shards matches the in-memory streaks, in a single and in several processes
+@pytest.mark.parametrize("workers", [1, 3])
+def test_top_streaks_match_in_memory(random_db_path, workers):
+    habits = Database(random_db_path).load_habit_objects()
+    expected = sorted(((i + 1, habit.get_name(), habit.streak()) for i, habit in enumerate(habits)),
+                      key=lambda result: (-result[2], result[0]))[:5]
+    assert analyse_parallel.top_streaks(random_db_path, k=5, workers=workers) == expected
+    assert analyse_parallel.longest_streak_all_habits(random_db_path, workers) == \
+        analyse.longest_streak_all_habits(habits).get_name()
+
+
+# Test the parallel analysis of a database without habits
+def test_empty_database(tmp_path):
+    path = str(tmp_path / "empty.db")
+    Database(path).close()
+    assert analyse_parallel.top_streaks(path, workers=2) == []
+    assert analyse_parallel.longest_streak_all_habits(path, workers=2) is None
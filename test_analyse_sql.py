@@ -0,0 +1,96 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from habit import Habit
+from db import Database
+import analyse
+import analyse_sql
+
+
+# Fixture to set up a database with random habits, including gaps, repeated periods and habits without completions
+@pytest.fixture(params=["text", "epoch"])
+def random_db(tmp_path, request):
+    rng = random.Random(11)
+    db = Database(str(tmp_path / "analyse_sql.db"), request.param)
+    habits = []
+    for i in range(50):
+        habit = Habit(f"Habit {i}", "Random completions", rng.choice(["daily", "weekly"]))
+        for _ in range(rng.randrange(0, 60)):
+            habit.complete_habit(datetime(2022, 12, 1, rng.randrange(24)) + timedelta(days=rng.randrange(120)))
+        habit_id = db.save_habit(habit)
+        db.save_completions_bulk(habit_id, habit.get_completions())
+        habits.append(habit)
+    yield db, habits
+    db.close()
+
+
+# Test that the SQL listings match the in-memory functions
+def test_listings_match_in_memory(random_db):
+    db, habits = random_db
+    assert analyse_sql.list_all_habits(db) == analyse.list_all_habits(habits)
+    for periodicity in ["daily", "weekly"]:
+        assert analyse_sql.list_habits_by_periodicity(db, periodicity) == [
+            habit.get_name() for habit in analyse.list_habits_by_periodicity(habits, periodicity)]
+
+
+# Test that the window-function streaks match the run-length index of every habit
+def test_streaks_match_streak_summary(random_db):
+    db, habits = random_db
+    rows = analyse_sql.streaks_all_habits(db)
+    assert [row.name for row in rows] == [habit.get_name() for habit in habits]
+    for row, habit in zip(rows, habits):
+        summary = analyse.streak_summary(habit)
+        assert (row.current, row.best) == (summary.current, summary.longest)
+    longest_ever = analyse.longest_ever_streak_all_habits(habits)
+    assert analyse_sql.longest_ever_streak_all_habits(db) == longest_ever.get_name()
+
+
+# Test the longest streak of habits completed at the same time every day or week
+def test_longest_streak_all_habits(tmp_path):
+    db = Database(str(tmp_path / "longest.db"))
+    base_date = datetime(2023, 9, 25, 10, 0, 0)
+    for name, periodicity, step, count in [("Read", "daily", timedelta(days=1), 5),
+                                           ("Exercise", "weekly", timedelta(weeks=1), 3)]:
+        habit_id = db.save_habit(Habit(name, f"{name} regularly", periodicity))
+        db.save_completions_bulk(habit_id, [base_date - step * i for i in range(count)])
+    assert analyse_sql.longest_streak_all_habits(db) == "Read"
+    assert analyse_sql.longest_streak_all_habits(db) == analyse.longest_streak_all_habits(
+        db.load_habit_objects()).get_name()
+
+
+# Test that both backends agree habit by habit when completions happen at different times of day
+@pytest.mark.parametrize("completion_format", ["text", "epoch"])
+def test_streaks_match_in_memory_at_mixed_times(tmp_path, completion_format):
+    rng = random.Random(14)
+    db = Database(str(tmp_path / "mixed.db"), completion_format)
+    habits = [Habit("Late", "Completed late, then early", "daily")]
+    for completion_date in [datetime(2023, 1, 1, 23), datetime(2023, 1, 2, 8), datetime(2023, 1, 3, 8)]:
+        habits[0].complete_habit(completion_date)
+    for i in range(40):
+        periodicity = rng.choice(["daily", "weekly"])
+        step = timedelta(days=1) if periodicity == 'daily' else timedelta(weeks=1)
+        habit = Habit(f"Habit {i}", "Completed at random times", periodicity)
+        for period in range(rng.randrange(0, 30)):
+            if rng.random() < 0.8:
+                habit.complete_habit(datetime(2023, 1, 2) + step * period + step * rng.random())
+        habits.append(habit)
+    for habit in habits:
+        db.save_completions_bulk(db.save_habit(habit), habit.get_completions())
+
+    rows = analyse_sql.streaks_all_habits(db)
+    assert (rows[0].current, habits[0].streak()) == (3, 3)
+    for row, habit in zip(rows, habits):
+        assert (row.name, row.current, row.best) == (
+            habit.get_name(), habit.streak(), analyse.longest_ever_streak_for_habit(habit))
+    for loaded in (db.load_habit_objects(), db.load_habit_objects(lazy=True)):
+        assert [habit.streak() for habit in loaded] == [row.current for row in rows]
+    assert analyse_sql.longest_streak_all_habits(db) == analyse.longest_streak_all_habits(habits).get_name()
+    db.close()
+
+
+# Test the SQL functions on an empty database
+def test_empty_database(tmp_path):
+    db = Database(str(tmp_path / "empty.db"))
+    assert analyse_sql.list_all_habits(db) == []
+    assert analyse_sql.streaks_all_habits(db) == []
+    assert analyse_sql.longest_streak_all_habits(db) is None
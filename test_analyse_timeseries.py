@@ -0,0 +1,120 @@
+import random
+import pytest
+from collections import Counter
+from datetime import date, datetime, timedelta
+from habit import Habit
+from db import Database, MIGRATIONS
+import analyse_timeseries
+
+
+# Fixture to set up a database with random habits, completed on random days of several months
+@pytest.fixture(params=["text", "epoch"])
+def random_db(tmp_path, request):
+    rng = random.Random(5)
+    db = Database(str(tmp_path / "timeseries.db"), request.param)
+    completions = {}
+    for i in range(20):
+        habit = Habit(f"Habit {i}", "Random completions", rng.choice(["daily", "weekly"]))
+        habit._creation_date = datetime(2022, 11, 1)
+        for _ in range(rng.randrange(0, 80)):
+            habit.complete_habit(datetime(2022, 12, 1, rng.randrange(24)) + timedelta(days=rng.randrange(150)))
+        habit_id = db.save_habit(habit)
+        db.save_completions_bulk(habit_id, habit.get_completions())
+        completions[habit_id] = db.load_completions(habit_id)
+    yield db, completions
+    db.close()
+
+
+# Helper counting the completions per bucket from the raw completion dates
+def count_buckets(dates, granularity):
+    return Counter(analyse_timeseries.bucket_of(completion, granularity) for completion in dates)
+
+
+# Test that bucket numbers and bucket starts are inverse, also across the turn of the year
+@pytest.mark.parametrize("granularity", analyse_timeseries.GRANULARITIES)
+def test_bucket_round_trip(granularity):
+    for day in range(60):
+        moment = datetime(2022, 12, 1, 15) + timedelta(days=day)
+        start = analyse_timeseries.bucket_start(analyse_timeseries.bucket_of(moment, granularity), granularity)
+        assert start <= moment
+        assert analyse_timeseries.bucket_of(start, granularity) == analyse_timeseries.bucket_of(moment, granularity)
+    assert analyse_timeseries.bucket_start(analyse_timeseries.bucket_of(date(2023, 1, 4), 'week'), 'week') == \
+        datetime(2023, 1, 2)
+
+
+# Test that the rollups match counts from the raw completions for every bucket size
+@pytest.mark.parametrize("granularity", analyse_timeseries.GRANULARITIES)
+def test_completions_per_bucket_match_raw_completions(random_db, granularity):
+    db, completions = random_db
+    start, end = datetime(2022, 12, 10), datetime(2023, 3, 20)
+    per_habit = analyse_timeseries.completions_per_habit(db, start, end, granularity)
+    for habit_id, dates in completions.items():
+        expected = count_buckets(dates, granularity)
+        buckets = analyse_timeseries.completions_per_bucket(db, habit_id, start, end, granularity)
+        assert [bucket_start for bucket_start, _ in buckets] == [
+            analyse_timeseries.bucket_start(bucket, granularity)
+            for bucket in range(analyse_timeseries.bucket_of(start, granularity),
+                                analyse_timeseries.bucket_of(end, granularity) + 1)]
+        counts = [analyse_timeseries.bucket_of(bucket_start, granularity) for bucket_start, _ in buckets]
+        assert [count for _, count in buckets] == [expected.get(bucket, 0) for bucket in counts]
+        assert per_habit[f"Habit {habit_id - 1}"] == [count for _, count in buckets]
+
+
+# Test that deleting completions and habits keeps the rollups in step
+def test_rollups_follow_deletes(random_db):
+    db, completions = random_db
+    habit_id = max(completions, key=lambda key: len(completions[key]))
+    with db.transaction():
+        db.conn.execute('DELETE FROM completions WHERE id = (SELECT MIN(id) FROM completions WHERE habit_id = ?)',
+                        (habit_id,))
+    remaining = db.load_completions(habit_id)
+    rows = db.load_rollups('month', 0, 10 ** 6, habit_id)
+    assert {bucket: count for _, bucket, count in rows} == count_buckets(remaining, 'month')
+    db.delete_habit(habit_id)
+    assert db.load_rollups('day', 0, 10 ** 7, habit_id) == []
+
+
+# Test the heatmap of all habits and of a single habit
+def test_heatmap(random_db):
+    db, completions = random_db
+    start, end = date(2023, 1, 1), date(2023, 1, 31)
+    heatmap = analyse_timeseries.heatmap(db, start, end)
+    assert list(heatmap) == [start + timedelta(days=day) for day in range(31)]
+    all_dates = Counter(d.date() for dates in completions.values() for d in dates)
+    assert heatmap == {day: all_dates.get(day, 0) for day in heatmap}
+    habit_id = next(iter(completions))
+    single = analyse_timeseries.heatmap(db, start, end, habit_id)
+    assert sum(single.values()) == sum(1 for d in completions[habit_id] if start <= d.date() <= end)
+
+
+# Test the completion rate over the last periods, limited to the periods since the habit was created
+def test_completion_rate(tmp_path):
+    db = Database(str(tmp_path / "rate.db"))
+    habit = Habit("Read", "Read a chapter", "daily")
+    habit._creation_date = datetime(2023, 1, 1)
+    habit_id = db.save_habit(habit)
+    db.save_completions_bulk(habit_id, [datetime(2023, 1, day, 8) for day in (1, 2, 4, 5, 6, 8)])
+    assert analyse_timeseries.completion_rate(db, habit_id, 4, today=datetime(2023, 1, 8, 20)) == 0.75
+    assert analyse_timeseries.completion_rate(db, habit_id, 30, today=datetime(2023, 1, 10)) == 0.6
+    assert analyse_timeseries.completion_rate(db, 999, 7) is None
+    with pytest.raises(ValueError):
+        analyse_timeseries.completions_per_bucket(db, habit_id, date(2023, 1, 1), date(2023, 2, 1), 'year')
+    db.close()
+
+
+# Test that the migration fills the rollups from the existing completions
+def test_migration_backfills_rollups(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = Database(path)
+    habit_id = db.save_habit(Habit("Walk", "Take a walk", "weekly"))
+    db.save_completions_bulk(habit_id, [datetime(2023, 1, 2) + timedelta(weeks=week) for week in range(10)])
+    with db.transaction():
+        for table in ("daily_rollups", "weekly_rollups", "monthly_rollups"):
+            db.conn.execute(f'DROP TABLE {table}')
+        db.conn.execute('PRAGMA user_version = 7')  # Schema version 7, before the rollups
+    db.close()
+    db = Database(path)
+    assert db.get_schema_version() == len(MIGRATIONS)
+    assert db.load_rollups('month', 0, 10 ** 6) == [(habit_id, 2023 * 12, 5), (habit_id, 2023 * 12 + 1, 4),
+                                                   (habit_id, 2023 * 12 + 2, 1)]
+    db.close()
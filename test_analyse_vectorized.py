@@ -0,0 +1,89 @@
+import random
+import sqlite3
+import pytest
+from datetime import datetime, timedelta, date
+from habit import Habit
+from db import Database
+from analyse import list_habits_by_periodicity, streak_summary
+
+np = pytest.importorskip("numpy")
+import analyse_vectorized  # noqa: E402
+
+
+# Fixture to set up habits with random completions, including gaps and repeated periods
+@pytest.fixture
+def random_habits():
+    rng = random.Random(7)
+    habits = []
+    for i in range(50):
+        habit = Habit(f"Habit {i}", "Random completions", rng.choice(["daily", "weekly"]))
+        for _ in range(rng.randrange(0, 60)):
+            habit.complete_habit(datetime(2022, 12, 1, rng.randrange(24)) + timedelta(days=rng.randrange(120)))
+        habits.append(habit)
+    return habits
+
+
+# Test that the vectorized streaks match the run-length index and the streak of every habit
+def test_stats_match_streak_summary(random_habits):
+    columns = analyse_vectorized.CompletionColumns.from_habits(random_habits)
+    stats = analyse_vectorized.compute_stats(columns)
+    for position, habit in enumerate(random_habits):
+        summary = streak_summary(habit)
+        assert stats.current[position] == summary.current == habit.streak()
+        assert stats.best[position] == summary.longest
+        assert stats.completed[position] == sum(end - start + 1 for start, end in habit.run_index().runs())
+
+
+# Test the completion rate over the periods since the habit was created
+def test_completion_rate():
+    habit = Habit("Read", "Read every day", "daily")
+    habit._creation_date = datetime(2023, 9, 1, 8)
+    for i in range(5):
+        habit.complete_habit(datetime(2023, 9, 1, 10) + timedelta(days=i * 2))
+    columns = analyse_vectorized.CompletionColumns.from_habits([habit])
+    stats = analyse_vectorized.compute_stats(columns, today=date(2023, 9, 10))
+    assert stats.rate[0] == pytest.approx(0.5)  # 5 of 10 days
+
+
+# Test loading the columns from the database and answering the analyse queries from them
+@pytest.mark.parametrize("completion_format", ["text", "epoch"])
+def test_columns_from_database(tmp_path, random_habits, completion_format):
+    db = Database(str(tmp_path / "columns.db"), completion_format)
+    for habit in random_habits:
+        habit_id = db.save_habit(habit)
+        db.save_completions_bulk(habit_id, habit.get_completions())
+    columns = analyse_vectorized.CompletionColumns.from_database(db)
+    assert columns.names == [habit.get_name() for habit in random_habits]
+    for periodicity in ["daily", "weekly"]:
+        assert analyse_vectorized.list_habits_by_periodicity(columns, periodicity) == [
+            habit.get_name() for habit in list_habits_by_periodicity(random_habits, periodicity)]
+    stats = analyse_vectorized.compute_stats(columns)
+    assert stats.best.tolist() == [streak_summary(habit).longest for habit in random_habits]
+    expected = max(random_habits, key=lambda habit: streak_summary(habit).current)
+    assert analyse_vectorized.longest_streak_all_habits(columns) == expected.get_name()
+    db.close()
+
+
+# Test that completions without a habit, left behind by old versions, are skipped when loading the columns
+def test_columns_skip_orphaned_completions(tmp_path):
+    path = str(tmp_path / "orphans.db")
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE habits (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, description TEXT, '
+                 'periodicity TEXT, creation_date DATE)')
+    conn.execute('CREATE TABLE completions (id INTEGER PRIMARY KEY AUTOINCREMENT, habit_id INTEGER, '
+                 'completion_date DATE, FOREIGN KEY (habit_id) REFERENCES habits(id))')
+    conn.executemany('INSERT INTO habits (name, description, periodicity, creation_date) VALUES (?, ?, ?, ?)',
+                     [("Read", "Read every day", "daily", "2023-09-01 08:00:00.000000"),
+                      ("Review", "Weekly review", "weekly", "2023-09-01 08:00:00.000000")])
+    conn.executemany('INSERT INTO completions (habit_id, completion_date) VALUES (?, ?)',
+                     [(None, "2023-09-21 10:00:00"), (1, "2023-09-24 10:00:00"), (1, "2023-09-25 10:00:00"),
+                      (99, "2023-09-22 10:00:00"), (2, "2023-09-25 10:00:00")])
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    columns = analyse_vectorized.CompletionColumns.from_database(db)
+    assert columns.names == ["Read", "Review"]
+    assert analyse_vectorized.compute_stats(columns).current.tolist() == [2, 1]
+    assert analyse_vectorized.longest_streak_all_habits(columns) == "Read"
+    db.close()
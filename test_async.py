@@ -0,0 +1,88 @@
+import asyncio
+import sqlite3
+import threading
+import pytest
+from datetime import datetime, timedelta
+from habit import Habit
+from db import Database
+from async_db import AsyncDatabase
+from async_habit_tracker import AsyncHabitTracker
+
+
+# Test that the SQLite calls run on the executor thread and the results match the synchronous Database
+def test_async_database(tmp_path):
+    path = str(tmp_path / "async.db")
+
+    async def scenario():
+        async with await AsyncDatabase.open(path) as db:
+            habit_id = await db.save_habit(Habit("Read", "Read a book", "daily"))
+            await db.save_completion(habit_id, datetime(2023, 9, 25, 10))
+            assert await db.habit_exists("read")
+            assert await db.get_habit_id("Read") == habit_id
+            assert await db.load_completions(habit_id) == [datetime(2023, 9, 25, 10)]
+            assert db._executor.submit(threading.get_ident).result() != threading.get_ident()
+            return await db.load_habits()
+
+    habits = asyncio.run(scenario())
+    assert habits == Database(path).load_habits()
+
+
+# Test that completions saved at the same time are written in a shared transaction
+def test_concurrent_completions_are_grouped(tmp_path):
+    path = str(tmp_path / "grouped.db")
+    base_date = datetime(2023, 1, 1, 9)
+
+    async def scenario():
+        async with await AsyncDatabase.open(path) as db:
+            habit_id = await db.save_habit(Habit("Read", "Read a book", "daily"))
+            batches = []
+            save_completions_many = db.db.save_completions_many
+            db.db.save_completions_many = lambda rows: batches.append(len(rows)) or save_completions_many(rows)
+            await asyncio.gather(*(db.save_completion(habit_id, base_date + timedelta(days=i)) for i in range(100)))
+            return batches, await db.load_stats()
+
+    batches, stats = asyncio.run(scenario())
+    assert batches == [100]
+    assert stats[0]['completion_count'] == 100
+    assert stats[0]['current_streak'] == 100
+
+
+# Test adding, completing, renaming and deleting habits through the async tracker
+def test_async_habit_tracker(tmp_path):
+    path = str(tmp_path / "tracker.db")
+    base_date = datetime(2023, 9, 25, 10)
+
+    async def scenario():
+        async with await AsyncDatabase.open(path) as db:
+            tracker = AsyncHabitTracker(db)
+            await tracker.add_habit(Habit("Read", "Read a book", "daily"))
+            await tracker.add_habit(Habit("Exercise", "Go running", "weekly"))
+            results = await asyncio.gather(*(tracker.complete_habit("read", base_date - timedelta(days=i))
+                                             for i in range(5)))
+            assert results == [True] * 5
+            assert not await tracker.complete_habit("Read", base_date)
+            await tracker.complete_habit("Exercise", base_date)
+            await tracker.update_habit("read", "Reading", "Read every day")
+            with pytest.raises(ValueError):
+                await tracker.update_habit("Reading", "exercise", "Taken")
+            await tracker.delete_habit("Exercise")
+            with pytest.raises(ValueError):
+                await tracker.complete_habit("Exercise")
+
+        async with await AsyncDatabase.open(path) as db:
+            await db.save_habit(Habit("Write", "Saved by another tracker", "daily"))
+            reloaded = AsyncHabitTracker(db)
+            await reloaded.load()
+            await reloaded.complete_habit("Write", base_date)  # Saved under the ID loaded with the habit
+            assert await db.load_completions(await db.get_habit_id("Write")) == [base_date]
+            await reloaded.delete_habit("Write")
+            await db.save_habit(Habit("Walk", "Saved by another tracker", "daily"))
+            with pytest.raises(sqlite3.IntegrityError):
+                await reloaded.add_habit(Habit("walk", "Duplicate in the database", "daily"))
+            assert reloaded.get_habit("walk") is None  # Not kept in memory when the save fails
+            return reloaded
+
+    tracker = asyncio.run(scenario())
+    assert [habit.get_name() for habit in tracker.habits] == ["Reading"]
+    assert tracker.get_habit("reading").get_description() == "Read every day"
+    assert tracker.get_habit("reading").streak() == 5
@@ -0,0 +1,72 @@
+import csv
+import importlib
+import json
+import sys
+from datetime import datetime, timedelta
+from db import Database
+import cli
+
+
+# Fixture-like helper writing a CSV file with two habits, one of them without completions
+def write_csv(path):
+    base_date = datetime(2023, 9, 25, 10)
+    with open(path, "w", newline="") as stream:
+        writer = csv.DictWriter(stream, fieldnames=cli.FIELDS)
+        writer.writeheader()
+        for i in range(5):
+            writer.writerow({"name": "read", "description": "Read a book", "periodicity": "daily",
+                             "creation_date": "2023-09-01 08:00:00",
+                             "completion_date": str(base_date - timedelta(days=i))})
+        writer.writerow({"name": "read", "description": "Read a book", "periodicity": "daily",
+                         "creation_date": "2023-09-01 08:00:00", "completion_date": str(base_date)})
+        writer.writerow({"name": "meditate", "description": "Meditate", "periodicity": "weekly",
+                         "creation_date": "2023-09-02 08:00:00", "completion_date": ""})
+
+
+# Test importing a CSV file and exporting it again as JSON Lines
+def test_import_export_round_trip(tmp_path, capsys):
+    db_path = str(tmp_path / "cli.db")
+    write_csv(tmp_path / "habits.csv")
+    assert cli.run(["--db", db_path, "import", str(tmp_path / "habits.csv"), "--batch-size", "2"]) == 0
+    assert cli.run(["--db", db_path, "export", str(tmp_path / "habits.jsonl")]) == 0
+    with open(tmp_path / "habits.jsonl") as stream:
+        rows = [json.loads(line) for line in stream]
+    assert [row["completion_date"] for row in rows] == [
+        str(datetime(2023, 9, 21, 10) + timedelta(days=i)) for i in range(5)] + [""]
+    assert rows[-1]["name"] == "meditate"
+
+    # Importing the export into another database gives the same habits and statistics
+    copy_path = str(tmp_path / "copy.db")
+    assert cli.run(["--db", copy_path, "import", str(tmp_path / "habits.jsonl")]) == 0
+    assert Database(copy_path).load_stats() == Database(db_path).load_stats()
+    assert "Imported 5 completions, 2 new habits." in capsys.readouterr().err
+
+
+# Test the complete, stats and list subcommands
+def test_complete_stats_and_list(tmp_path, capsys):
+    db_path = str(tmp_path / "cli.db")
+    write_csv(tmp_path / "habits.csv")
+    cli.run(["--db", db_path, "import", str(tmp_path / "habits.csv")])
+    capsys.readouterr()
+    assert cli.run(["--db", db_path, "complete", "Read", "--date", "2023-09-26 10:00:00"]) == 0
+    assert cli.run(["--db", db_path, "complete", "Read", "--date", "2023-09-26 18:00:00"]) == 0
+    assert cli.run(["--db", db_path, "complete", "Swim"]) == 1
+    output = capsys.readouterr()
+    assert output.out.splitlines() == ["Marked 'Read' as complete.", "'Read' was already completed in this period."]
+    assert "Habit 'Swim' not found." in output.err
+
+    cli.run(["--db", db_path, "stats", "--format", "jsonl", "--date", "2023-09-27 23:59:00"])
+    stats = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(row["name"], row["current_streak"]) for row in stats] == [("read", 6), ("meditate", 0)]
+    cli.run(["--db", db_path, "stats", "--date", "2023-09-28"])  # A whole day without completing "read"
+    assert capsys.readouterr().out.splitlines()[0].startswith("read                     daily   streak     0")
+    cli.run(["--db", db_path, "list", "--periodicity", "weekly"])
+    assert capsys.readouterr().out.splitlines() == ["meditate"]
+
+
+# Test that importing main has no side effects such as opening the database
+def test_import_main_is_cheap(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop("main", None)
+    importlib.import_module("main")
+    assert not (tmp_path / "habit_tracker.db").exists()
@@ -0,0 +1,446 @@
+import random
+import sqlite3
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from habit import Habit
+from analyse import longest_ever_streak_for_habit
+from db import CompletionBuffer, Database, MIGRATIONS, SEED_ENV_VAR, decode_completion, initialize_predefined_habits
+
+
+# Fixture to set up a temporary database with a daily and a weekly habit
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "test_habit_tracker.db"))
+    base_date = datetime(2023, 9, 25, 10, 0, 0)
+    read_id = database.save_habit(Habit("Read", "Read every day", "daily"))
+    exercise_id = database.save_habit(Habit("Exercise", "Weekly Exercise", "weekly"))
+    database.save_habit(Habit("Meditate", "Daily meditation", "daily"))  # Habit without completions
+    for i in range(5):
+        database.save_completion(read_id, base_date - timedelta(days=i))
+    for i in range(3):
+        database.save_completion(exercise_id, base_date - timedelta(weeks=i))
+    yield database
+    database.close()
+
+
+# Test that the bulk loader returns the same data as loading completions habit by habit
+def test_load_habits_matches_per_habit_loading(db):
+    habits = db.load_habits()
+    assert [habit['name'] for habit in habits] == ["Read", "Exercise", "Meditate"]
+    for habit in habits:
+        assert habit['completions'] == db.load_completions(habit['id'])
+    assert habits[2]['completions'] == []
+
+
+# Test loading habits directly as Habit objects
+def test_load_habit_objects(db):
+    habits = db.load_habit_objects()
+    assert [habit.get_name() for habit in habits] == ["Read", "Exercise", "Meditate"]
+    assert isinstance(habits[0].get_creation_date(), datetime)
+    assert habits[0].streak() == 5
+    assert habits[1].streak() == 3
+    assert habits[2].get_completions() == []
+
+
+# Test that a database created before schema versioning is upgraded in place without losing data
+def test_migrate_legacy_database(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE habits (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, description TEXT, '
+                 'periodicity TEXT, creation_date DATE)')
+    conn.execute('CREATE TABLE completions (id INTEGER PRIMARY KEY AUTOINCREMENT, habit_id INTEGER, '
+                 'completion_date DATE, FOREIGN KEY (habit_id) REFERENCES habits(id))')
+    conn.executemany('INSERT INTO habits (name, description, periodicity, creation_date) VALUES (?, ?, ?, ?)',
+                     [("Read", "Read every day", "daily", "2023-09-01 08:00:00.000000"),
+                      ("read", "Duplicate name", "daily", "2023-09-02 08:00:00.000000"),
+                      ("READ (2)", "Taken suffix", "weekly", "2023-09-03 08:00:00.000000"),
+                      ("READ", "Another duplicate", "weekly", "2023-09-04 08:00:00.000000")])
+    conn.executemany('INSERT INTO completions (habit_id, completion_date) VALUES (?, ?)',
+                     [(1, "2023-09-24 10:00:00"), (1, "2023-09-25 10:00:00"),
+                      (1, "2023-09-25 10:00:00"), (2, "2023-09-23 10:00:00"), (4, "2023-09-20 10:00:00"),
+                      (None, "2023-09-21 10:00:00"), (99, "2023-09-22 10:00:00")])  # Left behind by old versions
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    assert db.get_schema_version() == len(MIGRATIONS)
+    habits = db.load_habits()
+    assert [(habit['name'], habit['description']) for habit in habits] == [
+        ("Read", "Read every day"), ("read (3)", "Duplicate name"), ("READ (2)", "Taken suffix"),
+        ("READ (4)", "Another duplicate")]  # Case duplicates are renamed, not merged or dropped
+    assert [habit['completions'] for habit in habits] == [
+        [datetime(2023, 9, 24, 10), datetime(2023, 9, 25, 10)], [datetime(2023, 9, 23, 10)], [],
+        [datetime(2023, 9, 20, 10)]]
+    assert [habit_id for habit_id, _, _ in db.load_rollups('month', 0, 10 ** 6)] == [1, 2, 4]
+    db.close()
+
+
+# Test that an SQLite library without the features the schema needs is rejected before anything is written
+def test_old_sqlite_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite3, "sqlite_version_info", (3, 24, 0))
+    monkeypatch.setattr(sqlite3, "sqlite_version", "3.24.0")
+    with pytest.raises(sqlite3.NotSupportedError, match="3.25.0"):
+        Database(str(tmp_path / "old.db"))
+    assert not (tmp_path / "old.db").exists()
+
+
+# Test that habit names are unique regardless of case and duplicate completions are ignored
+def test_unique_constraints(db):
+    assert db.habit_exists("READ")
+    assert db.get_habit_id("exercise") == db.get_habit_id("Exercise")
+    with pytest.raises(sqlite3.IntegrityError):
+        db.save_habit(Habit("read", "Duplicate name", "daily"))
+    read_id = db.get_habit_id("Read")
+    db.save_completion(read_id, datetime(2023, 9, 25, 10, 0, 0))
+    assert len(db.load_completions(read_id)) == 5
+
+
+# Test that seeding the predefined habits and sample data only happens once per database
+def test_initialize_predefined_habits_is_idempotent(tmp_path):
+    db = Database(str(tmp_path / "seeded.db"))
+    initialize_predefined_habits(db, seed=True)
+    habits = db.load_habits()
+    assert len(habits) == 5
+    assert db.is_seeded("predefined_habits") and db.is_seeded("sample_completions")
+    initialize_predefined_habits(db, seed=True)
+    assert db.load_habits() == habits
+    db.close()
+
+
+# Test that seeding can be disabled through the environment
+def test_seeding_opt_out(tmp_path, monkeypatch):
+    monkeypatch.setenv(SEED_ENV_VAR, "0")
+    db = Database(str(tmp_path / "production.db"))
+    initialize_predefined_habits(db)
+    assert db.load_habits() == []
+    assert not db.is_seeded("predefined_habits")
+    db.close()
+
+
+# Test that writes inside a transaction are committed together or rolled back together
+def test_transaction(db):
+    with db.transaction():
+        habit_id = db.save_habit(Habit("Walk", "Daily walk", "daily"))
+        db.save_completion(habit_id, datetime(2023, 9, 25, 10, 0, 0))
+    assert db.get_habit_id("Walk") == habit_id
+    assert db.load_completions(habit_id) == [datetime(2023, 9, 25, 10, 0, 0)]
+
+    with pytest.raises(ValueError):
+        with db.transaction():
+            db.save_habit(Habit("Swim", "Weekly swim", "weekly"))
+            raise ValueError("abort")
+    assert not db.habit_exists("Swim")
+
+
+# Test saving many completions at once, directly and through the write-behind buffer
+def test_bulk_and_buffered_completions(db):
+    habit_id = db.get_habit_id("Meditate")
+    dates = [datetime(2023, 9, 1, 10, 0, 0) + timedelta(days=i) for i in range(10)]
+    db.save_completions_bulk(habit_id, dates[:5] + dates[:2])  # Duplicates are ignored
+    assert db.load_completions(habit_id) == dates[:5]
+    db.save_completions_many((habit_id, date) for date in reversed(dates[:5] + dates[:2]))  # Any order
+    db.save_completions_many(iter([(999, dates[0])]))  # Unknown habits are ignored
+    assert db.load_completions(habit_id) == dates[:5]
+    assert db.conn.execute('SELECT COUNT(*) FROM completions WHERE habit_id = 999').fetchone()[0] == 0
+
+    buffer = CompletionBuffer(db, max_rows=3, max_delay_ms=60000)
+    for date in dates[5:9]:
+        buffer.add(habit_id, date)
+    assert len(buffer) == 1  # The first three completions were flushed
+    assert db.load_completions(habit_id) == dates[:8]
+    with buffer:
+        buffer.add(habit_id, dates[9])
+    assert len(buffer) == 0
+    assert db.load_completions(habit_id) == dates
+
+    # Without further completions, the timer thread flushes the buffer after max_delay_ms
+    buffer = CompletionBuffer(db, max_rows=100, max_delay_ms=20)
+    buffer.add(habit_id, datetime(2023, 9, 20, 10))
+    deadline = time.monotonic() + 5
+    while len(buffer) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(buffer) == 0
+    assert db.load_completions(habit_id)[-1] == datetime(2023, 9, 20, 10)
+
+
+# Test that the database allows only one completion per habit and day or calendar week
+def test_one_completion_per_period(db):
+    read_id = db.get_habit_id("Read")
+    exercise_id = db.get_habit_id("Exercise")
+    db.save_completion(read_id, datetime(2023, 9, 25, 22, 0, 0))  # Same day as an existing completion
+    db.save_completion(exercise_id, datetime(2023, 9, 28, 10, 0, 0))  # Same week as an existing completion
+    db.save_completion(exercise_id, datetime(2022, 9, 26, 10, 0, 0))  # Same week number, previous year
+    assert len(db.load_completions(read_id)) == 5
+    assert db.load_completions(exercise_id)[0] == datetime(2022, 9, 26, 10, 0, 0)
+    assert len(db.load_completions(exercise_id)) == 4
+
+
+# Test that upgrading keeps only the earliest of several legacy completions in the same period
+def test_migrate_completions_in_same_period(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    for migration in MIGRATIONS[:3]:  # Schema version 3, before completion periods were stored
+        migration(conn)
+    conn.execute('PRAGMA user_version = 3')
+    habit_id = conn.execute("INSERT INTO habits (name, description, periodicity, creation_date) "
+                            "VALUES ('Exercise', 'Weekly Exercise', 'weekly', '2023-09-01 08:00:00')").lastrowid
+    conn.executemany('INSERT INTO completions (habit_id, completion_date) VALUES (?, ?)',
+                     [(habit_id, "2023-09-27 10:00:00"), (habit_id, "2023-09-25 10:00:00"),
+                      (habit_id, "2023-10-02 10:00:00")])
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    assert db.load_completions(habit_id) == [datetime(2023, 9, 25, 10, 0, 0), datetime(2023, 10, 2, 10, 0, 0)]
+    db.close()
+
+
+# Test that lazily loaded habits report the same summary values as fully loaded ones
+def test_lazy_loading_matches_full_loading(tmp_path):
+    rng = random.Random(10)
+    db = Database(str(tmp_path / "lazy.db"))
+    for i in range(30):
+        habit = Habit(f"Habit {i}", "Random completions", rng.choice(["daily", "weekly"]))
+        completion_date = datetime(2022, 12, 1, 12)
+        for _ in range(rng.randrange(0, 40)):
+            completion_date += timedelta(days=rng.choice([1, 1, 1, 2, 7, 8]), hours=rng.randrange(-12, 13))
+            habit.complete_habit(completion_date)
+        db.save_completions_bulk(db.save_habit(habit), habit.get_completions())
+
+    for lazy_habit, habit in zip(db.load_habit_objects(lazy=True), db.load_habit_objects()):
+        assert lazy_habit._completions is None
+        assert lazy_habit.streak() == habit.streak()
+        assert lazy_habit.get_completion_count() == len(habit.get_completions())
+        assert lazy_habit.get_last_completion() == (habit.get_completions() or [None])[-1]
+        assert list(lazy_habit.iter_completions()) == habit.get_completions()
+        assert lazy_habit._completions is None  # Streaming does not keep the history in memory
+        assert lazy_habit.get_completions() == habit.get_completions()
+    db.close()
+
+
+# Test fetching the completions of a habit page by page
+def test_iter_completions(db):
+    read_id = db.get_habit_id("Read")
+    completions = db.load_completions(read_id)
+    assert list(db.iter_completions(read_id, page_size=2)) == completions
+    assert list(db.iter_completions(read_id, since=completions[2], page_size=2)) == completions[2:]
+    assert list(db.iter_completions(db.get_habit_id("Meditate"))) == []
+
+
+# Test converting completion dates between text and integer epoch storage without changing them
+def test_completion_format_conversion(db):
+    habits = db.load_habits()
+    summaries = db.load_completion_summaries()
+    db.convert_completion_format("epoch")
+    assert db.conn.execute('SELECT DISTINCT typeof(completion_date) FROM completions').fetchall() == [("integer",)]
+    assert db.load_habits() == habits
+    assert db.load_completion_summaries() == summaries
+
+    read_id = db.get_habit_id("Read")
+    db.save_completion(read_id, datetime(2023, 9, 25, 23, 0, 0))  # Same day, still ignored
+    db.save_completion(read_id, datetime(2023, 9, 26, 9, 30, 15, 123))
+    completions = db.load_completions(read_id)
+    assert completions[-1] == datetime(2023, 9, 26, 9, 30, 15)
+    assert list(db.iter_completions(read_id, since=completions[3], page_size=1)) == completions[3:]
+
+    db.convert_completion_format("text")
+    assert db.conn.execute('SELECT DISTINCT typeof(completion_date) FROM completions').fetchall() == [("text",)]
+    assert db.load_completions(read_id) == completions
+    with pytest.raises(ValueError):
+        db.convert_completion_format("binary")
+
+
+# Test that the storage format is kept in the database file
+def test_completion_format_is_persistent(tmp_path):
+    path = str(tmp_path / "epoch.db")
+    db = Database(path, completion_format="epoch")
+    initialize_predefined_habits(db, seed=True)
+    db.close()
+    db = Database(path)
+    assert db.completion_format == "epoch"
+    assert len(db.load_completions(db.get_habit_id("Read"))) == 28
+    assert decode_completion("2023-09-25 10:00:00") == decode_completion(1695636000) == datetime(2023, 9, 25, 10)
+    db.close()
+
+
+# Test that the trigger-maintained statistics match the habits through inserts in any order and deletes
+def test_habit_stats_match_habits(tmp_path):
+    rng = random.Random(13)
+    db = Database(str(tmp_path / "stats.db"))
+    habits = {}
+    for i in range(20):
+        habit = Habit(f"Habit {i}", "Random completions", rng.choice(["daily", "weekly"]))
+        habits[db.save_habit(habit)] = habit
+    for _ in range(600):
+        habit_id = rng.choice(list(habits))
+        completion_date = datetime(2023, 1, 1, 12) + timedelta(days=rng.randrange(120), hours=rng.randrange(-12, 13))
+        if habits[habit_id].complete_habit(completion_date):
+            db.save_completion(habit_id, completion_date)
+    for habit_id in list(habits)[:5]:  # Delete a completion from the middle of some histories
+        completions = db.load_completions(habit_id)
+        if completions:
+            removed = completions[len(completions) // 2]
+            with db.transaction():
+                db.conn.execute('DELETE FROM completions WHERE habit_id = ? AND completion_date = ?',
+                                (habit_id, db.encode_completion(removed)))
+            habits[habit_id].set_completions(completion for completion in completions if completion != removed)
+
+    for stats in db.load_stats():
+        habit = habits[stats['id']]
+        assert stats['completion_count'] == len(habit.get_completions())
+        assert stats['last_completion'] == habit.get_last_completion()
+        assert stats['current_streak'] == habit.streak()
+        assert stats['best_streak'] == longest_ever_streak_for_habit(habit)
+    longest = max(habits.values(), key=lambda habit: habit.streak())
+    assert db.load_longest_streak()['name'] == longest.get_name()
+
+    db.delete_habit(next(iter(habits)))
+    assert len(db.load_stats()) == 19
+    assert db.conn.execute('SELECT COUNT(*) FROM habit_stats').fetchone()[0] == 19
+    db.close()
+
+
+# Test that habit_stats counts streaks in consecutive calendar days, whatever the time of day
+def test_habit_stats_count_calendar_days(tmp_path):
+    db = Database(str(tmp_path / "stats.db"))
+    habit = Habit("Read", "Read every day", "daily")
+    for completion_date in [datetime(2023, 1, 1, 23), datetime(2023, 1, 2, 8), datetime(2023, 1, 3, 8)]:
+        habit.complete_habit(completion_date)  # Only 9 hours between the first two completions
+    habit_id = db.save_habit(habit)
+    db.save_completions_bulk(habit_id, habit.get_completions())
+    stats = db.load_stats()[0]
+    assert (stats['current_streak'], stats['best_streak']) == (habit.streak(), 3)
+    db.save_completion(habit_id, datetime(2023, 1, 4, 0, 30))
+    assert db.load_stats()[0]['current_streak'] == 4
+    db.close()
+
+
+# Test the statistics of a habit without completions and of an empty database
+def test_habit_stats_without_completions(tmp_path):
+    db = Database(str(tmp_path / "empty.db"))
+    assert db.load_longest_streak() is None
+    db.save_habit(Habit("Read", "Read every day", "daily"))
+    stats = db.load_stats()[0]
+    assert (stats['completion_count'], stats['last_completion'], stats['current_streak']) == (0, None, 0)
+    db.save_habit(Habit("Walk", "Take a walk", "daily"))
+    longest = db.load_longest_streak()  # No habit was completed yet, so the oldest one
+    assert (longest['name'], longest['current_streak']) == ("Read", 0)
+    db.close()
+
+
+# Test that a read-only connection can load habits but not write
+def test_read_only_database(db):
+    read_only = Database(db.conn.execute('PRAGMA database_list').fetchone()[2], read_only=True)
+    assert [habit.get_name() for habit in read_only.load_habit_objects(id_range=(1, 2))] == ["Read", "Exercise"]
+    db.delete_habit(1)
+    habits = read_only.load_habit_objects(id_range=(1, 2), with_ids=True)  # IDs and habits from the same query
+    assert [(habit_id, habit.get_name()) for habit_id, habit in habits] == [(2, "Exercise")]
+    with pytest.raises(sqlite3.OperationalError):
+        read_only.save_habit(Habit("Write", "Write daily", "daily"))
+    read_only.close()
+
+
+# Test that the database runs in WAL mode and rejects writes outside a transaction
+def test_wal_and_query_only_readers(db):
+    assert db.conn.execute('PRAGMA journal_mode').fetchone()[0] == "wal"
+    with pytest.raises(sqlite3.OperationalError):
+        db.conn.execute('DELETE FROM completions')
+    with db.transaction():
+        db.conn.execute('DELETE FROM completions')
+    assert db.load_all_completions() == {}
+
+
+# Test that the reader connection of a thread is closed when the thread ends
+def test_reader_connections_closed_with_their_threads(db):
+    db.load_habits()
+    readers = len(db._readers)
+    threads = [threading.Thread(target=db.load_habits) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+        thread.join()
+    assert len(db._readers) == readers
+    db.load_habits()
+    db.close()
+    assert db._readers == []
+
+
+# Stress test: many threads of two Database instances on the same file read and write at the same time
+def test_concurrent_readers_and_writers(tmp_path):
+    path = str(tmp_path / "concurrent.db")
+    databases = [Database(path), Database(path)]
+    habit_ids = [databases[0].save_habit(Habit(f"Habit {i}", "Concurrent", "daily")) for i in range(8)]
+    base_date = datetime(2023, 1, 1, 9)
+    errors = []
+
+    def writer(n):
+        try:
+            db = databases[n % 2]
+            habit_id = habit_ids[n]
+            for day in range(50):
+                db.save_completion(habit_id, base_date + timedelta(days=day))
+        except Exception as error:
+            errors.append(error)
+
+    def reader(n):
+        try:
+            db = databases[n % 2]
+            for _ in range(50):
+                stats = db.load_stats()
+                assert all(row['completion_count'] == row['current_streak'] for row in stats)
+                db.load_habit_objects()
+        except Exception as error:
+            errors.append(error)
+
+    threads = ([threading.Thread(target=writer, args=(n,)) for n in range(8)]
+               + [threading.Thread(target=reader, args=(n,)) for n in range(8)])
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert [row['completion_count'] for row in databases[1].load_stats()] == [50] * 8
+    for database in databases:
+        database.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        databases[0].load_stats()
+
+
+# Test that the completion bitsets are stored, lossless per day, and rebuilt after the completions change
+def test_completion_bitsets(db):
+    bitsets = db.load_completion_bitsets()
+    assert db.conn.execute('SELECT COUNT(*) FROM completion_bitsets').fetchone()[0] == 2
+    stored = db.load_completion_bitsets()
+    assert {habit_id: list(bitset) for habit_id, bitset in stored.items()} == {
+        habit_id: list(bitset) for habit_id, bitset in bitsets.items()}
+    for habit in db.load_habit_objects(calendar=True):
+        habit_id = db.get_habit_id(habit.get_name())
+        assert [completion.date() for completion in habit.get_completions()] == [
+            completion.date() for completion in db.load_completions(habit_id)]
+    read_id = db.get_habit_id("Read")
+    db.save_completion(read_id, datetime(2023, 9, 26, 7))
+    assert db.conn.execute('SELECT COUNT(*) FROM completion_bitsets').fetchone()[0] == 1
+    read = db.load_habit_objects(calendar=True)[0]
+    assert read.streak() == 6
+    assert read.get_last_completion() == datetime(2023, 9, 26)
+    read_only = Database(db.db_name, read_only=True)
+    assert list(read_only.load_completion_bitsets(id_range=(read_id, read_id))[read_id]) == list(
+        db.load_completion_bitsets()[read_id])
+    read_only.close()
+
+    # Loading stored bitsets only reads, so it does not wait for a transaction of another thread
+    in_transaction, done, waited = threading.Event(), threading.Event(), []
+
+    def write():
+        with db.transaction():
+            in_transaction.set()
+            waited.append(done.wait(5))
+    writer = threading.Thread(target=write)
+    writer.start()
+    in_transaction.wait(5)
+    assert len(db.load_completion_bitsets()) == 2
+    done.set()
+    writer.join()
+    assert waited == [True]  # The bitsets were loaded while the transaction was open
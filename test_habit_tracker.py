@@ -1,7 +1,11 @@
+import random
 import pytest
 from datetime import datetime, timedelta
-from habit import Habit
-from analyse import list_all_habits, list_habits_by_periodicity, longest_streak_all_habits, longest_streak_for_habit
+from habit import CalendarHabit, CompactHabit, CompletionCalendar, Habit
+from habit_tracker import HabitTracker
+from analyse import list_all_habits, list_habits_by_periodicity, longest_streak_all_habits, longest_streak_for_habit, \
+    longest_ever_streak_for_habit, longest_ever_streak_all_habits, streak_summary
+from streaks import PeriodBitset, RunIndex, period_ordinal
 
 
 # Fixture to set up sample habits that can be reused for testing
@@ -141,3 +145,297 @@ def test_weekly_habit_with_intermittent_completions(sample_habits):
 
 
 
+
+
+# Reference implementation of the streak calculation that walks the full sorted history
+def reference_streak(periodicity, completions):
+    if not completions:
+        return 0
+    sorted_completions = sorted(set(completions))
+    current_streak = 1
+    for i in range(len(sorted_completions) - 1, 0, -1):
+        current = sorted_completions[i]
+        previous = sorted_completions[i - 1]
+        if periodicity == 'daily':
+            if (current.date() - previous.date()).days == 1:
+                current_streak += 1
+            else:
+                break
+        elif periodicity == 'weekly':
+            current_monday = current.date() - timedelta(days=current.weekday())
+            previous_monday = previous.date() - timedelta(days=previous.weekday())
+            if (current_monday - previous_monday).days == 7:
+                current_streak += 1
+            else:
+                break
+    return current_streak
+
+
+# Original reference implementation, which counts daily completions 24 to 48 hours apart and weeks by ISO
+# week number; it agrees with the calendar rule on completions at the same time of day within years of 52 weeks
+def reference_streak_24_48(periodicity, completions):
+    if not completions:
+        return 0
+    sorted_completions = sorted(set(completions))
+    current_streak = 1
+    for i in range(len(sorted_completions) - 1, 0, -1):
+        current = sorted_completions[i]
+        previous = sorted_completions[i - 1]
+        if periodicity == 'daily':
+            if (current - previous).days == 1:
+                current_streak += 1
+            else:
+                break
+        elif periodicity == 'weekly':
+            current_year, current_week = current.isocalendar()[:2]
+            previous_year, previous_week = previous.isocalendar()[:2]
+            if (current_year == previous_year and current_week == previous_week + 1) or (
+                    current_year == previous_year + 1 and current_week == 1 and previous_week in {52, 53}):
+                current_streak += 1
+            else:
+                break
+    return current_streak
+
+
+# Property test: on histories where both rules agree, the streak still matches the original algorithm
+@pytest.mark.parametrize("periodicity", ["daily", "weekly"])
+def test_streak_matches_original_reference(periodicity):
+    rng = random.Random(periodicity)
+    step = timedelta(days=1) if periodicity == 'daily' else timedelta(weeks=1)
+    for _ in range(200):
+        habit = Habit("Random", "Random completions", periodicity)
+        hour = rng.randrange(24)
+        # Every completion at the same time of day, within 2023 and 2024, which have 52 ISO weeks each
+        periods = sorted(rng.sample(range(40), rng.randrange(1, 30)))
+        for period in rng.sample(periods, len(periods)):
+            habit.complete_habit(datetime(2023, 1, 2, hour) + step * period)
+        completions = habit.get_completions()
+        assert habit.streak() == reference_streak_24_48(periodicity, completions)
+        assert habit.streak() == reference_streak(periodicity, completions)
+
+
+# Property test: the cached, incrementally updated streak always matches the full recalculation
+@pytest.mark.parametrize("periodicity", ["daily", "weekly"])
+def test_incremental_streak_matches_reference(periodicity):
+    rng = random.Random(periodicity)
+    start = datetime(2020, 12, 20)
+    for _ in range(200):
+        habit = Habit("Random", "Random completions", periodicity)
+        completion_date = start + timedelta(hours=rng.randrange(24))
+        for _ in range(rng.randrange(1, 40)):
+            if rng.random() < 0.15:
+                # Out of order completion somewhere in the history
+                completion_date_to_add = start + timedelta(hours=rng.randrange(24 * 400))
+            else:
+                step = timedelta(days=1) if periodicity == 'daily' else timedelta(weeks=1)
+                completion_date = completion_date + step * rng.choice([1, 1, 1, 2]) + timedelta(
+                    hours=rng.randrange(-6, 7))
+                completion_date_to_add = completion_date
+            habit.complete_habit(completion_date_to_add)
+            assert habit.get_completions() == sorted(habit.get_completions())
+            assert habit.streak() == reference_streak(periodicity, habit.get_completions())
+
+
+# Test that loading completions in any order gives the same streak as the reference implementation
+def test_set_completions_matches_reference(sample_habits, setup_completions):
+    for habit in sample_habits:
+        completions = list(habit.get_completions())
+        random.Random(habit.get_name()).shuffle(completions)
+        habit.set_completions(completions + completions[:2])  # Duplicates are counted once
+        assert habit.streak() == reference_streak(habit.get_periodicity(), completions)
+
+
+# Test the longest-ever streak, which can be longer than the current streak
+def test_longest_ever_streak(sample_habits, setup_completions):
+    habit = sample_habits[2]  # "Meditate": runs of 2 and 3 days with a one-day gap
+    assert longest_ever_streak_for_habit(habit) == 3
+    base_date = datetime(2023, 9, 25)
+    habit.complete_habit(base_date + timedelta(days=2))  # Starts a new run of one day
+    summary = streak_summary(habit)
+    assert summary.longest == 3
+    assert summary.current == 1
+    assert summary.runs == 3
+    assert summary.gaps == {1: 1, 2: 1}
+    assert longest_ever_streak_all_habits(sample_habits).get_name() == "Read"
+
+
+# Test that the cached run index is extended in place and matches a freshly built index
+def test_run_index_extended_in_place():
+    rng = random.Random(6)
+    for periodicity in ["daily", "weekly"]:
+        habit = Habit("Random", "Random completions", periodicity)
+        index = habit.run_index()
+        for _ in range(300):
+            habit.complete_habit(datetime(2022, 12, 1) + timedelta(days=rng.randrange(400)))
+        assert habit.run_index() is index
+        assert index.runs() == RunIndex.from_completions(habit.get_completions(), periodicity).runs()
+
+
+# Test that weekly periods are consecutive across the turn of the year
+def test_weekly_periods_across_years():
+    last_week_of_2020 = datetime(2020, 12, 31)  # ISO week 53 of 2020
+    first_week_of_2021 = datetime(2021, 1, 4)  # ISO week 1 of 2021
+    assert period_ordinal(first_week_of_2021, 'weekly') == period_ordinal(last_week_of_2020, 'weekly') + 1
+    assert period_ordinal(datetime(2021, 1, 3), 'weekly') == period_ordinal(last_week_of_2020, 'weekly')
+
+
+# Test the name and periodicity indexes of the habit tracker through adds, renames and deletes
+def test_habit_tracker_indexes(sample_habits):
+    tracker = HabitTracker()
+    for habit in sample_habits:
+        tracker.add_habit(habit)
+    assert tracker.habits == sample_habits
+    assert tracker.get_habit("READ") is sample_habits[1]
+    assert [habit.get_name() for habit in tracker.get_habits_by_periodicity("weekly")] == ["Exercise", "Art Class"]
+    with pytest.raises(ValueError):
+        tracker.add_habit(Habit("read", "Duplicate name", "daily"))
+
+    sample_habits[1].edit_habit("Read Books", "Read every day")
+    assert tracker.get_habit("read") is None
+    assert tracker.get_habit("read books") is sample_habits[1]
+    assert sample_habits[1] in tracker.get_habits_by_periodicity("daily")
+
+    tracker.delete_habit("read BOOKS")
+    assert tracker.get_habit("Read Books") is None
+    assert sample_habits[1] not in tracker.habits
+    assert sample_habits[1] not in tracker.get_habits_by_periodicity("daily")
+    sample_habits[1].edit_habit("Read", "Read every day")  # No longer tracked, so not re-indexed
+    assert tracker.get_habit("Read") is None
+
+
+# Test that duplicate completions are detected per day or calendar week, also across years
+def test_duplicate_completion_per_period():
+    daily = Habit("Read", "Read every day", "daily")
+    assert daily.complete_habit(datetime(2023, 9, 25, 8))
+    assert daily.complete_habit(datetime(2023, 9, 20, 8))
+    assert not daily.complete_habit(datetime(2023, 9, 20, 21))  # Same day as an earlier completion
+    assert daily.is_completed_in_period(datetime(2023, 9, 25, 23))
+
+    weekly = Habit("Exercise", "Weekly Exercise", "weekly")
+    assert weekly.complete_habit(datetime(2022, 9, 26))  # ISO week 39 of 2022
+    assert weekly.complete_habit(datetime(2023, 9, 25))  # ISO week 39 of 2023
+    assert weekly.complete_habit(datetime(2020, 12, 28))  # ISO week 53 of 2020
+    assert not weekly.complete_habit(datetime(2021, 1, 3))  # Still ISO week 53 of 2020
+    assert len(weekly.get_completions()) == 3
+
+
+# Test that a compact habit behaves exactly like a regular habit
+@pytest.mark.parametrize("periodicity", ["daily", "weekly"])
+def test_compact_habit_matches_habit(periodicity):
+    rng = random.Random(12)
+    habit = Habit("Random", "Random completions", periodicity)
+    compact = CompactHabit("Random", "Random completions", periodicity)
+    assert not hasattr(compact, "__dict__")
+    for _ in range(300):
+        completion_date = datetime(2022, 12, 1) + timedelta(days=rng.randrange(200), microseconds=rng.randrange(10 ** 11))
+        assert compact.complete_habit(completion_date) == habit.complete_habit(completion_date)
+        assert compact.streak() == habit.streak()
+    assert compact.get_completions() == habit.get_completions()
+    assert compact.get_completions()[-3:] == habit.get_completions()[-3:]
+    assert compact.get_last_completion() == habit.get_last_completion()
+    assert streak_summary(compact) == streak_summary(habit)
+
+    compact.set_completions(reversed(habit.get_completions()))
+    assert compact.streak() == habit.streak()
+    assert compact.is_completed_in_period(habit.get_completions()[5])
+
+
+# Test that the bitset of periods answers the same queries as the run-length index
+def test_period_bitset_matches_run_index():
+    rng = random.Random(8)
+    for _ in range(200):
+        periods = [rng.randrange(730000, 730000 + rng.choice([10, 100, 1000])) for _ in range(rng.randrange(0, 300))]
+        bitset = PeriodBitset(periods[:len(periods) // 2], first_period=730005)
+        for period in periods[len(periods) // 2:]:
+            is_new = period not in bitset
+            assert bitset.add(period) == is_new
+            assert period in bitset
+        index = RunIndex(periods)
+        assert bitset.runs() == index.runs()
+        assert bitset.summary() == index.summary()
+        assert list(bitset) == sorted(set(periods))
+        assert bitset.count() == len(set(periods))
+        assert bitset.count(730020, 730060) == len({period for period in periods if 730020 <= period <= 730060})
+        restored = PeriodBitset.from_bytes(bitset.first_period, bitset.to_bytes())
+        assert list(restored) == list(bitset)
+
+
+# Test that a calendar habit behaves like a regular habit completed once per day, at midnight
+@pytest.mark.parametrize("periodicity", ["daily", "weekly"])
+def test_calendar_habit_matches_habit(periodicity):
+    rng = random.Random(13)
+    habit = Habit("Random", "Random completions", periodicity)
+    calendar = CalendarHabit("Random", "Random completions", periodicity)
+    calendar._creation_date = datetime(2023, 1, 1)
+    for _ in range(300):
+        completion_date = datetime(2022, 12, 1) + timedelta(days=rng.randrange(200))
+        assert calendar.complete_habit(completion_date + timedelta(hours=rng.randrange(24))) == \
+            habit.complete_habit(completion_date)
+        assert calendar.streak() == habit.streak()
+    assert calendar.get_completions() == habit.get_completions()
+    assert calendar.get_completion_count() == habit.get_completion_count()
+    assert calendar.get_last_completion() == habit.get_last_completion()
+    assert streak_summary(calendar) == streak_summary(habit)
+    assert longest_ever_streak_for_habit(calendar) == longest_ever_streak_for_habit(habit)
+
+    calendar.set_completions(reversed(habit.get_completions()))
+    assert calendar.streak() == habit.streak()
+    assert calendar.is_completed_in_period(habit.get_completions()[5] + timedelta(hours=20))
+
+
+# Test that a back-dated completion sets its bit in the calendar without listing the other completions
+def test_back_dated_calendar_completion_inserted_in_place(monkeypatch):
+    habit = CalendarHabit("Read", "Read every day", "daily")
+    habit._creation_date = datetime(2023, 1, 1)
+    for day in (1, 2, 5, 6):
+        habit.complete_habit(datetime(2023, 1, day, 8))
+
+    def fail(calendar):
+        raise AssertionError("the calendar was listed")
+    monkeypatch.setattr(CompletionCalendar, "__iter__", fail)  # Also used by any index other than -1
+    assert habit.complete_habit(datetime(2023, 1, 3, 8))
+    monkeypatch.undo()
+    assert habit.get_completions() == [datetime(2023, 1, day) for day in (1, 2, 3, 5, 6)]
+    assert habit.streak() == 2
+
+
+# Test that every streak representation counts consecutive calendar periods, whatever the time of day
+@pytest.mark.parametrize("periodicity", ["daily", "weekly"])
+def test_streaks_count_calendar_periods(periodicity):
+    if periodicity == 'daily':
+        habit = Habit("Read", "Read every day", "daily")
+        # Only 9 hours between the first two completions, and almost 48 hours between the last two
+        completion_dates = [datetime(2023, 1, 1, 23), datetime(2023, 1, 2, 8), datetime(2023, 1, 3, 8),
+                            datetime(2023, 1, 4, 0, 30), datetime(2023, 1, 5, 23, 59)]
+    else:
+        habit = Habit("Review", "Weekly review", "weekly")
+        # Sunday to Monday is the next ISO week; ISO week 52 of 2020 is followed by week 53, then week 1
+        completion_dates = [datetime(2020, 12, 20, 23), datetime(2020, 12, 21, 8), datetime(2020, 12, 30, 8),
+                            datetime(2021, 1, 10, 23), datetime(2021, 1, 11, 1)]
+    for completion_date in completion_dates:
+        habit.complete_habit(completion_date)
+    assert habit.streak() == streak_summary(habit).current == reference_streak(periodicity, completion_dates) == 5
+    if periodicity == 'daily':
+        assert reference_streak_24_48(periodicity, completion_dates) == 2  # Less than 24 hours breaks the old rule
+    else:
+        assert reference_streak_24_48(periodicity, completion_dates) == 5  # ISO weeks agree with calendar weeks
+        gap = Habit("Review", "Weekly review", "weekly")
+        for completion_date in [datetime(2020, 12, 21, 8), datetime(2021, 1, 4, 8)]:
+            gap.complete_habit(completion_date)  # Week 52 and week 1, skipping week 53
+        assert gap.streak() == streak_summary(gap).current == 1
+        assert reference_streak_24_48(periodicity, gap.get_completions()) == 2
+
+    rng = random.Random(periodicity)
+    step = timedelta(days=1) if periodicity == 'daily' else timedelta(weeks=1)
+    for _ in range(100):
+        habits = [cls("Random", "Random completions", periodicity) for cls in (Habit, CompactHabit, CalendarHabit)]
+        habits[2]._creation_date = datetime(2022, 12, 1)
+        for i in range(rng.randrange(1, 30)):
+            completion_date = datetime(2023, 1, 2) + step * (i + rng.choice([0, 0, 0, 1])) + timedelta(
+                minutes=rng.randrange(24 * 60 if periodicity == 'daily' else 7 * 24 * 60))
+            for each in habits:
+                each.complete_habit(completion_date)
+        expected = streak_summary(habits[0]).current
+        assert [each.streak() for each in habits] == [expected] * 3
+        habits[0].set_completions(habits[0].get_completions())
+        assert habits[0].streak() == expected
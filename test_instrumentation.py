@@ -0,0 +1,72 @@
+import logging
+import sqlite3
+import time
+import pytest
+from datetime import datetime, timedelta
+from habit import Habit
+from habit_tracker import HabitTracker
+from db import Database
+import analyse
+import instrumentation
+
+
+# Fixture that enables the instrumentation for a test and restores the original methods afterwards
+@pytest.fixture
+def instrumented():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+# Test that disabled instrumentation leaves the original methods and connections in place
+def test_disabled_costs_nothing(tmp_path):
+    originals = (Database.load_stats, Habit.streak, HabitTracker.get_habit, analyse.longest_streak_all_habits)
+    instrumentation.enable()
+    instrumentation.disable()
+    assert (Database.load_stats, Habit.streak, HabitTracker.get_habit,
+            analyse.longest_streak_all_habits) == originals
+    db = Database(str(tmp_path / "plain.db"))
+    assert type(db.conn) is sqlite3.Connection
+    db.close()
+
+
+# Test the calls, statements and rows recorded for database, tracker, habit and analysis operations
+def test_stats(tmp_path, instrumented):
+    db = Database(str(tmp_path / "instrumented.db"))
+    habit_id = db.save_habit(Habit("Read", "Read a book", "daily"))
+    db.save_completions_bulk(habit_id, [datetime(2023, 1, 1, 10) + timedelta(days=i) for i in range(30)])
+    tracker = HabitTracker()
+    for habit in db.load_habit_objects():
+        tracker.add_habit(habit)
+    tracker.get_habit("read")
+    analyse.longest_streak_all_habits(tracker.habits)
+    db.close()
+
+    stats = instrumentation.stats()
+    # BEGIN IMMEDIATE, creating and clearing the staging table, 30 staged rows and the insert from them
+    assert stats['Database.save_completions_many']['statements'] == 34
+    assert stats['Database.load_all_completions']['rows'] == 30
+    assert stats['Database.load_habit_objects']['rows'] == 31  # Includes the rows of load_all_completions
+    assert stats['HabitTracker.get_habit']['calls'] == 1
+    assert stats['Habit.streak']['calls'] == 1
+    assert stats['analyse.longest_streak_all_habits']['calls'] == 1
+    operation = stats['Database.load_habit_objects']
+    assert 0 < operation['p50_ms'] <= operation['p99_ms'] <= operation['total_ms']
+    assert "Database.load_habit_objects" in instrumentation.format_stats()
+
+
+# Test that the periodic log dump logs the measurements
+def test_log_dump(instrumented, caplog):
+    Habit("Read", "Read a book", "daily").streak()
+    with caplog.at_level(logging.INFO, logger="habit_tracker.performance"):
+        instrumentation.start_log_dump(interval=0.01)
+        try:
+            for _ in range(100):
+                if caplog.records:
+                    break
+                time.sleep(0.01)
+        finally:
+            instrumentation.stop_log_dump()
+    assert "Habit.streak" in caplog.records[0].getMessage()
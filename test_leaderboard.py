@@ -0,0 +1,94 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from habit import Habit
+from habit_tracker import HabitTracker
+from leaderboard import Leaderboard
+from analyse import longest_ever_streak_for_habit
+
+
+# Helper ranking the habits from scratch, longest streak first and ties in the order the habits were added
+def brute_force(habits, by, periodicity=None):
+    streak = Habit.streak if by == "current" else longest_ever_streak_for_habit
+    ranked = [habit for habit in habits if periodicity in (None, habit.get_periodicity())]
+    return [(habit, streak(habit)) for habit in sorted(ranked, key=lambda habit: -streak(habit))]
+
+
+# Test that the leaderboard of a tracker matches a ranking from scratch through completions, renames and deletes
+def test_leaderboard_matches_brute_force():
+    rng = random.Random(24)
+    tracker = HabitTracker(Leaderboard())
+    for i in range(40):
+        tracker.add_habit(Habit(f"Habit {i}", "Random completions", rng.choice(["daily", "weekly"])))
+    for step in range(1500):
+        habit = rng.choice(tracker.habits)
+        habit.complete_habit(datetime(2023, 1, 1, 12) + timedelta(days=rng.randrange(120)))
+        if step % 100 == 99:
+            tracker.delete_habit(rng.choice(tracker.habits).get_name())
+            habit = rng.choice(tracker.habits)
+            habit.edit_habit(habit.get_name().upper(), "Renamed")
+    leaderboard = tracker.leaderboard
+    assert len(leaderboard) == len(tracker.habits) == 25
+    for by in ["current", "best"]:
+        for periodicity in [None, "daily", "weekly"]:
+            expected = brute_force(tracker.habits, by, periodicity)
+            assert leaderboard.top(len(tracker.habits), by, periodicity) == expected
+            assert leaderboard.top(3, by, periodicity) == expected[:3]
+            for rank, (habit, _) in enumerate(expected, 1):
+                assert leaderboard.rank(habit, by, periodicity) == rank
+
+
+# Test breaking a streak, ties, and habits that are not ranked
+def test_break_streak_and_unranked_habits():
+    read = Habit("Read", "Read every day", "daily")
+    walk = Habit("Walk", "Walk every day", "daily")
+    for day in range(3):
+        read.complete_habit(datetime(2023, 1, 1 + day, 8))
+        walk.complete_habit(datetime(2023, 1, 1 + day, 9))
+    leaderboard = Leaderboard([read, walk])
+    assert leaderboard.top() == [(read, 3), (walk, 3)]
+    leaderboard.break_streak(read)
+    assert leaderboard.streaks(read) == (0, 3)
+    assert leaderboard.top(by="current") == [(walk, 3), (read, 0)]
+    assert leaderboard.top(by="best") == [(read, 3), (walk, 3)]
+    assert leaderboard.rank(read, periodicity="weekly") is None
+    leaderboard.remove(read)
+    assert read not in leaderboard
+    assert leaderboard.rank(read) is None
+    with pytest.raises(ValueError):
+        leaderboard.add(walk)
+    with pytest.raises(ValueError):
+        leaderboard.top(by="streak")
+
+
+# Test that the best streak is never shorter than the current streak, whatever the time of day
+def test_best_streak_at_least_current():
+    habit = Habit("Read", "Read every day", "daily")
+    for completion_date in [datetime(2023, 1, 1, 1), datetime(2023, 1, 2, 23, 30), datetime(2023, 1, 4, 23)]:
+        habit.complete_habit(completion_date)
+    tracker = HabitTracker(Leaderboard())
+    tracker.add_habit(habit)
+    assert tracker.leaderboard.streaks(habit) == (habit.streak(), longest_ever_streak_for_habit(habit)) == (1, 2)
+    for day, expected in [(5, (2, 2)), (6, (3, 3)), (3, (6, 6))]:  # The last one is back-dated and joins the runs
+        habit.complete_habit(datetime(2023, 1, day, 8))
+        assert tracker.leaderboard.streaks(habit) == expected
+    other = Habit("Walk", "Walk every day", "daily")
+    other.complete_habit(datetime(2023, 1, 6, 8))
+    tracker.leaderboard.add(other, best=0)
+    assert tracker.leaderboard.streaks(other) == (1, 1)
+
+
+# Test that lazily loaded habits are ranked by current streak without fetching their completions
+def test_lazy_habits_ranked_without_fetching():
+    fetched = []
+    tracker = HabitTracker(Leaderboard())
+    for i, streak in enumerate([2, 5, 3]):
+        completions = [datetime(2023, 1, 10, 8) - timedelta(days=day) for day in reversed(range(streak))]
+        tracker.add_habit(Habit.from_summary(f"Habit {i}", "Lazy habit", "daily", datetime(2023, 1, 1),
+                                             streak, completions[-1], streak,
+                                             lambda i=i, completions=completions: fetched.append(i) or iter(completions)))
+    top = tracker.leaderboard.top(2)
+    assert [(habit.get_name(), streak) for habit, streak in top] == [("Habit 1", 5), ("Habit 2", 3)]
+    assert fetched == []
+    assert [streak for _, streak in tracker.leaderboard.top(by="best")] == [5, 3, 2]
+    assert sorted(fetched) == [0, 1, 2]
@@ -0,0 +1,55 @@
+import pytest
+from datetime import datetime, timedelta
+from habit import Habit
+from db import Database
+from snapshot import load_tracker, read_snapshot, snapshot_path, write_snapshot
+
+
+# Fixture to set up a database file with two habits
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / "snapshot.db"))
+    base_date = datetime(2023, 9, 25, 10)
+    read_id = database.save_habit(Habit("Read", "Read a book", "daily"))
+    database.save_completions_bulk(read_id, [base_date - timedelta(days=i) for i in range(5)])
+    database.save_habit(Habit("Exercise", "Go running", "weekly"))
+    yield database
+    database.close()
+
+
+# Test that the version token changes with every change to habits and completions
+def test_version_token_changes(db):
+    token = db.get_version_token()
+    db.save_completion(db.get_habit_id("Exercise"), datetime(2023, 9, 25, 10))
+    assert db.get_version_token() != token
+    token = db.get_version_token()
+    db.update_habit(db.get_habit_id("Exercise"), "Running", "Go running")
+    assert db.get_version_token() != token
+    token = db.get_version_token()
+    db.delete_habit(db.get_habit_id("Running"))
+    assert db.get_version_token() != token
+
+
+# Test that a fresh snapshot is loaded without querying the habits, with the same state as the database
+def test_fresh_snapshot_is_used(db, monkeypatch):
+    expected = load_tracker(db)
+    monkeypatch.setattr(db, "load_stats", lambda: pytest.fail("The snapshot should have been used"))
+    tracker = load_tracker(db)
+    assert [habit.get_name() for habit in tracker.habits] == [habit.get_name() for habit in expected.habits]
+    read = tracker.get_habit("read")
+    assert (read.streak(), read.get_completion_count()) == (5, 5)
+    assert read.get_completions() == db.load_completions(db.get_habit_id("Read"))  # Fetched lazily
+
+
+# Test that a snapshot is rebuilt once the database has changed, or when the file is damaged
+def test_stale_or_damaged_snapshot_is_rebuilt(db):
+    write_snapshot(db)
+    db.save_completion(db.get_habit_id("Read"), datetime(2023, 9, 26, 10))
+    assert read_snapshot(db) is None
+    assert load_tracker(db).get_habit("Read").streak() == 6
+    assert read_snapshot(db) is not None
+
+    with open(snapshot_path(db), "wb") as stream:
+        stream.write(b"not a snapshot")
+    assert read_snapshot(db) is None
+    assert load_tracker(db).get_habit("Read").streak() == 6
@@ -0,0 +1,103 @@
+import random
+from datetime import datetime, timedelta
+from habit import Habit
+from habit_tracker import HabitTracker
+from leaderboard import Leaderboard
+from streak_expiry import StreakExpiry, streak_deadline
+from analyse import longest_streak_all_habits
+
+
+# Test that a streak lapses at the end of the day or calendar week after the latest completion
+def test_streak_deadline():
+    daily = Habit("Read", "Read every day", "daily")
+    assert streak_deadline(daily) is None
+    daily.complete_habit(datetime(2023, 9, 25, 10))  # A Monday
+    assert streak_deadline(daily) == datetime(2023, 9, 27)
+    weekly = Habit("Exercise", "Weekly Exercise", "weekly")
+    weekly.complete_habit(datetime(2023, 9, 27, 18))
+    assert streak_deadline(weekly) == datetime(2023, 10, 9)
+
+
+# Test that advancing the clock breaks exactly the streaks whose deadline passed
+def test_advance_breaks_expired_streaks():
+    rng = random.Random(25)
+    start = datetime(2023, 3, 1)
+    expiry = StreakExpiry(now=start)
+    habits = []
+    for i in range(100):
+        habit = Habit(f"Habit {i}", "Random completions", rng.choice(["daily", "weekly"]))
+        for day in range(rng.randrange(1, 30)):
+            habit.complete_habit(start - timedelta(days=rng.randrange(1, 3) + day, hours=rng.randrange(24)))
+        habits.append(habit)
+    streaks = {habit: habit.streak() for habit in habits}
+    for habit in habits:
+        expiry.track(habit)
+    broken = {habit for habit in habits if streak_deadline(habit) <= start}
+    for hours in range(0, 24 * 21, 7):
+        now = start + timedelta(hours=hours)
+        broken.update(expiry.advance(now))
+        assert broken == {habit for habit in habits if streak_deadline(habit) <= now}
+        assert all(habit.streak() == (0 if habit in broken else streaks[habit]) for habit in habits)
+    assert len(expiry) == 0
+    assert expiry.next_deadline() is None
+
+
+# Test that a new completion restarts a broken streak and that an old one leaves it broken
+def test_completion_after_expiry():
+    habit = Habit("Read", "Read every day", "daily")
+    for day in range(1, 6):
+        habit.complete_habit(datetime(2023, 9, day, 8))
+    tracker = HabitTracker(Leaderboard(), StreakExpiry(now=datetime(2023, 9, 6, 12)))
+    tracker.add_habit(habit)
+    assert tracker.expiry.next_deadline() == datetime(2023, 9, 7)
+    assert tracker.advance_clock(datetime(2023, 9, 7, 0, 1)) == [habit]
+    assert habit.streak() == 0
+    assert tracker.leaderboard.streaks(habit) == (0, 5)
+    assert tracker.advance_clock(datetime(2023, 9, 8)) == []
+    habit.complete_habit(datetime(2023, 8, 30, 8))  # Back-dated, the streak stays broken
+    assert habit.streak() == 0
+    habit.complete_habit(datetime(2023, 9, 8, 9))
+    assert habit.streak() == 1
+    assert tracker.leaderboard.streaks(habit) == (1, 5)
+    assert tracker.expiry.next_deadline() == datetime(2023, 9, 10)
+    tracker.delete_habit("Read")
+    assert len(tracker.expiry) == 0
+
+
+# Test that a broken streak of a lazily loaded habit stays broken when its completions are fetched
+def test_lazy_habit_stays_broken():
+    completions = [datetime(2023, 9, day, 8) for day in range(1, 6)]
+    habit = Habit.from_summary("Read", "Read every day", "daily", datetime(2023, 9, 1), len(completions),
+                               completions[-1], 5, lambda: iter(completions))
+    other = Habit("Walk", "Walk every day", "daily")
+    other.complete_habit(datetime(2023, 9, 20, 8))
+    tracker = HabitTracker(expiry=StreakExpiry(now=datetime(2023, 9, 20, 12)))
+    tracker.add_habit(habit)
+    tracker.add_habit(other)
+    assert habit.streak() == 0
+    assert len(habit.get_completions()) == 5
+    assert habit.streak() == 0
+    assert longest_streak_all_habits(tracker.habits) is other
+
+
+# Test that the leaderboard answers the longest current streak as the clock advances, without fetching histories
+def test_longest_streak_follows_the_clock():
+    rng = random.Random(250)
+    start = datetime(2023, 3, 1)
+    fetched = []
+    tracker = HabitTracker(Leaderboard(), StreakExpiry(now=start))
+    for i in range(60):
+        periodicity = rng.choice(["daily", "weekly"])
+        step = timedelta(days=1) if periodicity == 'daily' else timedelta(weeks=1)
+        streak = rng.randrange(1, 20)
+        last_completion = start - step * rng.randrange(0, 2) - timedelta(hours=rng.randrange(1, 24))
+        completions = [last_completion - step * n for n in reversed(range(streak))]
+        tracker.add_habit(Habit.from_summary(f"Habit {i}", "Lazy habit", periodicity, start - timedelta(days=365),
+                                             streak, last_completion, streak,
+                                             lambda i=i, completions=completions: fetched.append(i) or iter(completions)))
+    for hours in range(0, 24 * 21, 5):
+        tracker.advance_clock(start + timedelta(hours=hours))
+        (habit, streak), = tracker.leaderboard.top(1)
+        longest = longest_streak_all_habits(tracker.habits)
+        assert (habit, streak) == (longest, longest.streak())
+    assert fetched == []